@@ -2,9 +2,18 @@
 # ============================================================================
 # COMMIT 8: Agregados campos employer_email y safety_responsible_email
 # ============================================================================
-from django.contrib import admin
+import io
+
+from django.contrib import admin, messages
 from django.contrib.auth import get_user_model
 from django.contrib.auth.admin import UserAdmin as DjangoUserAdmin
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.http import HttpResponse
+from django.template.response import TemplateResponse
+from django.urls import path
+
+from .enrollment import enroll_from_csv
+from .forms import EnrollmentUploadForm
 
 User = get_user_model()
 
@@ -15,7 +24,7 @@ class UserAdmin(DjangoUserAdmin):
     ordering = ("cuil",)
     fieldsets = (
         (None, {"fields": ("cuil", "email", "password")}),
-        ("Datos personales", {"fields": ("full_name", "job_title", "company_name")}),
+        ("Datos personales", {"fields": ("full_name", "job_title", "company_name", "company")}),
         # =====================================================================
         # ✅ COMMIT 8: Nueva sección para emails de notificación de certificados
         # =====================================================================
@@ -31,8 +40,63 @@ class UserAdmin(DjangoUserAdmin):
         (None, {"classes": ("wide",), "fields": ("cuil", "email", "password1", "password2")}),
     )
     search_fields = ("cuil", "email", "full_name", "company_name")
+    autocomplete_fields = ("company",)
     # =========================================================================
     # ✅ COMMIT 8: Agregar filtros para los nuevos campos
     # =========================================================================
     list_filter = ("is_staff", "is_active", "is_superuser")
     # =========================================================================
+
+    change_list_template = "admin/accounts/traineeuser/change_list.html"
+
+    def get_urls(self):
+        custom = [
+            path(
+                "enroll/",
+                self.admin_site.admin_view(self.enroll_view),
+                name="accounts_traineeuser_enroll",
+            ),
+        ]
+        return custom + super().get_urls()
+
+    def enroll_view(self, request):
+        """Alta masiva desde CSV: valida, descarta duplicados y crea en lotes."""
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+
+        report = None
+        form = EnrollmentUploadForm(request.POST or None, request.FILES or None)
+        if request.method == "POST" and form.is_valid():
+            upload = form.cleaned_data["file"]
+            # Decodificamos en streaming: el archivo nunca se lee entero a memoria
+            lines = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+            try:
+                report = enroll_from_csv(
+                    lines,
+                    defaults={"company_name": form.cleaned_data["company_name"]},
+                    dry_run=form.cleaned_data["dry_run"],
+                )
+            except (ValidationError, UnicodeDecodeError) as exc:
+                detail = " ".join(exc.messages) if isinstance(exc, ValidationError) else "El archivo no es UTF-8."
+                messages.error(request, f"No se pudo procesar el CSV: {detail}")
+            else:
+                if form.cleaned_data["download_report"]:
+                    response = HttpResponse(content_type="text/csv; charset=utf-8")
+                    response["Content-Disposition"] = 'attachment; filename="alta_masiva_reporte.csv"'
+                    report.write_csv(response)
+                    return response
+                verb = "se crearían" if report.dry_run else "creados"
+                messages.success(
+                    request,
+                    f"{report.created} {verb}, {report.duplicates} duplicados, {report.invalid} inválidos.",
+                )
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Alta masiva de trabajadores",
+            "form": form,
+            "report": report,
+            "problems": report.problems[:500] if report else [],
+        }
+        return TemplateResponse(request, "admin/accounts/traineeuser/enroll.html", context)
@@ -1,10 +1,54 @@
 # apps/accounts/backends.py
+import uuid
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from asgiref.sync import sync_to_async
 
 User = get_user_model()
 
 
+# ─────────────────────────────────────────────────────────────
+# Cache del usuario de la sesión
+# ─────────────────────────────────────────────────────────────
+# Cada request autenticada llama a get_user()/aget_user(). Guardamos el objeto
+# completo bajo "accounts:user:<pk>:<versión>"; la versión vive en su propia
+# clave y se renueva en cada save/delete del usuario (ver signals.py), así que
+# una entrada vieja nunca se vuelve a leer. Como el objeto incluye el hash del
+# password, Django verifica el session auth hash sin ir a la base.
+# Solo con un cache compartido (SHARED_CACHE): con locmem la invalidación no
+# llega a los otros workers y un usuario desactivado o sin is_staff seguiría
+# autenticado ahí. En ese caso se lee siempre de la base (checks.py avisa).
+
+def _version_key(user_id) -> str:
+    return f"accounts:user:{user_id}:v"
+
+
+def _user_key(user_id, version) -> str:
+    return f"accounts:user:{user_id}:{version}"
+
+
+def _cache_timeout() -> int:
+    return getattr(settings, "ACCOUNTS_USER_CACHE_SECONDS", 300)
+
+
+def _cache_enabled() -> bool:
+    return getattr(settings, "SHARED_CACHE", False) and _cache_timeout() > 0
+
+
+def invalidate_cached_user(user_id) -> None:
+    """Renueva la versión: las copias cacheadas del usuario quedan huérfanas."""
+    cache.set(_version_key(user_id), uuid.uuid4().hex[:12], None)
+
+
+def _ensure_version(user_id, version):
+    if version is None:
+        cache.add(_version_key(user_id), uuid.uuid4().hex[:12], None)
+        version = cache.get(_version_key(user_id))
+    return version
+
+
 class CuilEmailBackend:
     """
     Autentica SIN password comparando cuil + email.
@@ -18,16 +62,31 @@ class CuilEmailBackend:
         if not cuil or not email:
             return None
         try:
-            user = User.objects.get(cuil=cuil, email__iexact=email)
+            user = User.objects.login_match(cuil, email).get()
         except User.DoesNotExist:
             return None
         return user if getattr(user, "is_active", True) else None
 
     def get_user(self, user_id):
+        if not _cache_enabled():
+            try:
+                return User.objects.get(pk=user_id)
+            except User.DoesNotExist:
+                return None
+        # La versión se lee ANTES que la base: si alguien guarda en el medio,
+        # lo que escribimos queda bajo la versión vieja y nadie lo lee.
+        version = cache.get(_version_key(user_id))
+        if version is not None:
+            user = cache.get(_user_key(user_id, version))
+            if user is not None:
+                return user
         try:
-            return User.objects.get(pk=user_id)
+            user = User.objects.get(pk=user_id)
         except User.DoesNotExist:
             return None
+        version = _ensure_version(user_id, version)
+        cache.set(_user_key(user_id, version), user, _cache_timeout())
+        return user
 
     # ─────────────────────────────────────────────────────────────
     # Métodos ASÍNCRONOS (usados por vistas async / ASGI / SSE)
@@ -37,14 +96,27 @@ class CuilEmailBackend:
         if not cuil or not email:
             return None
         try:
-            user = await User.objects.aget(cuil=cuil, email__iexact=email)
+            user = await User.objects.login_match(cuil, email).aget()
         except User.DoesNotExist:
             return None
         return user if getattr(user, "is_active", True) else None
 
     async def aget_user(self, user_id):
         """Versión asíncrona de get_user() - requerida por Django ASGI."""
+        if not _cache_enabled():
+            try:
+                return await User.objects.aget(pk=user_id)
+            except User.DoesNotExist:
+                return None
+        version = await cache.aget(_version_key(user_id))
+        if version is not None:
+            user = await cache.aget(_user_key(user_id, version))
+            if user is not None:
+                return user
         try:
-            return await User.objects.aget(pk=user_id)
+            user = await User.objects.aget(pk=user_id)
         except User.DoesNotExist:
-            return None
\ No newline at end of file
+            return None
+        version = await sync_to_async(_ensure_version)(user_id, version)
+        await cache.aset(_user_key(user_id, version), user, _cache_timeout())
+        return user
\ No newline at end of file
@@ -0,0 +1,26 @@
+# apps/accounts/checks.py
+from django.conf import settings
+from django.core.checks import Warning, register
+
+
+@register(deploy=True)
+def shared_cache_check(app_configs, **kwargs):
+    """
+    En producción (manage.py check --deploy) con locmem cada worker tiene su
+    propio cache: el usuario de la sesión y el módulo activo se leen de la base
+    en cada request. Funciona, pero se pierde el cache; conviene CACHE_URL.
+    """
+    if settings.DEBUG or getattr(settings, "SHARED_CACHE", False):
+        return []
+    return [
+        Warning(
+            "El cache por defecto es local a cada proceso (locmem).",
+            hint=(
+                "Con varios workers configurar un cache compartido (ej: "
+                "CACHE_URL=redis://127.0.0.1:6379/1): sin él no se cachean el "
+                "usuario de la sesión ni el módulo activo, y las sesiones "
+                "cached_db cerradas en un worker siguen en el cache de los otros."
+            ),
+            id="accounts.W001",
+        )
+    ]
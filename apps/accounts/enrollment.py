@@ -0,0 +1,290 @@
+# apps/accounts/enrollment.py
+"""
+Alta masiva de trabajadores desde un CSV.
+
+Las empresas nos mandan planillas de cientos o miles de trabajadores. En lugar
+de que cada uno pase por RegisterForm → confirm_post, el staff sube el CSV y:
+
+    1. se lee fila por fila (streaming, nunca el archivo entero en memoria)
+    2. cada fila se valida con la misma limpieza del registro (normalize_cuil,
+       emails en minúscula)
+    3. cada lote de CHUNK_SIZE filas válidas se compara contra la base con UNA
+       query (cuil IN ... OR lower(email) IN ...) y contra lo ya visto en el archivo
+    4. los nuevos se insertan con bulk_create, sin password (como create_user)
+
+10.000 filas ≈ 10 lotes ≈ una veintena de queries. El resultado es un reporte
+por fila (creado / duplicado / inválido) que se puede bajar como CSV.
+
+Columnas (encabezado obligatorio, en cualquier orden): cuil, email y opcionales
+full_name, job_title, company_name, employer_email, safety_responsible_email.
+También se aceptan los nombres en castellano (nombre, puesto, empresa, ...).
+"""
+
+import csv
+import io
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from django import forms
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from apps.companies.models import Company
+from apps.companies.services import add_enrolled
+
+from .forms import normalize_cuil
+from .models import normalize_login_email
+
+CHUNK_SIZE = 1000
+
+STATUS_CREATED = "creado"
+STATUS_DUPLICATE = "duplicado"
+STATUS_INVALID = "inválido"
+
+# Encabezado del CSV → campo del modelo
+HEADER_ALIASES = {
+    "cuil": "cuil",
+    "email": "email",
+    "mail": "email",
+    "full_name": "full_name",
+    "nombre": "full_name",
+    "nombre y apellido": "full_name",
+    "job_title": "job_title",
+    "puesto": "job_title",
+    "company_name": "company_name",
+    "empresa": "company_name",
+    "employer_email": "employer_email",
+    "email empleador": "employer_email",
+    "safety_responsible_email": "safety_responsible_email",
+    "email responsable": "safety_responsible_email",
+}
+TEXT_FIELDS = ("full_name", "job_title", "company_name")
+OPTIONAL_EMAILS = ("employer_email", "safety_responsible_email")
+MAX_TEXT_LENGTH = 200
+
+
+@dataclass
+class RowResult:
+    line: int
+    cuil: str
+    email: str
+    status: str
+    detail: str = ""
+
+
+@dataclass
+class EnrollmentReport:
+    rows: list[RowResult] = field(default_factory=list)
+    dry_run: bool = False
+
+    def count(self, status: str) -> int:
+        return sum(1 for r in self.rows if r.status == status)
+
+    @property
+    def created(self) -> int:
+        return self.count(STATUS_CREATED)
+
+    @property
+    def duplicates(self) -> int:
+        return self.count(STATUS_DUPLICATE)
+
+    @property
+    def invalid(self) -> int:
+        return self.count(STATUS_INVALID)
+
+    @property
+    def problems(self) -> list[RowResult]:
+        return [r for r in self.rows if r.status != STATUS_CREATED]
+
+    def write_csv(self, fh) -> None:
+        writer = csv.writer(fh)
+        writer.writerow(["linea", "cuil", "email", "estado", "detalle"])
+        for r in self.rows:
+            writer.writerow([r.line, r.cuil, r.email, r.status, r.detail])
+
+    def as_csv(self) -> str:
+        out = io.StringIO()
+        self.write_csv(out)
+        return out.getvalue()
+
+
+def _clean_row(raw: dict, defaults: dict) -> dict:
+    """Valida y normaliza una fila. Lanza ValidationError con todos los problemas juntos."""
+    errors = []
+    data = {}
+
+    try:
+        data["cuil"] = normalize_cuil(raw.get("cuil", ""))
+    except forms.ValidationError as exc:
+        errors.extend(exc.messages)
+
+    email = normalize_login_email(raw.get("email", ""))
+    if not email:
+        errors.append("Email vacío.")
+    else:
+        try:
+            validate_email(email)
+            data["email"] = email
+        except ValidationError:
+            errors.append(f"Email inválido: {email}")
+
+    for name in TEXT_FIELDS:
+        value = (raw.get(name) or "").strip() or defaults.get(name, "")
+        if len(value) > MAX_TEXT_LENGTH:
+            errors.append(f"{name} supera {MAX_TEXT_LENGTH} caracteres.")
+        data[name] = value
+
+    for name in OPTIONAL_EMAILS:
+        value = normalize_login_email(raw.get(name, ""))
+        if value:
+            try:
+                validate_email(value)
+            except ValidationError:
+                errors.append(f"{name} inválido: {value}")
+        data[name] = value
+
+    if errors:
+        raise ValidationError(errors)
+    return data
+
+
+def _read_rows(lines: Iterable[str]):
+    """(número de línea, dict con campos del modelo) por cada fila del CSV."""
+    reader = csv.reader(lines)
+    try:
+        header = next(reader)
+    except StopIteration:
+        raise ValidationError("El archivo está vacío.")
+
+    columns = [HEADER_ALIASES.get(h.strip().lower()) for h in header]
+    missing = {"cuil", "email"} - set(columns)
+    if missing:
+        raise ValidationError(f"Faltan columnas obligatorias: {', '.join(sorted(missing))}.")
+
+    for values in reader:
+        if not any(v.strip() for v in values):
+            continue
+        raw = {col: value for col, value in zip(columns, values) if col}
+        yield reader.line_num, raw
+
+
+class _Enroller:
+    def __init__(self, report: EnrollmentReport, chunk_size: int):
+        self.report = report
+        self.chunk_size = chunk_size
+        self.User = get_user_model()
+        # Lo ya aceptado en este archivo (duplicados dentro de la misma planilla)
+        self.seen_cuils: set[str] = set()
+        self.seen_emails: set[str] = set()
+        # Empresas ya resueltas en esta carga (una query por empresa, no por fila)
+        self.companies: dict[str, Company | None] = {}
+
+    def company_for(self, name: str):
+        key = name.strip().lower()
+        if key not in self.companies:
+            self.companies[key] = Company.objects.for_name(name)
+        return self.companies[key]
+
+    def process_chunk(self, chunk: list[tuple[int, dict]]) -> None:
+        cuils = {data["cuil"] for _, data in chunk}
+        emails = {data["email"] for _, data in chunk}
+        # Una query por lote: usa el índice de cuil y el índice Lower(email)
+        taken = self.User.objects.filter(Q(cuil__in=cuils) | Q(email__lower__in=emails)).values_list("cuil", "email")
+        taken_cuils, taken_emails = set(), set()
+        for cuil, email in taken:
+            taken_cuils.add(cuil)
+            taken_emails.add(normalize_login_email(email))
+
+        to_create = []
+        for line, data in chunk:
+            detail = ""
+            if data["cuil"] in taken_cuils:
+                detail = "El CUIL ya está registrado."
+            elif data["email"] in taken_emails:
+                detail = "El email ya está registrado."
+            elif data["cuil"] in self.seen_cuils:
+                detail = "CUIL repetido en el archivo."
+            elif data["email"] in self.seen_emails:
+                detail = "Email repetido en el archivo."
+            if detail:
+                self.report.rows.append(RowResult(line, data["cuil"], data["email"], STATUS_DUPLICATE, detail))
+                continue
+            self.seen_cuils.add(data["cuil"])
+            self.seen_emails.add(data["email"])
+            to_create.append((line, data))
+
+        if to_create and not self.report.dry_run:
+            self._insert(to_create)
+        for line, data in to_create:
+            self.report.rows.append(RowResult(line, data["cuil"], data["email"], STATUS_CREATED))
+
+    def _build(self, data: dict):
+        user = self.User(**data, company=self.company_for(data["company_name"]))
+        user.set_unusable_password()  # igual que create_user: ingresan con CUIL + email
+        return user
+
+    def _insert(self, to_create: list[tuple[int, dict]]) -> None:
+        try:
+            with transaction.atomic():
+                users = self.User.objects.bulk_create([self._build(data) for _, data in to_create])
+                # bulk_create no dispara post_save: sumamos los inscriptos acá
+                add_enrolled(Counter(u.company_id for u in users if u.company_id))
+            return
+        except IntegrityError:
+            pass
+
+        # Alguien se registró entre el chequeo y el insert: caemos a fila por fila
+        # (savepoint por fila) solo para este lote, y marcamos los que chocan.
+        created = []
+        for line, data in to_create:
+            try:
+                with transaction.atomic():
+                    self._build(data).save()
+                created.append((line, data))
+            except IntegrityError:
+                self.report.rows.append(
+                    RowResult(line, data["cuil"], data["email"], STATUS_DUPLICATE, "Registrado durante la carga.")
+                )
+        to_create[:] = created
+
+
+def enroll_from_csv(
+    lines: Iterable[str],
+    defaults: dict | None = None,
+    dry_run: bool = False,
+    chunk_size: int = CHUNK_SIZE,
+) -> EnrollmentReport:
+    """
+    Procesa el CSV (cualquier iterable de líneas: archivo abierto, upload
+    decodificado) y devuelve el reporte por fila.
+
+    `defaults` completa full_name/job_title/company_name vacíos (ej: la empresa
+    de toda la planilla). Con dry_run no se inserta nada.
+    """
+    defaults = defaults or {}
+    report = EnrollmentReport(dry_run=dry_run)
+    enroller = _Enroller(report, chunk_size)
+
+    chunk = []
+    for line, raw in _read_rows(lines):
+        try:
+            data = _clean_row(raw, defaults)
+        except ValidationError as exc:
+            report.rows.append(RowResult(
+                line, (raw.get("cuil") or "").strip(), (raw.get("email") or "").strip(),
+                STATUS_INVALID, " ".join(exc.messages),
+            ))
+            continue
+        chunk.append((line, data))
+        if len(chunk) >= chunk_size:
+            enroller.process_chunk(chunk)
+            chunk = []
+    if chunk:
+        enroller.process_chunk(chunk)
+
+    report.rows.sort(key=lambda r: r.line)
+    return report
@@ -71,3 +71,26 @@ class LoginForm(forms.Form):
 
     def clean_email(self):
         return (self.cleaned_data["email"] or "").strip().lower()
+
+
+class EnrollmentUploadForm(forms.Form):
+    """Alta masiva desde el admin (ver enrollment.py)."""
+    file = forms.FileField(
+        label="Archivo CSV",
+        help_text="Columnas: cuil, email y opcionales full_name, job_title, company_name, "
+                  "employer_email, safety_responsible_email. Codificación UTF-8."
+    )
+    company_name = forms.CharField(
+        label="Empresa (por defecto)",
+        max_length=200,
+        required=False,
+        help_text="Se usa en las filas que no traen empresa."
+    )
+    dry_run = forms.BooleanField(
+        label="Solo validar (no crear usuarios)",
+        required=False,
+    )
+    download_report = forms.BooleanField(
+        label="Descargar el reporte por fila como CSV",
+        required=False,
+    )
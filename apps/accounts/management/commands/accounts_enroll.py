@@ -0,0 +1,61 @@
+# apps/accounts/management/commands/accounts_enroll.py
+"""
+Alta masiva de trabajadores desde un CSV (misma lógica que el admin).
+
+Uso:
+    python manage.py accounts_enroll planilla.csv --company "ACME S.A." --report reporte.csv
+    python manage.py accounts_enroll planilla.csv --dry-run
+"""
+
+import time
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.accounts.enrollment import CHUNK_SIZE, enroll_from_csv
+
+
+class Command(BaseCommand):
+    help = "Da de alta trabajadores desde un CSV (cuil, email, ...) con validación por fila y bulk_create."
+
+    def add_arguments(self, parser):
+        parser.add_argument("file", type=str, help="CSV en UTF-8 con encabezado.")
+        parser.add_argument("--company", type=str, default="", help="Empresa para las filas que no la traen.")
+        parser.add_argument("--dry-run", action="store_true", help="Solo valida, no crea usuarios.")
+        parser.add_argument("--report", type=str, default="", help="Escribe el reporte por fila en este CSV.")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help=f"Filas por lote (default: {CHUNK_SIZE}).")
+
+    def handle(self, *args, **opts):
+        t0 = time.perf_counter()
+        try:
+            with open(opts["file"], newline="", encoding="utf-8-sig") as fh, \
+                    CaptureQueriesContext(connection) as queries:
+                report = enroll_from_csv(
+                    fh,
+                    defaults={"company_name": opts["company"]},
+                    dry_run=opts["dry_run"],
+                    chunk_size=opts["chunk_size"],
+                )
+        except FileNotFoundError:
+            raise CommandError(f"No existe el archivo {opts['file']}")
+        except ValidationError as exc:
+            raise CommandError(" ".join(exc.messages))
+        elapsed = time.perf_counter() - t0
+
+        if opts["report"]:
+            with open(opts["report"], "w", newline="", encoding="utf-8") as out:
+                report.write_csv(out)
+
+        for r in report.problems[:20]:
+            self.stdout.write(f"  línea {r.line}: {r.status} {r.cuil} {r.email} {r.detail}")
+        if len(report.problems) > 20:
+            self.stdout.write(f"  ... y {len(report.problems) - 20} más (usá --report para el detalle).")
+
+        verb = "se crearían" if report.dry_run else "creados"
+        style = self.style.SUCCESS if not report.problems else self.style.WARNING
+        self.stdout.write(style(
+            f"{len(report.rows)} filas en {elapsed:.2f}s ({len(queries)} queries): "
+            f"{report.created} {verb}, {report.duplicates} duplicados, {report.invalid} inválidos."
+        ))
@@ -0,0 +1,109 @@
+# apps/accounts/management/commands/accounts_login_bench.py
+"""
+Benchmark de las búsquedas de login y registro sobre una tabla grande.
+
+Inserta N usuarios sintéticos (por defecto 1.000.000) dentro de una transacción,
+mide las consultas viejas (email__iexact, dos exists) contra las nuevas
+(email__lower sobre el índice funcional, un solo exists con OR), muestra el
+EXPLAIN de cada una y al final hace rollback (salvo --keep).
+
+Uso:
+    python manage.py accounts_login_bench --users 1000000 --lookups 500
+"""
+
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+
+BENCH_PREFIX = "9"  # CUILs sintéticos: 9XXXXXXXXXX (no existen en la realidad)
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Mide login/registro (email__iexact vs índice Lower(email)) sobre N usuarios sintéticos."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1_000_000, help="Usuarios sintéticos (default: 1.000.000).")
+        parser.add_argument("--lookups", type=int, default=500, help="Búsquedas por variante (default: 500).")
+        parser.add_argument("--batch", type=int, default=10_000, help="Tamaño de lote de bulk_create.")
+        parser.add_argument("--keep", action="store_true", help="No hace rollback (deja los usuarios cargados).")
+
+    def handle(self, *args, **opts):
+        try:
+            with transaction.atomic():
+                self._load(opts["users"], opts["batch"])
+                self._bench(opts["users"], opts["lookups"])
+                if not opts["keep"]:
+                    raise _Rollback
+        except _Rollback:
+            self.stdout.write(self.style.SUCCESS("Rollback: no quedó ningún usuario sintético."))
+
+    def _load(self, total: int, batch_size: int):
+        User = get_user_model()
+        t0 = time.perf_counter()
+        for start in range(0, total, batch_size):
+            User.objects.bulk_create([
+                User(
+                    cuil=f"{BENCH_PREFIX}{i:010d}",
+                    email=f"bench{i}@example.com",
+                    full_name=f"Bench {i}",
+                    password="!bench",  # password inutilizable, sin hashear N veces
+                )
+                for i in range(start, min(start + batch_size, total))
+            ])
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {User._meta.db_table}")
+        self.stdout.write(f"Cargados {total:,} usuarios en {time.perf_counter() - t0:.1f}s ({connection.vendor})")
+
+    def _bench(self, total: int, lookups: int):
+        User = get_user_model()
+        sample = [random.randrange(total) for _ in range(lookups)]
+
+        def creds(i):
+            # El usuario tipea el email con mayúsculas: el caso que nos importa
+            return f"{BENCH_PREFIX}{i:010d}", f"Bench{i}@Example.COM"
+
+        variants = {
+            "login viejo (email__iexact)":
+                lambda c, e: User.objects.filter(cuil=c, email__iexact=e).first(),
+            "login nuevo (email__lower)":
+                lambda c, e: User.objects.login_match(c, e).first(),
+            "registro viejo (2 exists)":
+                lambda c, e: User.objects.filter(cuil=c).exists() or User.objects.filter(email__iexact=e).exists(),
+            "registro nuevo (1 exists)":
+                lambda c, e: User.objects.cuil_or_email_taken(c, e),
+            # Email nuevo con CUIL nuevo: recorre los dos índices sin cortar antes
+            "registro nuevo, sin match":
+                lambda c, e: User.objects.cuil_or_email_taken("1" + c[1:], "x" + e),
+        }
+
+        self.stdout.write("")
+        for name, fn in variants.items():
+            timings = []
+            for i in sample:
+                cuil, email = creds(i)
+                t0 = time.perf_counter()
+                fn(cuil, email)
+                timings.append((time.perf_counter() - t0) * 1000)
+            q = statistics.quantiles(timings, n=100) if len(timings) > 1 else timings * 99
+            self.stdout.write(f"{name:<30} p50={q[49]:.3f}ms  p95={q[94]:.3f}ms  max={max(timings):.3f}ms")
+
+        cuil, email = creds(sample[0])
+        plans = {
+            "email__iexact": User.objects.filter(email__iexact=email),
+            "email__lower": User.objects.filter(email__lower=email.lower()),
+            "cuil OR email__lower": User.objects.filter(Q(cuil=cuil) | Q(email__lower=email.lower())),
+        }
+        for name, qs in plans.items():
+            self.stdout.write("")
+            self.stdout.write(self.style.MIGRATE_HEADING(f"EXPLAIN {name}"))
+            self.stdout.write(qs.explain())
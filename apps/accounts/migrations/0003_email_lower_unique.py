@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:30
+
+import django.db.models.functions.text
+from django.core.management.base import CommandError
+from django.db import migrations, models
+
+
+def check_case_duplicates(apps, schema_editor):
+    """
+    El índice único LOWER(email) falla si ya hay emails que solo difieren en
+    mayúsculas. No se tocan: el login pide CUIL + email y cambiar uno deja
+    afuera a ese trabajador. La migración corta con la lista de cuentas para
+    que un admin las resuelva (unirlas o corregir el email) y se vuelva a correr.
+    """
+    User = apps.get_model("accounts", "TraineeUser")
+    lowered = User.objects.annotate(email_lower=django.db.models.functions.text.Lower("email"))
+    duplicated = list(
+        lowered.values("email_lower")
+        .annotate(n=models.Count("id"))
+        .filter(n__gt=1)
+        .values_list("email_lower", flat=True)
+    )
+    if not duplicated:
+        return
+    lines = []
+    for email in duplicated:
+        users = lowered.filter(email_lower=email).order_by("pk")
+        accounts = ", ".join(f"{u.pk} (CUIL {u.cuil}, {u.email})" for u in users)
+        lines.append(f"  {email}: {accounts}")
+    raise CommandError(
+        "Hay emails repetidos que solo difieren en mayúsculas. Resolvelos en el "
+        "admin antes de migrar:\n" + "\n".join(lines)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_traineeuser_employer_email_and_more'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_case_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='traineeuser',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), name='uq_traineeuser_email_lower'),
+        ),
+    ]
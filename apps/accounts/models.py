@@ -3,9 +3,15 @@
 # COMMIT 8: Agregados campos employer_email y safety_responsible_email
 # ============================================================================
 from django.db import models
+from django.db.models import Q
+from django.db.models.functions import Lower
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
 from django.utils import timezone
 
+def normalize_login_email(email: str) -> str:
+    """Forma canónica del email para búsquedas (la misma que indexamos)."""
+    return (email or "").strip().lower()
+
 
 class TraineeUserManager(BaseUserManager):
     def create_user(self, cuil: str, email: str, **extra_fields):
@@ -15,6 +21,9 @@ class TraineeUserManager(BaseUserManager):
             raise ValueError("Email es requerido")
 
         email = self.normalize_email(email)
+        if "company" not in extra_fields and extra_fields.get("company_name"):
+            from apps.companies.models import Company
+            extra_fields["company"] = Company.objects.for_name(extra_fields["company_name"])
         user = self.model(cuil=cuil, email=email, **extra_fields)
         user.set_unusable_password()  # sin password por defecto (flujo real en Commit 2)
         user.is_active = True
@@ -31,6 +40,14 @@ class TraineeUserManager(BaseUserManager):
         user.save(using=self._db)
         return user
 
+    def login_match(self, cuil: str, email: str):
+        """Usuario con ese CUIL y email (sin distinguir mayúsculas). Una query indexada."""
+        return self.filter(cuil=cuil, email__lower=normalize_login_email(email))
+
+    def cuil_or_email_taken(self, cuil: str, email: str) -> bool:
+        """Chequeo de duplicados del registro en una sola query (OR de dos índices)."""
+        return self.filter(Q(cuil=cuil) | Q(email__lower=normalize_login_email(email))).exists()
+
 
 class TraineeUser(AbstractBaseUser, PermissionsMixin):
     cuil = models.CharField(max_length=20, unique=True, db_index=True)
@@ -39,6 +56,16 @@ class TraineeUser(AbstractBaseUser, PermissionsMixin):
     full_name = models.CharField(max_length=200, blank=True, default="")
     job_title = models.CharField(max_length=200, blank=True, default="")
     company_name = models.CharField(max_length=200, blank=True, default="")
+    # Empresa normalizada (contadores y tablero del empleador, ver apps/companies).
+    # company_name queda como texto libre tal cual lo escribió el trabajador.
+    company = models.ForeignKey(
+        "companies.Company",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="workers",
+        verbose_name="Empresa",
+    )
     
     # =========================================================================
     # ✅ COMMIT 8: Nuevos campos de email para notificaciones de certificados
@@ -66,6 +93,19 @@ class TraineeUser(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = "cuil"
     REQUIRED_FIELDS = ["email"]
 
+    class Meta:
+        constraints = [
+            # Unicidad sin distinguir mayúsculas + índice para login/registro
+            models.UniqueConstraint(Lower("email"), name="uq_traineeuser_email_lower"),
+        ]
+
     def __str__(self):
         return f"{self.full_name or self.email} ({self.cuil})"
+
+
+# Permite filtrar por `email__lower=...`: genera LOWER("email") = %s, que es
+# exactamente la expresión del índice único funcional (ver Meta de TraineeUser).
+# `email__iexact` en PostgreSQL genera UPPER(...) LIKE UPPER(...) y no lo usa.
+# Se registra solo en este campo (no en CharField): no cambia las queries de otras apps.
+TraineeUser._meta.get_field("email").register_lookup(Lower)
     
\ No newline at end of file
@@ -0,0 +1,29 @@
+# apps/accounts/signals.py
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .backends import invalidate_cached_user
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    """Cualquier cambio del usuario (incluido last_login) invalida su copia cacheada."""
+    invalidate_cached_user(instance.pk)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def invalidate_user_cache_on_perms(sender, instance, action, reverse, pk_set, **kwargs):
+    """Grupos y permisos también viajan con el usuario (is_staff, admin)."""
+    if not action.startswith("post_"):
+        return
+    if isinstance(instance, User):
+        invalidate_cached_user(instance.pk)
+    else:
+        # Cambio desde el lado del grupo/permiso: invalidamos a los usuarios afectados
+        for user_id in pk_set or []:
+            invalidate_cached_user(user_id)
@@ -47,7 +47,7 @@ def register_post(request):
     data = form.cleaned_data
 
     # Validación de duplicados
-    if User.objects.filter(cuil=data["cuil"]).exists() or User.objects.filter(email__iexact=data["email"]).exists():
+    if User.objects.cuil_or_email_taken(data["cuil"], data["email"]):
         messages.warning(request, "Ese CUIL o email ya está registrado. Ingresá desde Login.")
         return redirect("landing")
 
@@ -3,3 +3,8 @@ from django.apps import AppConfig
 class CertificatesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.certificates"
+
+    def warm_up(self):
+        # ReportLab (import, fuentes, estilos): solo se carga acá o con el primer aprobado
+        from .pdf import warm_up
+        warm_up()
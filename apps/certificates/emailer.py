@@ -20,14 +20,18 @@ Configuración requerida en settings.py:
 """
 
 import logging
+import time
 from typing import Optional, List
 
 from django.conf import settings
 from django.core.mail import EmailMessage
 
+from apps.observability.tracing import span, traced
+
 logger = logging.getLogger(__name__)
 
 
+@traced("email.send_certificate")
 def send_certificate_emails(
     to_email: str,
     pdf_bytes: bytes,
@@ -92,10 +96,15 @@ Sistema de Capacitación en Ergonomía
     
     # Intentar enviar al usuario
     try:
-        sent_count = email.send(fail_silently=False)
-        logger.info(f"Certificado enviado a trabajador {to_email}: {sent_count} email(s)")
+        start = time.perf_counter()
+        with span("smtp.send", role="trabajador"):
+            sent_count = email.send(fail_silently=False)
+        logger.info(
+            "Certificado enviado a trabajador %s: %s email(s)", to_email, sent_count,
+            extra={"recipient_role": "trabajador", "duration_ms": round((time.perf_counter() - start) * 1000, 1)},
+        )
     except Exception as e:
-        logger.error(f"Error enviando certificado a {to_email}: {e}")
+        logger.error("Error enviando certificado a %s: %s", to_email, e, extra={"recipient_role": "trabajador"})
         raise  # Re-lanzamos para que el caller decida qué hacer
 
     # ==========================================================================
@@ -129,10 +138,14 @@ Sistema de Capacitación en Ergonomía
                 to=[employer_email.strip()],
             )
             email_empleador.attach(filename, pdf_bytes, "application/pdf")
-            email_empleador.send(fail_silently=True)  # No falla si no llega
-            logger.info(f"Certificado enviado a empleador: {employer_email}")
+            with span("smtp.send", role="empleador"):
+                email_empleador.send(fail_silently=True)  # No falla si no llega
+            logger.info("Certificado enviado a empleador: %s", employer_email, extra={"recipient_role": "empleador"})
         except Exception as e:
-            logger.warning(f"No se pudo enviar certificado al empleador {employer_email}: {e}")
+            logger.warning(
+                "No se pudo enviar certificado al empleador %s: %s", employer_email, e,
+                extra={"recipient_role": "empleador"},
+            )
 
     # ==========================================================================
     # ✅ COMMIT 8: EMAIL 3 - Al responsable de Seguridad e Higiene (si está configurado)
@@ -166,10 +179,17 @@ Sistema de Capacitación en Ergonomía
                 to=[safety_responsible_email.strip()],
             )
             email_syso.attach(filename, pdf_bytes, "application/pdf")
-            email_syso.send(fail_silently=True)  # No falla si no llega
-            logger.info(f"Certificado enviado a responsable SySO: {safety_responsible_email}")
+            with span("smtp.send", role="syso"):
+                email_syso.send(fail_silently=True)  # No falla si no llega
+            logger.info(
+                "Certificado enviado a responsable SySO: %s", safety_responsible_email,
+                extra={"recipient_role": "syso"},
+            )
         except Exception as e:
-            logger.warning(f"No se pudo enviar certificado al resp. SySO {safety_responsible_email}: {e}")
+            logger.warning(
+                "No se pudo enviar certificado al resp. SySO %s: %s", safety_responsible_email, e,
+                extra={"recipient_role": "syso"},
+            )
 
     # ==========================================================================
     # EMAIL 4: Al admin (si está configurado) - Original
@@ -200,10 +220,11 @@ El certificado se adjunta a este email.
                 to=[admin_email],
             )
             admin_msg.attach(filename, pdf_bytes, "application/pdf")
-            admin_msg.send(fail_silently=True)  # No falla si el admin no recibe
-            logger.info(f"Copia de certificado enviada al admin: {admin_email}")
+            with span("smtp.send", role="admin"):
+                admin_msg.send(fail_silently=True)  # No falla si el admin no recibe
+            logger.info("Copia de certificado enviada al admin: %s", admin_email, extra={"recipient_role": "admin"})
         except Exception as e:
             # No re-lanzamos, el envío principal ya fue exitoso
-            logger.warning(f"No se pudo enviar copia al admin: {e}")
+            logger.warning("No se pudo enviar copia al admin: %s", e, extra={"recipient_role": "admin"})
     
     return True
@@ -9,6 +9,8 @@ Uso:
 
 import io
 from datetime import datetime
+from functools import lru_cache
+from types import SimpleNamespace
 from typing import TYPE_CHECKING
 
 from reportlab.lib import colors
@@ -20,11 +22,14 @@ from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 from reportlab.lib.enums import TA_CENTER
 
+from apps.observability.tracing import traced
+
 if TYPE_CHECKING:
     from apps.accounts.models import CustomUser
     from apps.training.models import TrainingModule
 
 
+@traced("pdf.build_certificate")
 def build_certificate_pdf(
     user: "CustomUser",
     module: "TrainingModule",
@@ -146,8 +151,9 @@ def build_certificate_pdf(
     return pdf_bytes
 
 
+@lru_cache(maxsize=1)
 def _get_styles() -> dict:
-    """Retorna diccionario con los estilos de párrafo."""
+    """Retorna diccionario con los estilos de párrafo (se arman una vez por proceso)."""
     return {
         "title": ParagraphStyle(
             "title",
@@ -222,6 +228,27 @@ def _get_styles() -> dict:
     }
 
 
+# Fuentes que usan los estilos: sus métricas se cargan en el primer uso
+_FONTS = ("Helvetica", "Helvetica-Bold", "Helvetica-Oblique", "Helvetica-BoldOblique")
+
+
+def warm_up() -> None:
+    """
+    Carga métricas de fuentes y estilos y renderiza un certificado de prueba
+    (descartado), así el primer aprobado no paga el arranque de ReportLab.
+    """
+    for name in _FONTS:
+        pdfmetrics.getFont(name)
+    _get_styles()
+    now = datetime.now()
+    build_certificate_pdf(
+        user=SimpleNamespace(full_name="Warm Up", email="warmup@ergocap.local", cuil="20000000001"),
+        module=SimpleNamespace(title="Warm-up"),
+        issued_at=now,
+        valid_until=now,
+    )
+
+
 
 
 
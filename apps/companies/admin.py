@@ -0,0 +1,43 @@
+# apps/companies/admin.py
+
+from django.contrib import admin
+from django.urls import reverse
+from django.utils.html import format_html
+
+from .models import Company, CompanyModuleProgress, new_dashboard_token
+
+
+class CompanyModuleProgressInline(admin.TabularInline):
+    model = CompanyModuleProgress
+    extra = 0
+    can_delete = False
+    fields = ("module", "attempted_count", "passed_count", "certificates_valid", "updated_at")
+    readonly_fields = fields
+
+    def has_add_permission(self, request, obj=None):
+        """Las filas las crean los contadores (services.py)."""
+        return False
+
+
+@admin.register(Company)
+class CompanyAdmin(admin.ModelAdmin):
+    list_display = ("name", "enrolled_count", "contact_email", "dashboard_link")
+    search_fields = ("name", "contact_email")
+    readonly_fields = ("enrolled_count", "created_at", "dashboard_link")
+    inlines = [CompanyModuleProgressInline]
+    actions = ["regenerate_token"]
+
+    def dashboard_link(self, obj):
+        """Link secreto al tablero del empleador."""
+        if not obj.pk:
+            return "-"
+        url = reverse("company_dashboard", kwargs={"token": obj.dashboard_token})
+        return format_html('<a href="{}" target="_blank">Abrir tablero</a>', url)
+    dashboard_link.short_description = "Tablero"
+
+    @admin.action(description="Regenerar link del tablero (invalida el anterior)")
+    def regenerate_token(self, request, queryset):
+        for company in queryset:
+            company.dashboard_token = new_dashboard_token()
+            company.save(update_fields=["dashboard_token"])
+        self.message_user(request, f"Se regeneraron {queryset.count()} links.")
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+class CompaniesConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "apps.companies"
+    verbose_name = "Empresas"
+
+    def ready(self):
+        # Contador de inscriptos (enrolled_count) al crear/mover/borrar usuarios
+        from . import signals  # noqa: F401
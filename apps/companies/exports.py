@@ -0,0 +1,367 @@
+# apps/companies/exports.py
+"""
+Exportes de cumplimiento (intentos y certificados) en CSV o XLSX, en streaming.
+
+Las filas salen de un .iterator(chunk_size=...) con select_related, se
+serializan de a bloques y se entregan con StreamingHttpResponse: la memoria
+queda plana aunque sean millones de filas y el primer byte (el encabezado)
+sale antes de ejecutar la query.
+
+XLSX: se arma a mano (zipfile + XML con inlineStr), escribiendo el ZIP sobre un
+buffer que se vacía después de cada bloque. No hace falta openpyxl.
+"""
+
+import csv
+import zipfile
+from dataclasses import dataclass
+from datetime import date, datetime, time as dt_time, timedelta
+from xml.sax.saxutils import escape
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import OuterRef, Subquery
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+CHUNK_SIZE = 2000     # filas por ida a la base (.iterator)
+ROWS_PER_BLOCK = 500  # filas por bloque de bytes entregado al servidor
+
+REPORTS = ("attempts", "certificates")
+FORMATS = ("csv", "xlsx")
+
+
+@dataclass
+class ExportFilters:
+    company_id: int | None = None
+    module_slug: str = ""
+    date_from: date | None = None
+    date_to: date | None = None
+
+    def range(self):
+        """(desde, hasta) como datetimes aware; hasta es exclusivo (día siguiente 00:00)."""
+        tz = timezone.get_current_timezone()
+        start = datetime.combine(self.date_from, dt_time.min, tz) if self.date_from else None
+        end = datetime.combine(self.date_to + timedelta(days=1), dt_time.min, tz) if self.date_to else None
+        return start, end
+
+    def filename(self, report: str, fmt: str) -> str:
+        parts = [report]
+        if self.module_slug:
+            parts.append(self.module_slug)
+        if self.date_from:
+            parts.append(f"desde_{self.date_from.isoformat()}")
+        if self.date_to:
+            parts.append(f"hasta_{self.date_to.isoformat()}")
+        return f"{'_'.join(parts)}.{fmt}"
+
+
+def parse_filters(params, company_id: int | None = None) -> ExportFilters:
+    """Filtros desde GET (?company=&module=&from=YYYY-MM-DD&to=YYYY-MM-DD). Fechas inválidas se ignoran."""
+    def parse_date(value):
+        try:
+            return date.fromisoformat(value) if value else None
+        except ValueError:
+            return None
+
+    if company_id is None:
+        try:
+            company_id = int(params.get("company") or 0) or None
+        except ValueError:
+            company_id = None
+    return ExportFilters(
+        company_id=company_id,
+        module_slug=(params.get("module") or "").strip(),
+        date_from=parse_date(params.get("from")),
+        date_to=parse_date(params.get("to")),
+    )
+
+
+# ─────────────────────────────────────────────────────────────
+# Filas
+# ─────────────────────────────────────────────────────────────
+def _fmt_dt(value) -> str:
+    return timezone.localtime(value).strftime("%Y-%m-%d %H:%M") if value else ""
+
+
+ATTEMPT_HEADER = [
+    "Empresa", "CUIL", "Nombre", "Email", "Puesto", "Módulo",
+    "Inicio", "Envío", "Puntaje", "Aprobado",
+    "Intentos usados (ventana actual)", "Bloqueado hasta",
+    "Certificado", "Válido hasta", "Vigente",
+]
+
+CERTIFICATE_HEADER = [
+    "Empresa", "CUIL", "Nombre", "Email", "Puesto", "Módulo",
+    "Emitido", "Válido hasta", "Vigente", "Días para vencer", "Email enviado",
+]
+
+
+def attempt_rows(filters: ExportFilters):
+    """Intentos enviados, con el estado actual del trabajador en el módulo y su certificado."""
+    from apps.quiz.models import QuizAttempt, QuizState
+
+    state = QuizState.objects.filter(user=OuterRef("user_id"), module=OuterRef("module_id"))
+    qs = (
+        QuizAttempt.objects
+        .filter(submitted_at__isnull=False)
+        .select_related("user__company", "module", "certificate")
+        .annotate(
+            state_attempts_used=Subquery(state.values("attempts_used")[:1]),
+            state_lockout_until=Subquery(state.values("lockout_until")[:1]),
+        )
+        .order_by("submitted_at", "pk")
+    )
+    if filters.company_id:
+        qs = qs.filter(user__company_id=filters.company_id)
+    if filters.module_slug:
+        qs = qs.filter(module__slug=filters.module_slug)
+    start, end = filters.range()
+    if start:
+        qs = qs.filter(submitted_at__gte=start)
+    if end:
+        qs = qs.filter(submitted_at__lt=end)
+
+    now = timezone.now()
+    for a in qs.iterator(chunk_size=CHUNK_SIZE):
+        user = a.user
+        cert = getattr(a, "certificate", None)
+        yield [
+            user.company.name if user.company else user.company_name,
+            user.cuil, user.full_name, user.email, user.job_title,
+            a.module.slug,
+            _fmt_dt(a.started_at), _fmt_dt(a.submitted_at),
+            a.score, "Sí" if a.passed else "No",
+            a.state_attempts_used, _fmt_dt(a.state_lockout_until),
+            str(cert.id) if cert else "",
+            _fmt_dt(cert.valid_until) if cert else "",
+            ("Sí" if cert.valid_until > now else "No") if cert else "",
+        ]
+
+
+def certificate_rows(filters: ExportFilters):
+    from apps.certificates.models import Certificate
+
+    qs = Certificate.objects.select_related("user__company", "module").order_by("issued_at", "pk")
+    if filters.company_id:
+        qs = qs.filter(user__company_id=filters.company_id)
+    if filters.module_slug:
+        qs = qs.filter(module__slug=filters.module_slug)
+    start, end = filters.range()
+    if start:
+        qs = qs.filter(issued_at__gte=start)
+    if end:
+        qs = qs.filter(issued_at__lt=end)
+
+    now = timezone.now()
+    for c in qs.iterator(chunk_size=CHUNK_SIZE):
+        user = c.user
+        valid = c.valid_until > now
+        yield [
+            user.company.name if user.company else user.company_name,
+            user.cuil, user.full_name, user.email, user.job_title,
+            c.module.slug,
+            _fmt_dt(c.issued_at), _fmt_dt(c.valid_until),
+            "Sí" if valid else "No",
+            max(0, (c.valid_until - now).days) if valid else 0,
+            "Sí" if c.email_sent else "No",
+        ]
+
+
+def report_rows(report: str, filters: ExportFilters):
+    """(encabezado, generador de filas) del reporte pedido."""
+    if report == "attempts":
+        return ATTEMPT_HEADER, attempt_rows(filters)
+    if report == "certificates":
+        return CERTIFICATE_HEADER, certificate_rows(filters)
+    raise ValueError(f"Reporte desconocido: {report}")
+
+
+# ─────────────────────────────────────────────────────────────
+# Serialización en bloques
+# ─────────────────────────────────────────────────────────────
+class _Buffer:
+    """Destino de escritura que se vacía después de cada bloque."""
+
+    def __init__(self):
+        self._parts = []
+
+    def write(self, data):
+        self._parts.append(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = "".join(self._parts) if self._parts and isinstance(self._parts[0], str) else b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def _blocks(rows):
+    block = []
+    for row in rows:
+        block.append(row)
+        if len(block) >= ROWS_PER_BLOCK:
+            yield block
+            block = []
+    if block:
+        yield block
+
+
+# Excel interpreta como fórmula una celda CSV que empieza con estos caracteres
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _csv_safe(value):
+    """Texto cargado por usuarios (nombre, puesto, empresa) sin inyección de fórmulas."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def csv_chunks(header, rows):
+    """Bytes CSV (UTF-8 con BOM para que Excel muestre bien los acentos)."""
+    buffer = _Buffer()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    yield ("\ufeff" + buffer.drain()).encode("utf-8")
+    for block in _blocks(rows):
+        writer.writerows([_csv_safe(value) for value in row] for row in block)
+        yield buffer.drain().encode("utf-8")
+
+
+def _col_name(index: int) -> str:
+    name = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        name = chr(65 + rem) + name
+    return name
+
+
+def _xlsx_row(number: int, values) -> str:
+    cells = []
+    for i, value in enumerate(values):
+        ref = f"{_col_name(i)}{number}"
+        if value is None or value == "":
+            continue
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            cells.append(f'<c r="{ref}"><v>{value}</v></c>')
+        else:
+            cells.append(f'<c r="{ref}" t="inlineStr"><is><t>{escape(str(value))}</t></is></c>')
+    return f'<row r="{number}">{"".join(cells)}</row>'
+
+
+_XLSX_STATIC = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Reporte" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def xlsx_chunks(header, rows):
+    """
+    XLSX mínimo en streaming. El buffer no es "seekable", así que zipfile
+    escribe cada entrada con data descriptor y nunca vuelve atrás.
+    """
+    buffer = _Buffer()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, content in _XLSX_STATIC.items():
+            zf.writestr(name, content)
+        yield buffer.drain()
+
+        with zf.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            sheet.write(_xlsx_row(1, header).encode("utf-8"))
+            number = 1
+            for block in _blocks(rows):
+                parts = []
+                for row in block:
+                    number += 1
+                    parts.append(_xlsx_row(number, row))
+                sheet.write("".join(parts).encode("utf-8"))
+                yield buffer.drain()
+            sheet.write(b"</sheetData></worksheet>")
+    yield buffer.drain()
+
+
+def export_chunks(report: str, fmt: str, filters: ExportFilters):
+    header, rows = report_rows(report, filters)
+    if fmt == "xlsx":
+        return xlsx_chunks(header, rows)
+    return csv_chunks(header, rows)
+
+
+# ─────────────────────────────────────────────────────────────
+# Respuesta HTTP
+# ─────────────────────────────────────────────────────────────
+CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+async def _aiter_chunks(chunks):
+    """
+    Bajo ASGI Django materializa los iteradores SÍNCRONOS antes de enviarlos.
+    Avanzamos el generador de a un bloque en el hilo de la base (thread_sensitive)
+    para que el cursor del .iterator() siga siempre en la misma conexión.
+    """
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    close = sync_to_async(chunks.close, thread_sensitive=True)
+    try:
+        while True:
+            chunk = await next_chunk(chunks, None)
+            if chunk is None:
+                break
+            if chunk:
+                yield chunk
+    finally:
+        await close()
+
+
+def streaming_export(request, report: str, fmt: str, filters: ExportFilters) -> StreamingHttpResponse:
+    chunks = export_chunks(report, fmt, filters)
+    if isinstance(request, ASGIRequest):
+        chunks = _aiter_chunks(chunks)
+    response = StreamingHttpResponse(chunks, content_type=CONTENT_TYPES[fmt])
+    response["Content-Disposition"] = f'attachment; filename="{filters.filename(report, fmt)}"'
+    response["Cache-Control"] = "no-store"
+    # Que nginx no acumule la respuesta: el primer byte sale enseguida
+    response["X-Accel-Buffering"] = "no"
+    return response
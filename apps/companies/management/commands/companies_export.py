@@ -0,0 +1,74 @@
+# apps/companies/management/commands/companies_export.py
+"""
+Exporte de cumplimiento a archivo (mismo generador que los endpoints).
+
+Uso:
+    python manage.py companies_export attempts --company "ACME S.A." --from 2026-01-01 -o intentos.csv
+    python manage.py companies_export certificates --module ergonomia-oficina --format xlsx -o certs.xlsx
+"""
+
+import sys
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.companies.exports import FORMATS, REPORTS, ExportFilters, export_chunks
+from apps.companies.models import Company
+
+
+class Command(BaseCommand):
+    help = "Exporta intentos o certificados (CSV/XLSX) filtrando por empresa, módulo y fechas."
+
+    def add_arguments(self, parser):
+        parser.add_argument("report", choices=REPORTS, help="attempts | certificates")
+        parser.add_argument("--company", type=str, default="", help="Nombre o id de la empresa.")
+        parser.add_argument("--module", type=str, default="", help="Slug del módulo.")
+        parser.add_argument("--from", dest="date_from", type=str, default="", help="Desde (YYYY-MM-DD).")
+        parser.add_argument("--to", dest="date_to", type=str, default="", help="Hasta inclusive (YYYY-MM-DD).")
+        parser.add_argument("--format", choices=FORMATS, default="csv")
+        parser.add_argument("-o", "--output", type=str, default="", help="Archivo destino (default: stdout).")
+
+    def handle(self, *args, **opts):
+        filters = ExportFilters(
+            company_id=self._company_id(opts["company"]),
+            module_slug=opts["module"],
+            date_from=self._date(opts["date_from"]),
+            date_to=self._date(opts["date_to"]),
+        )
+        if opts["format"] == "xlsx" and not opts["output"]:
+            raise CommandError("XLSX necesita --output.")
+
+        t0 = time.perf_counter()
+        total = 0
+        out = open(opts["output"], "wb") if opts["output"] else sys.stdout.buffer
+        try:
+            for chunk in export_chunks(opts["report"], opts["format"], filters):
+                out.write(chunk)
+                total += len(chunk)
+        finally:
+            if opts["output"]:
+                out.close()
+
+        if opts["output"]:
+            self.stdout.write(self.style.SUCCESS(
+                f"{opts['output']}: {total / 1024:,.0f} KB en {time.perf_counter() - t0:.1f}s"
+            ))
+
+    def _company_id(self, value: str):
+        if not value:
+            return None
+        if value.isdigit():
+            return int(value)
+        company = Company.objects.filter(name__lower=value.strip().lower()).first()
+        if not company:
+            raise CommandError(f"No existe la empresa '{value}'.")
+        return company.pk
+
+    def _date(self, value: str):
+        if not value:
+            return None
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise CommandError(f"Fecha inválida: {value} (usar YYYY-MM-DD)")
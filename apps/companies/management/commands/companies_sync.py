@@ -0,0 +1,39 @@
+# apps/companies/management/commands/companies_sync.py
+"""
+Recalcula los contadores de empresa desde las tablas fuente.
+
+Los contadores se mantienen en cada submit/certificado, pero los vencimientos
+de certificados no generan ningún evento: correr esto una vez por día (cron)
+para bajar `certificates_valid`. También corrige desvíos (cambios de empresa
+cargados a mano, datos importados, etc.).
+
+Uso:
+    python manage.py companies_sync           # corrige
+    python manage.py companies_sync --check   # solo informa (exit 1 si hay desvíos)
+"""
+
+import sys
+
+from django.core.management.base import BaseCommand
+
+from apps.companies.services import sync_counters
+
+
+class Command(BaseCommand):
+    help = "Recalcula inscriptos, intentos, aprobados y certificados vigentes por empresa y módulo."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--check", action="store_true", help="No escribe: solo lista los desvíos.")
+
+    def handle(self, *args, **opts):
+        drift = sync_counters(apply=not opts["check"])
+        for label, field, stored, actual in drift:
+            self.stdout.write(f"  {label}: {field} {stored} → {actual}")
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("Contadores al día."))
+        elif opts["check"]:
+            self.stdout.write(self.style.WARNING(f"{len(drift)} contadores desviados (no se modificó nada)."))
+            sys.exit(1)
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{len(drift)} contadores corregidos."))
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:36
+
+import apps.companies.models
+import django.db.models.deletion
+import django.db.models.functions.text
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('training', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Company',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, verbose_name='Nombre')),
+                ('contact_email', models.EmailField(blank=True, default='', help_text='Quién recibe el link al tablero de avance.', max_length=254, verbose_name='Email de contacto')),
+                ('dashboard_token', models.CharField(default=apps.companies.models.new_dashboard_token, editable=False, max_length=64, unique=True)),
+                ('enrolled_count', models.PositiveIntegerField(default=0, verbose_name='Inscriptos')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Empresa',
+                'verbose_name_plural': 'Empresas',
+                'ordering': ['name'],
+                'constraints': [models.UniqueConstraint(django.db.models.functions.text.Lower('name'), name='uq_company_name_lower')],
+            },
+        ),
+        migrations.CreateModel(
+            name='CompanyModuleProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempted_count', models.PositiveIntegerField(default=0, verbose_name='Rindieron')),
+                ('passed_count', models.PositiveIntegerField(default=0, verbose_name='Aprobaron')),
+                ('certificates_valid', models.PositiveIntegerField(default=0, verbose_name='Certificados vigentes')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progress', to='companies.company')),
+                ('module', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='company_progress', to='training.trainingmodule')),
+            ],
+            options={
+                'verbose_name': 'Avance por módulo',
+                'verbose_name_plural': 'Avance por módulo',
+                'constraints': [models.UniqueConstraint(fields=('company', 'module'), name='uq_companyprogress_company_module')],
+            },
+        ),
+    ]
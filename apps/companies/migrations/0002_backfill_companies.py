@@ -0,0 +1,51 @@
+# Vincula los usuarios existentes a una Company (por company_name, sin distinguir
+# mayúsculas ni espacios) y calcula los contadores iniciales.
+
+import re
+
+from django.db import migrations
+from django.db.models import Count
+
+
+def backfill(apps, schema_editor):
+    from apps.companies.services import aggregate_progress
+
+    User = apps.get_model("accounts", "TraineeUser")
+    Company = apps.get_model("companies", "Company")
+    CompanyModuleProgress = apps.get_model("companies", "CompanyModuleProgress")
+    QuizAttempt = apps.get_model("quiz", "QuizAttempt")
+    Certificate = apps.get_model("certificates", "Certificate")
+
+    companies = {}
+    names = User.objects.exclude(company_name="").values_list("company_name", flat=True).distinct()
+    for raw in names.iterator():
+        name = re.sub(r"\s+", " ", raw.strip())
+        if not name:
+            continue
+        key = name.lower()
+        if key not in companies:
+            companies[key] = Company.objects.create(name=name)
+        User.objects.filter(company_name=raw).update(company=companies[key])
+
+    enrolled = User.objects.filter(company__isnull=False).values("company").annotate(n=Count("id")).order_by()
+    for row in enrolled:
+        Company.objects.filter(pk=row["company"]).update(enrolled_count=row["n"])
+
+    CompanyModuleProgress.objects.bulk_create([
+        CompanyModuleProgress(company_id=company_id, module_id=module_id, **counts)
+        for (company_id, module_id), counts in aggregate_progress(QuizAttempt, Certificate).items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("companies", "0001_initial"),
+        ("accounts", "0004_traineeuser_company"),
+        ("quiz", "0001_initial"),
+        ("certificates", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
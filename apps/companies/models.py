@@ -0,0 +1,101 @@
+# apps/companies/models.py
+"""
+Empresas cliente y contadores de avance por módulo.
+
+Los contadores se mantienen de forma incremental (F() + 1) en las mismas
+transacciones que los eventos que cuentan (ver services.py), así el tablero
+del empleador lee una fila por módulo sin importar cuántos trabajadores tenga
+la empresa. El comando `companies_sync` corrige vencimientos y desvíos.
+"""
+
+import re
+import secrets
+
+from django.db import models
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from apps.training.models import TrainingModule
+
+
+def normalize_company_name(name: str) -> str:
+    """Espacios colapsados; la comparación es sin distinguir mayúsculas (índice Lower)."""
+    return re.sub(r"\s+", " ", (name or "").strip())
+
+
+def new_dashboard_token() -> str:
+    return secrets.token_urlsafe(24)
+
+
+class CompanyManager(models.Manager):
+    def for_name(self, name: str):
+        """Empresa por nombre (la crea si no existe). None si el nombre está vacío."""
+        name = normalize_company_name(name)
+        if not name:
+            return None
+        company = self.filter(name__lower=name.lower()).first()
+        if company is None:
+            company, _ = self.get_or_create(name=name)
+        return company
+
+
+class Company(models.Model):
+    name = models.CharField(max_length=200, verbose_name="Nombre")
+    contact_email = models.EmailField(
+        blank=True,
+        default="",
+        verbose_name="Email de contacto",
+        help_text="Quién recibe el link al tablero de avance."
+    )
+
+    # Link secreto del tablero del empleador (/empresas/<token>/)
+    dashboard_token = models.CharField(max_length=64, unique=True, default=new_dashboard_token, editable=False)
+
+    # Trabajadores vinculados (mantenido por signals.py y el alta masiva)
+    enrolled_count = models.PositiveIntegerField(default=0, verbose_name="Inscriptos")
+
+    created_at = models.DateTimeField(default=timezone.now)
+
+    objects = CompanyManager()
+
+    class Meta:
+        ordering = ["name"]
+        verbose_name = "Empresa"
+        verbose_name_plural = "Empresas"
+        constraints = [
+            models.UniqueConstraint(Lower("name"), name="uq_company_name_lower"),
+        ]
+
+    def __str__(self) -> str:
+        return self.name
+
+
+# `name__lower=...` usa el índice único Lower("name") (igual que TraineeUser.email)
+Company._meta.get_field("name").register_lookup(Lower)
+
+
+class CompanyModuleProgress(models.Model):
+    """
+    Avance de una empresa en un módulo. Cuenta TRABAJADORES, no intentos:
+    - attempted: rindieron al menos una vez
+    - passed: aprobaron al menos una vez
+    - certificates_valid: tienen hoy un certificado vigente
+    """
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name="progress")
+    module = models.ForeignKey(TrainingModule, on_delete=models.CASCADE, related_name="company_progress")
+
+    attempted_count = models.PositiveIntegerField(default=0, verbose_name="Rindieron")
+    passed_count = models.PositiveIntegerField(default=0, verbose_name="Aprobaron")
+    certificates_valid = models.PositiveIntegerField(default=0, verbose_name="Certificados vigentes")
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Avance por módulo"
+        verbose_name_plural = "Avance por módulo"
+        constraints = [
+            models.UniqueConstraint(fields=["company", "module"], name="uq_companyprogress_company_module"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.company} · {self.module.slug}"
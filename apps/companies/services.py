@@ -0,0 +1,141 @@
+# apps/companies/services.py
+"""
+Mantenimiento incremental de los contadores de empresa.
+
+Cada función se llama DENTRO de la transacción del evento que cuenta (submit,
+emisión de certificado, alta de usuarios), así el contador y el dato fuente se
+confirman o se descartan juntos. Todas las actualizaciones son UPDATE ... SET
+x = x + n (F()), sin leer-modificar-escribir en Python.
+"""
+
+from collections import Counter
+
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import Company, CompanyModuleProgress
+
+PROGRESS_FIELDS = ("attempted_count", "passed_count", "certificates_valid")
+
+
+def _bump_progress(company_id: int, module_id: int, **deltas) -> None:
+    deltas = {name: n for name, n in deltas.items() if n}
+    if not deltas:
+        return
+    updates = {name: F(name) + n for name, n in deltas.items()}
+    qs = CompanyModuleProgress.objects.filter(company_id=company_id, module_id=module_id)
+    if not qs.update(**updates):
+        CompanyModuleProgress.objects.get_or_create(company_id=company_id, module_id=module_id)
+        qs.update(**updates)
+
+
+def add_enrolled(counts: Counter) -> None:
+    """Suma inscriptos por empresa ({company_id: n}, n puede ser negativo)."""
+    for company_id, n in counts.items():
+        if company_id and n:
+            Company.objects.filter(pk=company_id).update(enrolled_count=F("enrolled_count") + n)
+
+
+def record_submit(user, module, attempt, first_completion: bool) -> None:
+    """
+    Llamar en la transacción del submit, después de guardar el intento.
+    `first_completion`: el trabajador no había terminado nunca este módulo
+    (QuizState.last_completed_at vacío antes de apply_submit_rules).
+    """
+    if not user.company_id:
+        return
+    first_pass = False
+    if attempt.passed:
+        from apps.quiz.models import QuizAttempt
+        first_pass = not (
+            QuizAttempt.objects
+            .filter(user=user, module=module, passed=True, submitted_at__isnull=False)
+            .exclude(pk=attempt.pk)
+            .exists()
+        )
+    _bump_progress(
+        user.company_id, module.pk,
+        attempted_count=int(first_completion),
+        passed_count=int(first_pass),
+    )
+
+
+def record_certificate(cert) -> None:
+    """Llamar en la transacción que crea el certificado."""
+    company_id = cert.user.company_id
+    if not company_id:
+        return
+    from apps.certificates.models import Certificate
+    already_valid = (
+        Certificate.objects
+        .filter(user_id=cert.user_id, module_id=cert.module_id, valid_until__gt=timezone.now())
+        .exclude(pk=cert.pk)
+        .exists()
+    )
+    if not already_valid:
+        _bump_progress(company_id, cert.module_id, certificates_valid=1)
+
+
+def aggregate_progress(QuizAttempt, Certificate, now=None) -> dict:
+    """
+    Cuenta desde las tablas fuente: {(company_id, module_id): {campo: n}}.
+    Recibe los modelos para poder usarse también desde migraciones.
+    """
+    now = now or timezone.now()
+    rows: dict = {}
+
+    def collect(qs, field):
+        for r in qs.values("user__company", "module").annotate(n=Count("user", distinct=True)).order_by():
+            rows.setdefault((r["user__company"], r["module"]), dict.fromkeys(PROGRESS_FIELDS, 0))[field] = r["n"]
+
+    submitted = QuizAttempt.objects.filter(user__company__isnull=False, submitted_at__isnull=False)
+    collect(submitted, "attempted_count")
+    collect(submitted.filter(passed=True), "passed_count")
+    collect(Certificate.objects.filter(user__company__isnull=False, valid_until__gt=now), "certificates_valid")
+    return rows
+
+
+def sync_counters(apply: bool = True) -> list[tuple[str, str, int, int]]:
+    """
+    Recalcula todos los contadores y corrige los que difieren (vencimientos de
+    certificados, cambios de empresa, datos cargados a mano).
+    Devuelve los desvíos: (empresa/módulo, campo, valor guardado, valor real).
+    """
+    from django.contrib.auth import get_user_model
+    from apps.certificates.models import Certificate
+    from apps.quiz.models import QuizAttempt
+
+    User = get_user_model()
+    drift = []
+
+    enrolled = dict(
+        User.objects.filter(company__isnull=False)
+        .values_list("company").annotate(n=Count("id")).order_by()
+    )
+    for company in Company.objects.only("id", "name", "enrolled_count"):
+        actual = enrolled.get(company.pk, 0)
+        if company.enrolled_count != actual:
+            drift.append((company.name, "enrolled_count", company.enrolled_count, actual))
+            if apply:
+                Company.objects.filter(pk=company.pk).update(enrolled_count=actual)
+
+    actual_rows = aggregate_progress(QuizAttempt, Certificate)
+    stored = {
+        (p.company_id, p.module_id): p
+        for p in CompanyModuleProgress.objects.select_related("company", "module")
+    }
+    for key in set(actual_rows) | set(stored):
+        actual = actual_rows.get(key, dict.fromkeys(PROGRESS_FIELDS, 0))
+        progress = stored.get(key)
+        changed = {}
+        for field in PROGRESS_FIELDS:
+            current = getattr(progress, field) if progress else 0
+            if current != actual[field]:
+                label = str(progress) if progress else f"empresa {key[0]} · módulo {key[1]}"
+                drift.append((label, field, current, actual[field]))
+                changed[field] = actual[field]
+        if apply and changed:
+            CompanyModuleProgress.objects.update_or_create(
+                company_id=key[0], module_id=key[1], defaults=changed,
+            )
+    return drift
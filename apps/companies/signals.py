@@ -0,0 +1,38 @@
+# apps/companies/signals.py
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .services import add_enrolled
+
+User = get_user_model()
+
+# company_id diferido (.only()/.defer()): no sabemos el valor previo.
+# Es un string (no object()) para sobrevivir al pickle del cache de usuarios.
+_UNKNOWN = "unknown"
+
+
+@receiver(post_init, sender=User)
+def remember_company(sender, instance, **kwargs):
+    # Empresa con la que se cargó el usuario: sin query extra para detectar cambios
+    instance._loaded_company_id = instance.__dict__.get("company_id", _UNKNOWN)
+
+
+@receiver(post_save, sender=User)
+def update_enrolled_on_save(sender, instance, created, update_fields=None, **kwargs):
+    """Mantiene Company.enrolled_count al crear un usuario o cambiarlo de empresa."""
+    if update_fields is not None and "company" not in update_fields and "company_id" not in update_fields:
+        return
+    before = None if created else getattr(instance, "_loaded_company_id", _UNKNOWN)
+    after = instance.company_id
+    if before != _UNKNOWN and before != after:
+        add_enrolled(Counter({before: -1, after: 1}))
+    instance._loaded_company_id = after
+
+
+@receiver(post_delete, sender=User)
+def update_enrolled_on_delete(sender, instance, **kwargs):
+    if instance.company_id:
+        add_enrolled(Counter({instance.company_id: -1}))
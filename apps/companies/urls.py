@@ -0,0 +1,14 @@
+# apps/companies/urls.py
+
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    # Exportes para staff (antes que las rutas con token)
+    path("reportes/<str:report>/", views.staff_export, name="companies_staff_export"),
+    # Exporte del empleador: link firmado que vence (lo genera el tablero)
+    path("exportes/<str:signed>/", views.company_export, name="company_export"),
+
+    # Tablero del empleador (token secreto en la URL)
+    path("<str:token>/", views.company_dashboard, name="company_dashboard"),
+]
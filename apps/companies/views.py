@@ -0,0 +1,87 @@
+# apps/companies/views.py
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.signing import BadSignature, SignatureExpired, TimestampSigner
+from django.http import Http404, HttpResponseGone
+from django.shortcuts import get_object_or_404, render
+from django.urls import reverse
+from django.views.decorators.cache import never_cache
+
+from .exports import FORMATS, REPORTS, parse_filters, streaming_export
+from .models import Company
+
+
+@never_cache
+def company_dashboard(request, token):
+    """
+    Tablero del empleador (link secreto, sin login).
+    Solo lee Company + una fila de CompanyModuleProgress por módulo: el costo
+    no depende de cuántos trabajadores tenga la empresa.
+    """
+    company = get_object_or_404(Company, dashboard_token=token)
+    rows = company.progress.select_related("module").order_by("module__title")
+
+    response = render(request, "companies/dashboard.html", {
+        "company": company,
+        "rows": rows,
+        # Links de descarga firmados y con vencimiento (se regeneran en cada visita)
+        "export_urls": {report: reverse("company_export", args=[sign_export(company, report)]) for report in REPORTS},
+    })
+    # El link es la credencial: que no lo indexen ni viaje en el Referer
+    response["X-Robots-Tag"] = "noindex, nofollow"
+    response["Referrer-Policy"] = "no-referrer"
+    return response
+
+
+def _export(request, report, company_id=None):
+    if report not in REPORTS:
+        raise Http404
+    fmt = request.GET.get("format", "csv")
+    if fmt not in FORMATS:
+        fmt = "csv"
+    filters = parse_filters(request.GET, company_id=company_id)
+    return streaming_export(request, report, fmt, filters)
+
+
+@staff_member_required
+def staff_export(request, report):
+    """Exporte para staff: todas las empresas o ?company=<id>."""
+    return _export(request, report)
+
+
+# ─────────────────────────────────────────────────────────────
+# Exporte del empleador: link firmado de corta duración
+# ─────────────────────────────────────────────────────────────
+# El exporte lleva CUIL, nombre, email y puntaje de cada trabajador: no se
+# autoriza con el token fijo del tablero (queda en historiales, proxies y mails
+# reenviados). El tablero genera links "<company_pk>:<report>" firmados que vencen
+# a los COMPANY_EXPORT_LINK_SECONDS. El token entra en la sal: regenerarlo desde
+# el admin invalida también los links ya emitidos.
+
+def _export_signer(company) -> TimestampSigner:
+    return TimestampSigner(salt=f"companies.export:{company.dashboard_token}")
+
+
+def sign_export(company, report: str) -> str:
+    return _export_signer(company).sign(f"{company.pk}:{report}")
+
+
+@never_cache
+def company_export(request, signed):
+    """Exporte del empleador: siempre limitado a su empresa."""
+    company_pk = signed.split(":", 1)[0]
+    if not company_pk.isdigit():
+        raise Http404
+    company = get_object_or_404(Company, pk=company_pk)
+    try:
+        value = _export_signer(company).unsign(signed, max_age=settings.COMPANY_EXPORT_LINK_SECONDS)
+    except SignatureExpired:
+        return HttpResponseGone("El link de descarga venció: volvé a abrir el tablero de la empresa.")
+    except BadSignature:
+        raise Http404
+    report = value.split(":", 1)[1]
+    response = _export(request, report, company_id=company.pk)
+    response["X-Robots-Tag"] = "noindex, nofollow"
+    response["Referrer-Policy"] = "no-referrer"
+    return response
@@ -1,3 +1,70 @@
+# apps/ergobot_ai/admin.py
+
+from datetime import timedelta
+
 from django.contrib import admin
+from django.http import JsonResponse
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils import timezone
+
+from .models import ErgobotUsage
+from .usage import build_report
+
+
+@admin.register(ErgobotUsage)
+class ErgobotUsageAdmin(admin.ModelAdmin):
+    """Filas de uso (solo lectura) + reporte agregado por módulo y día."""
+
+    list_display = (
+        "created_at", "module_slug", "user", "model", "ttft_ms", "duration_ms",
+        "input_tokens", "output_tokens", "outcome", "tier", "route_reasons",
+        "queue_wait_ms", "active_streams",
+    )
+    list_filter = ("outcome", "tier", "module_slug", "model", "created_at")
+    search_fields = ("user__email", "user__cuil", "module_slug")
+    date_hierarchy = "created_at"
+    list_select_related = ("user",)
+    change_list_template = "admin/ergobot_ai/ergobotusage/change_list.html"
+
+    def has_add_permission(self, request):
+        """Las filas las genera el stream de Ergobot."""
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        custom = [
+            path(
+                "report/",
+                self.admin_site.admin_view(self.report_view),
+                name="ergobot_ai_ergobotusage_report",
+            ),
+        ]
+        return custom + super().get_urls()
+
+    def report_view(self, request):
+        """
+        Percentiles de TTFT/duración, tokens y costo por módulo y día.
+        ?days=14&module=<slug>&format=json
+        """
+        try:
+            days = max(1, min(int(request.GET.get("days", 14)), 365))
+        except ValueError:
+            days = 14
+        module_slug = request.GET.get("module", "").strip()
+        report = build_report(timezone.now() - timedelta(days=days), module_slug=module_slug)
+
+        if request.GET.get("format") == "json":
+            return JsonResponse({"days": days, "module": module_slug, "rows": report})
 
-# Register your models here.
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Reporte de uso de Ergobot",
+            "rows": report,
+            "days": days,
+            "module": module_slug,
+        }
+        return TemplateResponse(request, "admin/ergobot_ai/ergobotusage/report.html", context)
@@ -1,34 +1,76 @@
 # apps/ergobot_ai/agents.py
+import asyncio
+import importlib
+import threading
+from typing import TYPE_CHECKING
+
 from django.conf import settings
-from agents import Agent
-from apps.training.models import TrainingModule
 from .prompts import build_system_prompt
 
+# El SDK de agents (+ openai + mcp) tarda ~2 s en importarse: se carga recién al
+# armar el primer agente (o en el warm-up), no al cargar el URLconf. Desde código
+# async, antes pasar por load_sdk() para no importarlo en el event loop.
+if TYPE_CHECKING:
+    from agents import Agent
+
+_SDK_LOADED = False
+
+# System prompt por (módulo, updated_at): se arma leyendo varios .md del disco
+_PROMPTS: dict[tuple, str] = {}
+_PROMPTS_MAX = 64
+_PROMPTS_LOCK = threading.Lock()
 
-async def ergobot_agent(module_slug: str) -> Agent:
+
+async def load_sdk() -> None:
     """
-    Crea el agente Ergobot con instrucciones específicas del módulo.
-    Versión asíncrona para compatibilidad con vistas ASGI/SSE.
+    Importa el SDK en un hilo (solo la primera vez en el proceso). Importado en el
+    event loop congelaría ~2 s todos los streams y requests del worker.
     """
-    # ─────────────────────────────────────────────────────────────
-    # IMPORTANTE: Usamos afirst() en lugar de first()
-    # Django requiere métodos async del ORM dentro de vistas async
-    # ─────────────────────────────────────────────────────────────
-    module = await TrainingModule.objects.filter(slug=module_slug).afirst()
+    global _SDK_LOADED
+    if not _SDK_LOADED:
+        await asyncio.to_thread(importlib.import_module, "agents")
+        _SDK_LOADED = True
+
 
+def ergobot_instructions(module) -> str:
+    """System prompt del módulo (o el genérico si el slug no existe). Cacheado por versión."""
     if module:
         # Construimos las instrucciones dinámicas basadas en el contenido
-        instructions = build_system_prompt(module)
-    else:
-        # Fallback de seguridad por si el slug no coincide
-        instructions = (
-            "Sos Ergobot, asistente docente experto en ergonomía. "
-            "Tus respuestas deben ser claras, breves, concisas y amables "
-            "Respondé solo temas de ergonomía laboral."
-        )
+        key = (module.pk, getattr(module, "updated_at", None))
+        prompt = _PROMPTS.get(key)
+        if prompt is None:
+            prompt = build_system_prompt(module)
+            with _PROMPTS_LOCK:
+                if len(_PROMPTS) >= _PROMPTS_MAX:
+                    _PROMPTS.clear()
+                _PROMPTS[key] = prompt
+        return prompt
+
+    # Fallback de seguridad por si el slug no coincide
+    return (
+        "Sos Ergobot, asistente docente experto en ergonomía. "
+        "Tus respuestas deben ser claras, breves, concisas y amables "
+        "Respondé solo temas de ergonomía laboral."
+    )
+
+
+def build_ergobot_agent(module, model: str = None, max_tokens: int = None, instructions: str = None) -> "Agent":
+    """
+    Arma el agente a partir de un TrainingModule ya cargado (o None).
+    Desde código async, antes await load_sdk().
+    model / max_tokens permiten que el ruteo elija un tier distinto al default.
+    """
+    from agents import Agent, ModelSettings
+
+    if instructions is None:
+        instructions = ergobot_instructions(module)
 
     return Agent(
         name="Ergobot",
         instructions=instructions,
-        model=getattr(settings, "OPENAI_MODEL", "gpt-4.1-mini-2025-04-14"),
+        model=model or getattr(settings, "OPENAI_MODEL", "gpt-4.1-mini-2025-04-14"),
+        # Tope de salida: una respuesta de Ergobot nunca debería necesitar más
+        model_settings=ModelSettings(
+            max_tokens=max_tokens or getattr(settings, "ERGOBOT_MAX_OUTPUT_TOKENS", 800),
+        ),
     )
@@ -3,3 +3,17 @@ from django.apps import AppConfig
 class ErgobotAiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.ergobot_ai"
+
+    def warm_up(self):
+        # SDK de agents, prompts y vocabulario de los módulos activos, cliente de OpenAI
+        from apps.training.models import TrainingModule
+        from .agents import build_ergobot_agent, ergobot_instructions
+        from .backends import get_backend
+        from .prefilter import module_vocabulary
+
+        for module in TrainingModule.objects.filter(is_active=True):
+            build_ergobot_agent(module, instructions=ergobot_instructions(module))
+            module_vocabulary(module)
+        backend_warm_up = getattr(get_backend(), "warm_up", None)
+        if backend_warm_up is not None:
+            backend_warm_up()
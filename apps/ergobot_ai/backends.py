@@ -0,0 +1,125 @@
+# apps/ergobot_ai/backends.py
+"""
+Backends de ejecución de Ergobot.
+
+Se eligen con settings.ERGOBOT_BACKEND (ruta importable, igual que EMAIL_BACKEND):
+    - apps.ergobot_ai.backends.OpenAIAgentsBackend  → agents.Runner real (default)
+    - apps.ergobot_ai.backends.FakeBackend          → modelo local determinístico,
+      sin red ni costo, pensado para pruebas de carga del stream SSE.
+
+Todos exponen run_streamed(agent, messages) y devuelven un objeto con
+stream_events() (async iterator) y cancel(), igual que RunResultStreaming.
+"""
+
+import asyncio
+import re
+from functools import lru_cache
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+DEFAULT_BACKEND = "apps.ergobot_ai.backends.OpenAIAgentsBackend"
+
+DEFAULT_FAKE_TEXT = (
+    "La ergonomía busca adaptar el trabajo a la persona. "
+    "Mantené la espalda apoyada, los hombros relajados y la pantalla a la altura de los ojos. "
+    "Hacé pausas activas cada 45 minutos y alterná tareas para evitar movimientos repetitivos."
+)
+
+
+class OpenAIAgentsBackend:
+    """Ejecuta el agente contra la API real usando el SDK de agents."""
+
+    def run_streamed(self, agent, messages):
+        # Import diferido: el SDK es pesado y solo lo necesita este backend
+        from agents import Runner
+        return Runner.run_streamed(agent, input=messages)
+
+    def warm_up(self):
+        """Cliente de OpenAI armado de antemano (si no, lo construye el primer chat)."""
+        api_key = getattr(settings, "OPENAI_API_KEY", "")
+        if not api_key:
+            return
+        from agents import set_default_openai_client
+        from openai import AsyncOpenAI
+        set_default_openai_client(AsyncOpenAI(api_key=api_key))
+
+
+class FakeBackend:
+    """
+    Modelo local que emite una secuencia fija de tokens.
+
+    Configuración (settings / .env):
+        ERGOBOT_FAKE_TEXT: texto a emitir (se parte en tokens por palabra)
+        ERGOBOT_FAKE_TOKENS: cantidad de tokens a emitir (0 = el texto una vez)
+        ERGOBOT_FAKE_TTFT_MS: demora hasta el primer token
+        ERGOBOT_FAKE_INTER_TOKEN_MS: demora entre tokens
+    """
+
+    def run_streamed(self, agent, messages):
+        text = getattr(settings, "ERGOBOT_FAKE_TEXT", "") or DEFAULT_FAKE_TEXT
+        tokens = re.findall(r"\S+\s*", text)
+        count = getattr(settings, "ERGOBOT_FAKE_TOKENS", 0) or len(tokens)
+
+        # Respetamos el tope de salida del agente, igual que haría el modelo real
+        model_settings = getattr(agent, "model_settings", None)
+        max_tokens = getattr(model_settings, "max_tokens", None)
+        if max_tokens:
+            count = min(count, max_tokens)
+
+        # Los tokens de entrada se estiman con la misma regla de ~4 caracteres
+        prompt_chars = len(getattr(agent, "instructions", "") or "")
+        prompt_chars += sum(len(str(m.get("content", ""))) for m in messages if isinstance(m, dict))
+
+        return FakeRunResult(
+            tokens=[tokens[i % len(tokens)] for i in range(count)],
+            ttft=getattr(settings, "ERGOBOT_FAKE_TTFT_MS", 300) / 1000,
+            inter_token=getattr(settings, "ERGOBOT_FAKE_INTER_TOKEN_MS", 20) / 1000,
+            input_tokens=(prompt_chars + 3) // 4,
+        )
+
+
+class FakeRunResult:
+    """Imita la interfaz de RunResultStreaming que usa la vista."""
+
+    def __init__(self, tokens: list[str], ttft: float, inter_token: float, input_tokens: int):
+        self.tokens = tokens
+        self.ttft = ttft
+        self.inter_token = inter_token
+        self.input_tokens = input_tokens
+        self.cancelled = False
+
+    def cancel(self, mode: str = "immediate") -> None:
+        self.cancelled = True
+
+    async def stream_events(self):
+        yield _raw_event("response.created")
+        await asyncio.sleep(self.ttft)
+
+        emitted = 0
+        for i, token in enumerate(self.tokens):
+            if self.cancelled:
+                return
+            if i:
+                await asyncio.sleep(self.inter_token)
+            emitted += 1
+            yield _raw_event("response.output_text.delta", delta=token)
+
+        usage = SimpleNamespace(input_tokens=self.input_tokens, output_tokens=emitted)
+        yield _raw_event("response.completed", response=SimpleNamespace(usage=usage))
+
+
+def _raw_event(data_type: str, **fields):
+    """Mismo formato que filtra la vista: ev.type + ev.data.type."""
+    return SimpleNamespace(type="raw_response_event", data=SimpleNamespace(type=data_type, **fields))
+
+
+@lru_cache(maxsize=None)
+def _load_backend(path: str):
+    return import_string(path)()
+
+
+def get_backend():
+    """Devuelve la instancia del backend configurado (una por proceso)."""
+    return _load_backend(getattr(settings, "ERGOBOT_BACKEND", DEFAULT_BACKEND) or DEFAULT_BACKEND)
@@ -0,0 +1,235 @@
+# apps/ergobot_ai/management/commands/ergobot_bench.py
+"""
+Prueba de carga del stream de Ergobot sin red.
+
+Abre N streams SSE concurrentes contra la aplicación ASGI en este mismo proceso
+(mismo stack que uvicorn: middlewares, sesión, login_required) usando por
+defecto el FakeBackend. Reporta TTFT, duración, throughput y el lag del event
+loop, que es lo que limita cuántos chats aguanta un worker de uvicorn.
+
+Antes de medir manda un stream de calentamiento (import del SDK, prompts,
+banco del módulo): si no, el primer chat en frío se come el p95 del TTFT.
+Al terminar borra el usuario de prueba, su sesión y sus filas de ErgobotUsage,
+así el bench no ensucia los reportes aunque se corra contra producción.
+
+Uso:
+    python manage.py ergobot_bench --streams 200 --ttft-ms 400 --inter-token-ms 25
+"""
+
+import asyncio
+import json
+import time
+from importlib import import_module
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.urls import reverse
+
+from apps.ergobot_ai.usage import percentile, recorder
+
+FAKE_BACKEND = "apps.ergobot_ai.backends.FakeBackend"
+BENCH_CUIL = "00000000000"
+BENCH_EMAIL = "ergobot-bench@ergocap.local"
+
+
+class Command(BaseCommand):
+    help = "Abre N streams SSE concurrentes de Ergobot (modelo fake) y mide TTFT, throughput y lag del event loop."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--streams", type=int, default=50, help="Streams concurrentes (default: 50).")
+        parser.add_argument("--module", type=str, default="", help="Slug del módulo (default: el activo más reciente).")
+        parser.add_argument("--question", type=str, default="¿Cómo debo sentarme frente a la computadora?")
+        parser.add_argument("--ttft-ms", type=int, default=None, help="Sobrescribe ERGOBOT_FAKE_TTFT_MS.")
+        parser.add_argument("--inter-token-ms", type=int, default=None, help="Sobrescribe ERGOBOT_FAKE_INTER_TOKEN_MS.")
+        parser.add_argument("--tokens", type=int, default=None, help="Sobrescribe ERGOBOT_FAKE_TOKENS.")
+        parser.add_argument(
+            "--real-backend", action="store_true",
+            help="Usa ERGOBOT_BACKEND tal cual está configurado (¡consume la API real!).",
+        )
+
+    def handle(self, *args, **opts):
+        from apps.training.models import TrainingModule
+
+        slug = opts["module"]
+        if not slug:
+            module = TrainingModule.objects.filter(is_active=True).order_by("-updated_at").first()
+            slug = module.slug if module else "bench"
+
+        overrides = {}
+        if not opts["real_backend"]:
+            overrides["ERGOBOT_BACKEND"] = FAKE_BACKEND
+        if opts["ttft_ms"] is not None:
+            overrides["ERGOBOT_FAKE_TTFT_MS"] = opts["ttft_ms"]
+        if opts["inter_token_ms"] is not None:
+            overrides["ERGOBOT_FAKE_INTER_TOKEN_MS"] = opts["inter_token_ms"]
+        if opts["tokens"] is not None:
+            overrides["ERGOBOT_FAKE_TOKENS"] = opts["tokens"]
+
+        user, session = self._bench_session()
+        cookie = f"{settings.SESSION_COOKIE_NAME}={session.session_key}".encode()
+        path = reverse("ergobot_stream", kwargs={"module_slug": slug})
+        query = urlencode({"q": opts["question"], "thread": "[]"})
+
+        self.stdout.write(
+            f"Ergobot bench: {opts['streams']} streams → {path} "
+            f"(backend={overrides.get('ERGOBOT_BACKEND', settings.ERGOBOT_BACKEND)})"
+        )
+
+        try:
+            with override_settings(**overrides):
+                report = asyncio.run(self._run(opts["streams"], path, query, cookie))
+        finally:
+            self._cleanup(user, session)
+
+        self._print_report(report)
+
+    def _bench_session(self):
+        """Crea (o reutiliza) un usuario de prueba y una sesión autenticada."""
+        User = get_user_model()
+        user = User.objects.filter(cuil=BENCH_CUIL).first()
+        if not user:
+            user = User.objects.create_user(cuil=BENCH_CUIL, email=BENCH_EMAIL, full_name="Ergobot Bench")
+
+        session = import_module(settings.SESSION_ENGINE).SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = "apps.accounts.backends.CuilEmailBackend"
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+        return user, session
+
+    def _cleanup(self, user, session) -> None:
+        """Borra todo lo que dejó el bench: filas de uso (escritas antes), sesión y usuario."""
+        from apps.ergobot_ai.models import ErgobotUsage
+
+        recorder.flush()
+        usage_rows, _ = ErgobotUsage.objects.filter(user=user).delete()
+        session.delete()
+        user.delete()
+        self.stdout.write(f"Limpieza: usuario de prueba, sesión y {usage_rows} filas de uso borradas.")
+
+    async def _run(self, streams: int, path: str, query: str, cookie: bytes) -> dict:
+        from config.asgi import application
+
+        loop = asyncio.get_running_loop()
+        lags: list[float] = []
+        running = True
+
+        async def monitor_loop():
+            # Si el loop está saturado, el sleep se despierta tarde: eso es el lag
+            interval = 0.01
+            while running:
+                t0 = loop.time()
+                await asyncio.sleep(interval)
+                lags.append(max(0.0, loop.time() - t0 - interval))
+
+        # Calentamiento: fuera de las estadísticas (primer chat del proceso)
+        await self._one_stream(application, path, query, cookie)
+
+        monitor = asyncio.create_task(monitor_loop())
+        started = time.perf_counter()
+        results = await asyncio.gather(*[
+            self._one_stream(application, path, query, cookie) for _ in range(streams)
+        ])
+        wall = time.perf_counter() - started
+        running = False
+        await monitor
+
+        return {"results": results, "wall": wall, "lags": lags}
+
+    async def _one_stream(self, app, path: str, query: str, cookie: bytes) -> dict:
+        host = next((h for h in settings.ALLOWED_HOSTS if h and "*" not in h), "localhost")
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": [
+                (b"host", host.encode()),
+                (b"accept", b"text/event-stream"),
+                (b"cookie", cookie),
+            ],
+            "client": ("127.0.0.1", 50000),
+            "server": (host, 80),
+        }
+
+        finished = asyncio.Event()
+        request_sent = False
+        stats = {"status": None, "ttft": None, "duration": None, "chars": 0, "frames": 0, "error": None}
+        t0 = time.perf_counter()
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            # Django escucha desconexiones: bloqueamos hasta terminar el stream
+            await finished.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                stats["status"] = message["status"]
+                return
+            body = message.get("body", b"")
+            for frame in body.split(b"\n\n"):
+                if not frame.startswith(b"data: "):
+                    continue
+                payload = json.loads(frame[6:])
+                stats["frames"] += 1
+                if payload.get("delta"):
+                    if stats["ttft"] is None:
+                        stats["ttft"] = time.perf_counter() - t0
+                    stats["chars"] += len(payload["delta"])
+                if payload.get("error"):
+                    stats["error"] = payload["error"]
+            if not message.get("more_body", False):
+                stats["duration"] = time.perf_counter() - t0
+                finished.set()
+
+        await app(scope, receive, send)
+        if stats["duration"] is None:
+            stats["duration"] = time.perf_counter() - t0
+        finished.set()
+        return stats
+
+    def _print_report(self, report: dict):
+        results = report["results"]
+        ok = [r for r in results if r["status"] == 200 and not r["error"] and r["ttft"] is not None]
+        failed = len(results) - len(ok)
+
+        ttfts = [r["ttft"] * 1000 for r in ok]
+        durations = [r["duration"] * 1000 for r in ok]
+        total_chars = sum(r["chars"] for r in ok)
+        total_frames = sum(r["frames"] for r in ok)
+        lags = [lag * 1000 for lag in report["lags"]]
+        wall = report["wall"]
+
+        self.stdout.write("")
+        self.stdout.write(f"Streams OK: {len(ok)}  fallidos: {failed}  tiempo total: {wall:.2f}s")
+        if failed:
+            sample = next((r for r in results if r not in ok), {})
+            self.stdout.write(self.style.WARNING(f"  ejemplo de fallo: status={sample.get('status')} error={sample.get('error')}"))
+        self.stdout.write(
+            f"TTFT ms      p50={percentile(ttfts, 50):.1f}  p95={percentile(ttfts, 95):.1f}  "
+            f"p99={percentile(ttfts, 99):.1f}  max={max(ttfts, default=0):.1f}"
+        )
+        self.stdout.write(
+            f"Duración ms  p50={percentile(durations, 50):.1f}  p95={percentile(durations, 95):.1f}  "
+            f"max={max(durations, default=0):.1f}"
+        )
+        self.stdout.write(
+            f"Throughput   {total_chars / wall:,.0f} chars/s  ~{total_chars / 4 / wall:,.0f} tokens/s  "
+            f"{total_frames / wall:,.0f} frames/s"
+        )
+        self.stdout.write(
+            f"Lag loop ms  p50={percentile(lags, 50):.2f}  p99={percentile(lags, 99):.2f}  "
+            f"max={max(lags, default=0):.2f}"
+        )
@@ -0,0 +1,114 @@
+# apps/ergobot_ai/management/commands/ergobot_prefilter_eval.py
+"""
+Evalúa el pre-filtro de Ergobot contra una muestra etiquetada.
+
+El CSV debe tener columnas `text,label` con label "on" (ergonomía, debe pasar)
+u "off" (fuera de tema, debe rechazarse). Lo importante es la PRECISIÓN de los
+rechazos: cada falso rechazo es un trabajador que se queda sin respuesta.
+
+Uso:
+    python manage.py ergobot_prefilter_eval
+    python manage.py ergobot_prefilter_eval --file muestra.csv --module ergonomia-oficina --sweep
+"""
+
+import csv
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.ergobot_ai.prefilter import classify, module_vocabulary
+from apps.training.models import TrainingModule
+
+DEFAULT_SAMPLE = Path(__file__).resolve().parents[2] / "data" / "prefilter_sample.csv"
+ON_LABELS = {"on", "on_topic", "1", "si", "sí", "yes"}
+OFF_LABELS = {"off", "off_topic", "0", "no"}
+
+
+class Command(BaseCommand):
+    help = "Mide precisión/recall del pre-filtro de Ergobot sobre una muestra etiquetada (CSV text,label)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--file", type=str, default=str(DEFAULT_SAMPLE), help="CSV con columnas text,label.")
+        parser.add_argument("--module", type=str, default="", help="Slug del módulo (default: el activo más reciente).")
+        parser.add_argument("--min-score", type=float, default=None, help="Sobrescribe ERGOBOT_PREFILTER_MIN_SCORE.")
+        parser.add_argument("--min-tokens", type=int, default=None, help="Sobrescribe ERGOBOT_PREFILTER_MIN_TOKENS.")
+        parser.add_argument("--sweep", action="store_true", help="Prueba varios umbrales de score.")
+        parser.add_argument("--show-errors", action="store_true", help="Lista los casos mal clasificados.")
+
+    def handle(self, *args, **opts):
+        samples = self._load(opts["file"])
+
+        if opts["module"]:
+            module = TrainingModule.objects.filter(slug=opts["module"]).first()
+            if not module:
+                raise CommandError(f"No existe el módulo '{opts['module']}'.")
+        else:
+            module = TrainingModule.objects.filter(is_active=True).order_by("-updated_at").first()
+        vocabulary = module_vocabulary(module)
+
+        min_tokens = opts["min_tokens"]
+        if min_tokens is None:
+            min_tokens = settings.ERGOBOT_PREFILTER_MIN_TOKENS
+        base_score = opts["min_score"]
+        if base_score is None:
+            base_score = settings.ERGOBOT_PREFILTER_MIN_SCORE
+
+        self.stdout.write(
+            f"Muestra: {len(samples)} consultas "
+            f"({sum(1 for _, off in samples if off)} fuera de tema) · "
+            f"módulo: {module.slug if module else '(solo vocabulario base)'} · "
+            f"vocabulario: {len(vocabulary)} stems"
+        )
+
+        thresholds = [0.05, 0.10, 0.15, 0.20, 0.25, 0.30, 0.40, 0.50] if opts["sweep"] else [base_score]
+        for threshold in thresholds:
+            self._evaluate(samples, vocabulary, threshold, min_tokens, opts["show_errors"] and not opts["sweep"])
+
+    def _load(self, path: str) -> list[tuple[str, bool]]:
+        try:
+            with open(path, newline="", encoding="utf-8") as fh:
+                reader = csv.DictReader(fh)
+                samples = []
+                for line, row in enumerate(reader, start=2):
+                    label = (row.get("label") or "").strip().lower()
+                    if label in ON_LABELS:
+                        samples.append((row.get("text") or "", False))
+                    elif label in OFF_LABELS:
+                        samples.append((row.get("text") or "", True))
+                    else:
+                        self.stderr.write(f"Línea {line}: etiqueta desconocida '{label}', se ignora.")
+        except FileNotFoundError:
+            raise CommandError(f"No existe el archivo {path}")
+        if not samples:
+            raise CommandError("La muestra está vacía.")
+        return samples
+
+    def _evaluate(self, samples, vocabulary, min_score, min_tokens, show_errors):
+        tp = fp = fn = tn = 0
+        errors = []
+        for text, is_off in samples:
+            verdict = classify(text, vocabulary, min_score=min_score, min_tokens=min_tokens)
+            refused = not verdict.allowed
+            if refused and is_off:
+                tp += 1
+            elif refused and not is_off:
+                fp += 1
+                errors.append(("falso rechazo", text, verdict))
+            elif not refused and is_off:
+                fn += 1
+                errors.append(("se escapó", text, verdict))
+            else:
+                tn += 1
+
+        precision = tp / (tp + fp) if (tp + fp) else 1.0
+        recall = tp / (tp + fn) if (tp + fn) else 0.0
+        style = self.style.SUCCESS if fp == 0 else self.style.WARNING
+        self.stdout.write(style(
+            f"min_score={min_score:.2f} min_tokens={min_tokens}  "
+            f"precisión={precision:.1%}  recall={recall:.1%}  "
+            f"(rechazos OK={tp}, falsos rechazos={fp}, fuera de tema que pasan={fn})"
+        ))
+        if show_errors:
+            for kind, text, verdict in errors:
+                self.stdout.write(f"  [{kind}] score={verdict.score:.2f} {verdict.reason or '-'}: {text}")
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:24
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ErgobotUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('module_slug', models.SlugField()),
+                ('model', models.CharField(blank=True, default='', max_length=100)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('ttft_ms', models.PositiveIntegerField(blank=True, null=True, verbose_name='TTFT (ms)')),
+                ('duration_ms', models.PositiveIntegerField(default=0, verbose_name='Duración (ms)')),
+                ('input_tokens', models.PositiveIntegerField(default=0)),
+                ('output_tokens', models.PositiveIntegerField(default=0)),
+                ('tokens_estimated', models.BooleanField(default=False)),
+                ('outcome', models.CharField(choices=[('ok', 'Completa'), ('cancelled', 'Cancelada (cliente se fue)'), ('timeout', 'Cortada por timeout'), ('error', 'Error')], default='ok', max_length=16)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ergobot_usage', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Uso de Ergobot',
+                'verbose_name_plural': 'Uso de Ergobot',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['-created_at'], name='ergobot_ai__created_274b1d_idx'), models.Index(fields=['module_slug', '-created_at'], name='ergobot_ai__module__763f26_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ergobot_ai', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ergobotusage',
+            name='outcome',
+            field=models.CharField(choices=[('ok', 'Completa'), ('cancelled', 'Cancelada (cliente se fue)'), ('timeout', 'Cortada por timeout'), ('error', 'Error'), ('refused', 'Rechazada por el pre-filtro (sin LLM)')], default='ok', max_length=16),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ergobot_ai', '0002_usage_refused_outcome'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ergobotusage',
+            name='route_reasons',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='ergobotusage',
+            name='tier',
+            field=models.CharField(blank=True, default='', max_length=32),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ergobot_ai', '0003_usage_route_decision'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ergobotusage',
+            name='active_streams',
+            field=models.PositiveIntegerField(default=0, verbose_name='Streams activos'),
+        ),
+        migrations.AddField(
+            model_name='ergobotusage',
+            name='queue_wait_ms',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Espera (ms)'),
+        ),
+    ]
@@ -1,3 +1,72 @@
+# apps/ergobot_ai/models.py
+
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
+
+
+class ErgobotUsage(models.Model):
+    """
+    Una fila por consulta a Ergobot: latencia, tokens y cómo terminó.
+    Se escribe en lotes desde un hilo aparte (ver usage.py), nunca desde el stream.
+    """
+    OUTCOME_OK = "ok"
+    OUTCOME_CANCELLED = "cancelled"
+    OUTCOME_TIMEOUT = "timeout"
+    OUTCOME_ERROR = "error"
+    OUTCOME_REFUSED = "refused"
+    OUTCOME_CHOICES = [
+        (OUTCOME_OK, "Completa"),
+        (OUTCOME_CANCELLED, "Cancelada (cliente se fue)"),
+        (OUTCOME_TIMEOUT, "Cortada por timeout"),
+        (OUTCOME_ERROR, "Error"),
+        (OUTCOME_REFUSED, "Rechazada por el pre-filtro (sin LLM)"),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="ergobot_usage",
+    )
+    # Guardamos el slug (no FK) para no perder métricas si se borra el módulo
+    module_slug = models.SlugField(max_length=50)
+    model = models.CharField(max_length=100, blank=True, default="")
+
+    created_at = models.DateTimeField(default=timezone.now)
+    ttft_ms = models.PositiveIntegerField(null=True, blank=True, verbose_name="TTFT (ms)")
+    duration_ms = models.PositiveIntegerField(default=0, verbose_name="Duración (ms)")
+
+    input_tokens = models.PositiveIntegerField(default=0)
+    output_tokens = models.PositiveIntegerField(default=0)
+    # True si el run no llegó a informar usage y los tokens son estimados
+    tokens_estimated = models.BooleanField(default=False)
+
+    outcome = models.CharField(max_length=16, choices=OUTCOME_CHOICES, default=OUTCOME_OK)
+
+    # Decisión del ruteo (routing.py): tier elegido y por qué se bajó de nivel
+    tier = models.CharField(max_length=32, blank=True, default="")
+    route_reasons = models.CharField(max_length=100, blank=True, default="")
+    # Cola: espera entre que llegó el request y arrancó el run (pre-filtro, prompt,
+    # ruteo, carga del SDK) y streams activos del worker que vio el ruteo
+    queue_wait_ms = models.PositiveIntegerField(null=True, blank=True, verbose_name="Espera (ms)")
+    active_streams = models.PositiveIntegerField(default=0, verbose_name="Streams activos")
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name = "Uso de Ergobot"
+        verbose_name_plural = "Uso de Ergobot"
+        indexes = [
+            models.Index(fields=["-created_at"]),
+            models.Index(fields=["module_slug", "-created_at"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.module_slug} {self.created_at:%Y-%m-%d %H:%M} ({self.outcome})"
 
-# Create your models here.
+    @property
+    def cost_usd(self) -> float:
+        """Costo estimado según ERGOBOT_PRICING (USD por millón de tokens)."""
+        from .usage import estimate_cost
+        return estimate_cost(self.model, self.input_tokens, self.output_tokens)
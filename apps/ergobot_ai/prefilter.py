@@ -0,0 +1,159 @@
+# apps/ergobot_ai/prefilter.py
+"""
+Pre-filtro local de consultas fuera de tema.
+
+Antes de pagar un round trip al LLM (con todo el prompt del módulo) para que
+conteste "solo hablo de ergonomía", puntuamos la consulta contra el vocabulario
+del módulo (intro, material, transcripción) más un vocabulario base de
+ergonomía. Sin embeddings ni red: tokenizar, sacar stopwords y contar aciertos.
+
+Reglas (umbrales en settings):
+    - vacía / sin palabras          → rechazo "empty"
+    - contiene insultos             → rechazo "abusive"
+    - menos de MIN_TOKENS palabras  → se deja pasar (muy corta para juzgar,
+                                      típicamente un seguimiento: "¿y eso?")
+    - score < MIN_SCORE             → rechazo "off_topic"
+"""
+
+import re
+import unicodedata
+from dataclasses import dataclass
+
+from django.conf import settings
+
+REFUSAL_OFF_TOPIC = (
+    "Solo puedo ayudarte con temas de ergonomía laboral y el contenido de esta capacitación. "
+    "¿Tenés alguna consulta sobre posturas, cargas, pausas o el video del módulo?"
+)
+REFUSAL_ABUSIVE = (
+    "Mantengamos el respeto, por favor. "
+    "Si tenés una consulta sobre ergonomía o sobre el módulo, con gusto te ayudo."
+)
+REFUSAL_EMPTY = "No entendí la consulta. ¿Podés escribirla con otras palabras?"
+
+# Largo del prefijo usado como "stem" (cubre plurales y conjugaciones simples)
+STEM_LEN = 6
+
+STOPWORDS = set("""
+a al algo algun alguna algunas alguno algunos ante antes aqui asi aun bien cada como con contra cual
+cuales cuando cuanto de del desde donde dos el ella ellas ello ellos en entre era eran es esa esas
+ese eso esos esta estaba estan estar estas este esto estos fue fueron ha hace hacer hay la las le
+les lo los mas me mi mis mucho muy nada ni no nos nosotros o otra otras otro otros para pero poco
+por porque puede pueden que quien se sea ser si sin sobre solo son su sus tambien tan tanto te
+tengo tiene tienen todo todos tu tus un una uno unos usted vos y ya yo hola gracias buen buenas
+buenos dia dias tarde noches favor podes puedo quiero queria saber decime explicame contame
+seria debo deberia tenes sabes hay cual cuales mejor peor
+""".split())
+
+# Vocabulario base: ergonomía laboral + vocabulario propio de la plataforma
+BASE_VOCABULARY = """
+ergonomia ergonomico ergonomica postura posturas forzada sentado sentada parado parada silla
+escritorio mesa pantalla monitor teclado mouse raton notebook computadora altura espalda columna
+lumbar cervical cuello hombro hombros brazo brazos muneca munecas mano manos codo rodilla rodillas
+pierna piernas pie pies cadera musculo musculos muscular tendon tendinitis tunel carpiano lesion
+lesiones dolor dolores contractura fatiga cansancio estres carga cargas levantar levantamiento
+empujar arrastrar manipulacion manual peso pesado agarre repetitivo repetitivos repeticion
+movimiento movimientos vibracion vibraciones herramienta herramientas frio calor temperatura
+iluminacion ruido pausa pausas activas descanso estiramiento estiramientos ejercicio ejercicios
+riesgo riesgos factor factores prevencion prevenir salud seguridad higiene trabajo trabajador
+trabajadora laboral puesto puestos tarea tareas turno jornada empresa empleador enfermedad
+enfermedades profesional profesionales accidente accidentes art srt resolucion normativa ley
+capacitacion curso modulo video examen quiz certificado pregunta preguntas respuesta ergobot
+""".split()
+
+# Solo insultos dirigidos a una persona. Las malas palabras de uso casual
+# ("me duele una mierda la espalda", "la silla está toda chota", "che boludo")
+# describen un dolor o un problema: esas consultas tienen que llegar al LLM.
+ABUSIVE_WORDS = set("""
+pelotudo pelotuda idiota imbecil estupido estupida forro forra tarado tarada puto
+""".split())
+# Insultos que en el habla casual son vocativos: solo cuentan dirigidos a
+# alguien ("sos un boludo", "qué boludo que sos")
+CASUAL_INSULTS = {"boludo", "boluda"}
+
+
+@dataclass
+class Verdict:
+    allowed: bool
+    reason: str = ""
+    score: float = 1.0
+
+    @property
+    def refusal(self) -> str:
+        return {
+            "abusive": REFUSAL_ABUSIVE,
+            "empty": REFUSAL_EMPTY,
+        }.get(self.reason, REFUSAL_OFF_TOPIC)
+
+
+def _words(text: str) -> list[str]:
+    """Minúsculas, sin acentos, solo letras."""
+    text = unicodedata.normalize("NFKD", (text or "").lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return re.findall(r"[a-z]+", text)
+
+
+def _directed_insult(words: list[str]) -> bool:
+    for i, word in enumerate(words):
+        if word in CASUAL_INSULTS and "sos" in words[max(0, i - 2):i + 3]:
+            return True
+    return False
+
+
+def _stem(word: str) -> str:
+    return word[:STEM_LEN]
+
+
+def _content_stems(text: str) -> list[str]:
+    return [_stem(w) for w in _words(text) if len(w) >= 3 and w not in STOPWORDS]
+
+
+_BASE_STEMS = {_stem(w) for w in BASE_VOCABULARY}
+
+# Cache de vocabularios por (slug, updated_at): se regenera solo si cambia el módulo
+_VOCAB_CACHE: dict = {}
+
+
+def module_vocabulary(module) -> frozenset:
+    """Vocabulario (stems) del módulo + base. Se cachea por versión del módulo."""
+    if module is None:
+        return frozenset(_BASE_STEMS)
+
+    key = (module.slug, getattr(module, "updated_at", None))
+    vocab = _VOCAB_CACHE.get(key)
+    if vocab is None:
+        text = " ".join([
+            module.title or "",
+            module.intro_md or "",
+            module.material_md or "",
+            module.transcript_md or "",
+        ])
+        vocab = frozenset(_BASE_STEMS | set(_content_stems(text)))
+        # Descartamos versiones viejas del mismo módulo
+        for old in [k for k in _VOCAB_CACHE if k[0] == module.slug]:
+            _VOCAB_CACHE.pop(old, None)
+        _VOCAB_CACHE[key] = vocab
+    return vocab
+
+
+def classify(text: str, vocabulary: frozenset, min_score: float = None, min_tokens: int = None) -> Verdict:
+    """Decide si la consulta vale un llamado al LLM."""
+    if min_score is None:
+        min_score = getattr(settings, "ERGOBOT_PREFILTER_MIN_SCORE", 0.15)
+    if min_tokens is None:
+        min_tokens = getattr(settings, "ERGOBOT_PREFILTER_MIN_TOKENS", 3)
+
+    words = _words(text)
+    if not words:
+        return Verdict(False, "empty", 0.0)
+    if any(w in ABUSIVE_WORDS for w in words) or _directed_insult(words):
+        return Verdict(False, "abusive", 0.0)
+
+    stems = _content_stems(text)
+    if len(stems) < min_tokens:
+        return Verdict(True, "short", 1.0)
+
+    score = sum(1 for s in stems if s in vocabulary) / len(stems)
+    if score < min_score:
+        return Verdict(False, "off_topic", score)
+    return Verdict(True, "", score)
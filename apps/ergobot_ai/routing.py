@@ -0,0 +1,165 @@
+# apps/ergobot_ai/routing.py
+"""
+Ruteo de Ergobot a un "tier" de modelo por consulta.
+
+Los tiers van del mejor al más barato/rápido (settings.ERGOBOT_MODEL_TIERS).
+Se baja un escalón por cada señal de presión:
+    - concurrencia: streams activos en este proceso ≥ ERGOBOT_ROUTE_MAX_CONCURRENCY
+    - latencia: p95 móvil del TTFT ≥ ERGOBOT_ROUTE_P95_TTFT_MS
+    - prompt: tokens estimados de entrada ≥ ERGOBOT_ROUTE_MAX_PROMPT_TOKENS
+Si el módulo o la empresa superaron su presupuesto diario de tokens, se va
+directo al último tier y además se acorta la salida (ERGOBOT_BUDGET_MAX_OUTPUT_TOKENS).
+
+Las decisiones se cuentan en ROUTE_STATS y quedan en cada fila de ErgobotUsage
+(tier, motivos y streams activos al decidir).
+"""
+
+import logging
+from collections import deque
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Sum
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Contadores del proceso: "tier:<nombre>" y "reason:<motivo>"
+ROUTE_STATS: dict[str, int] = {}
+
+# Cuánto cacheamos la suma de tokens del día (evita un aggregate por consulta)
+BUDGET_CACHE_SECONDS = 60
+
+
+@dataclass
+class Tier:
+    name: str
+    model: str
+    max_tokens: int
+
+
+@dataclass
+class RouteDecision:
+    tier: Tier
+    max_tokens: int
+    reasons: list[str] = field(default_factory=list)
+    # Streams activos en el worker al decidir (queda en ErgobotUsage.active_streams)
+    active_streams: int = 0
+
+    @property
+    def model(self) -> str:
+        return self.tier.model
+
+
+class LoadTracker:
+    """Streams activos y TTFT recientes de este proceso (un event loop por worker)."""
+
+    def __init__(self, window: int = 200):
+        self.active = 0
+        self._ttfts: deque = deque(maxlen=window)
+
+    def started(self) -> None:
+        self.active += 1
+
+    def finished(self) -> None:
+        self.active = max(0, self.active - 1)
+
+    def observe_ttft(self, ttft_ms: float) -> None:
+        self._ttfts.append(ttft_ms)
+
+    def p95_ttft_ms(self) -> float:
+        from .usage import percentile
+        return percentile(list(self._ttfts), 95)
+
+
+tracker = LoadTracker()
+
+
+def configured_tiers() -> list[Tier]:
+    """Tiers de settings, con el modelo principal como fallback si no hay ninguno."""
+    raw = getattr(settings, "ERGOBOT_MODEL_TIERS", None) or []
+    default_max = getattr(settings, "ERGOBOT_MAX_OUTPUT_TOKENS", 800)
+    tiers = [
+        Tier(
+            name=t.get("name") or t["model"],
+            model=t["model"],
+            max_tokens=int(t.get("max_tokens") or default_max),
+        )
+        for t in raw if t.get("model")
+    ]
+    return tiers or [Tier("primary", settings.OPENAI_MODEL, default_max)]
+
+
+async def _tokens_used_today(scope: str, value) -> int:
+    """
+    Tokens (entrada + salida) consumidos hoy por un módulo (slug) o una empresa
+    (id de Company: el company_name de texto libre partiría el presupuesto). Cacheado.
+    """
+    from .models import ErgobotUsage
+
+    today = timezone.localdate()
+    key = f"ergobot:budget:{scope}:{value}:{today.isoformat()}"
+    used = await cache.aget(key)
+    if used is None:
+        qs = ErgobotUsage.objects.filter(created_at__date=today)
+        if scope == "module":
+            qs = qs.filter(module_slug=value)
+        else:
+            qs = qs.filter(user__company_id=value)
+        agg = await qs.aaggregate(total=Sum(F("input_tokens") + F("output_tokens")))
+        used = agg["total"] or 0
+        await cache.aset(key, used, BUDGET_CACHE_SECONDS)
+    return used
+
+
+def _count(key: str) -> None:
+    ROUTE_STATS[key] = ROUTE_STATS.get(key, 0) + 1
+
+
+async def choose_route(module_slug: str, company_id: int | None, prompt_tokens: int) -> RouteDecision:
+    """Elige tier y tope de salida para una consulta."""
+    tiers = configured_tiers()
+    reasons = []
+    active = tracker.active
+
+    if active >= getattr(settings, "ERGOBOT_ROUTE_MAX_CONCURRENCY", 40):
+        reasons.append("concurrency")
+    p95_limit = getattr(settings, "ERGOBOT_ROUTE_P95_TTFT_MS", 4000)
+    if p95_limit and tracker.p95_ttft_ms() >= p95_limit:
+        reasons.append("latency")
+    prompt_limit = getattr(settings, "ERGOBOT_ROUTE_MAX_PROMPT_TOKENS", 12000)
+    if prompt_limit and prompt_tokens >= prompt_limit:
+        reasons.append("prompt_size")
+
+    level = min(len(reasons), len(tiers) - 1)
+
+    over_budget = False
+    module_budget = getattr(settings, "ERGOBOT_DAILY_TOKENS_PER_MODULE", 0)
+    if module_budget and await _tokens_used_today("module", module_slug) >= module_budget:
+        reasons.append("module_budget")
+        over_budget = True
+    company_budget = getattr(settings, "ERGOBOT_DAILY_TOKENS_PER_COMPANY", 0)
+    if company_budget and company_id and await _tokens_used_today("company", company_id) >= company_budget:
+        reasons.append("company_budget")
+        over_budget = True
+
+    if over_budget:
+        level = len(tiers) - 1
+
+    tier = tiers[level]
+    max_tokens = tier.max_tokens
+    if over_budget:
+        max_tokens = min(max_tokens, getattr(settings, "ERGOBOT_BUDGET_MAX_OUTPUT_TOKENS", 300))
+
+    _count(f"tier:{tier.name}")
+    for reason in reasons:
+        _count(f"reason:{reason}")
+    if reasons:
+        logger.info(
+            "Ergobot ruteo: módulo=%s tier=%s max_tokens=%s motivos=%s activos=%s prompt~%s",
+            module_slug, tier.name, max_tokens, ",".join(reasons), active, prompt_tokens,
+            extra={"module_slug": module_slug, "tier": tier.name},
+        )
+
+    return RouteDecision(tier=tier, max_tokens=max_tokens, reasons=reasons, active_streams=active)
@@ -0,0 +1,234 @@
+# apps/ergobot_ai/usage.py
+"""
+Medición de uso de Ergobot.
+
+El stream nunca toca la base: record_usage() deja la fila en una cola en memoria
+y un hilo de fondo las inserta en lotes con bulk_create (cada N filas o cada
+T segundos, lo que ocurra primero). Si la cola se llena, se descartan filas
+antes que frenar a un usuario.
+
+El hilo arranca con la primera fila de cada proceso (se controla el pid): con
+un servidor que precarga la app y después hace fork (gunicorn --preload), cada
+worker arranca el suyo en vez de heredar uno que no corre. Después del fork el
+hijo empieza con cola y lock nuevos (os.register_at_fork).
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+def percentile(values: list[float], p: float) -> float:
+    """Percentil por rango más cercano (suficiente para reportes)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, round(p / 100 * len(ordered)) - 1))
+    return ordered[k]
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int) -> float:
+    """Costo en USD según la tabla ERGOBOT_PRICING {modelo: [entrada, salida]} por 1M tokens."""
+    pricing = getattr(settings, "ERGOBOT_PRICING", {}) or {}
+    prices = pricing.get(model)
+    if not prices:
+        # Permitimos claves sin la fecha del snapshot (ej: "gpt-4.1-mini")
+        prices = next((v for k, v in pricing.items() if model.startswith(k)), None)
+    if not prices:
+        return 0.0
+    price_in, price_out = prices
+    return (input_tokens * price_in + output_tokens * price_out) / 1_000_000
+
+
+class UsageRecorder:
+    """Cola + hilo escritor. Una instancia por proceso (ver `recorder`)."""
+
+    def __init__(self, batch_size: int = 50, flush_seconds: float = 2.0, max_queue: int = 10_000):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._thread_pid = None
+        self._lock = threading.Lock()
+        self.dropped = 0
+        atexit.register(self.flush)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def record(self, **fields) -> None:
+        """No bloquea nunca: si la cola está llena, la fila se pierde (y se cuenta)."""
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(fields)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Escribe lo pendiente y espera a que termine (comandos, apagado)."""
+        if self._thread is None or not self._thread.is_alive():
+            batch = []
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._write(batch)
+            return
+
+        # Le pedimos al hilo que vacíe su lote y nos avise
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return
+        done.wait(timeout)
+
+    def _ensure_thread(self) -> None:
+        """Un hilo por proceso: el del padre no sobrevive al fork."""
+        if self._thread_pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread_pid == os.getpid():
+                return
+            self._thread_pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="ergobot-usage", daemon=True)
+            self._thread.start()
+
+    def _after_fork(self) -> None:
+        # Lo encolado antes del fork lo escribe el padre; el lock pudo quedar tomado
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=self._queue.maxsize)
+        self._thread = None
+        self._thread_pid = None
+        self.dropped = 0
+
+    def _run(self) -> None:
+        batch = []
+        deadline = None
+        while True:
+            timeout = self.flush_seconds if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, threading.Event):
+                # Pedido de flush(): escribimos ya lo que haya
+                self._write(batch)
+                batch = []
+                deadline = None
+                item.set()
+                continue
+
+            if item is not None:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_seconds
+
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._write(batch)
+                batch = []
+                deadline = None
+
+    def _write(self, batch: list[dict]) -> None:
+        if not batch:
+            return
+        from .models import ErgobotUsage
+
+        close_old_connections()
+        try:
+            ErgobotUsage.objects.bulk_create([ErgobotUsage(**fields) for fields in batch])
+        except Exception:
+            # Las métricas nunca deben romper nada: registramos y seguimos
+            logger.exception("No se pudieron guardar %s filas de uso de Ergobot", len(batch))
+        finally:
+            close_old_connections()
+
+
+recorder = UsageRecorder(
+    batch_size=getattr(settings, "ERGOBOT_USAGE_BATCH_SIZE", 50),
+    flush_seconds=getattr(settings, "ERGOBOT_USAGE_FLUSH_SECONDS", 2.0),
+)
+
+
+def record_usage(**fields) -> None:
+    """Punto de entrada para las vistas: encola una fila de ErgobotUsage."""
+    if getattr(settings, "ERGOBOT_USAGE_ENABLED", True):
+        recorder.record(**fields)
+
+
+# Motivos de ruteo (routing.py) que indican un worker cargado
+LOAD_REASONS = {"concurrency", "latency"}
+
+
+def build_report(since, module_slug: str = "") -> list[dict]:
+    """
+    Agrega el uso por día y módulo: percentiles de latencia, tokens y costo.
+    Recorre las filas con .iterator() para no materializar todo el período.
+    """
+    from django.db.models.functions import TruncDate
+    from .models import ErgobotUsage
+
+    qs = ErgobotUsage.objects.filter(created_at__gte=since)
+    if module_slug:
+        qs = qs.filter(module_slug=module_slug)
+    rows = (
+        qs.annotate(day=TruncDate("created_at"))
+        .values_list("day", "module_slug", "model", "ttft_ms", "duration_ms",
+                     "input_tokens", "output_tokens", "outcome", "tier",
+                     "route_reasons", "queue_wait_ms")
+        .order_by()
+    )
+
+    groups: dict = {}
+    for (day, slug, model, ttft, duration, tokens_in, tokens_out, outcome, tier,
+         reasons, queue_wait) in rows.iterator(chunk_size=2000):
+        g = groups.setdefault((day, slug), {
+            "ttft": [], "duration": [], "queue_wait": [], "input_tokens": 0, "output_tokens": 0,
+            "cost_usd": 0.0, "outcomes": {}, "tiers": {}, "load_degraded": 0,
+        })
+        if ttft is not None:
+            g["ttft"].append(ttft)
+        if queue_wait is not None:
+            g["queue_wait"].append(queue_wait)
+        # Bajado de tier por carga del worker (no por tamaño del prompt ni presupuesto)
+        if set(reasons.split(",")) & LOAD_REASONS:
+            g["load_degraded"] += 1
+        g["duration"].append(duration)
+        g["input_tokens"] += tokens_in
+        g["output_tokens"] += tokens_out
+        g["cost_usd"] += estimate_cost(model, tokens_in, tokens_out)
+        g["outcomes"][outcome] = g["outcomes"].get(outcome, 0) + 1
+        if tier:
+            g["tiers"][tier] = g["tiers"].get(tier, 0) + 1
+
+    report = []
+    for (day, slug), g in sorted(groups.items(), key=lambda kv: (kv[0][0], kv[0][1]), reverse=True):
+        runs = len(g["duration"])
+        report.append({
+            "day": day.isoformat(),
+            "module": slug,
+            "runs": runs,
+            "ttft_p50_ms": percentile(g["ttft"], 50),
+            "ttft_p95_ms": percentile(g["ttft"], 95),
+            "duration_p50_ms": percentile(g["duration"], 50),
+            "duration_p95_ms": percentile(g["duration"], 95),
+            "queue_wait_p50_ms": percentile(g["queue_wait"], 50),
+            "queue_wait_p95_ms": percentile(g["queue_wait"], 95),
+            "load_degraded": g["load_degraded"],
+            "input_tokens": g["input_tokens"],
+            "output_tokens": g["output_tokens"],
+            "avg_input_tokens": g["input_tokens"] // runs,
+            "cost_usd": round(g["cost_usd"], 4),
+            "outcomes": g["outcomes"],
+            "tiers": g["tiers"],
+        })
+    return report
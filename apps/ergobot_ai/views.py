@@ -1,9 +1,30 @@
 # apps/ergobot_ai/views.py
+import asyncio
 import json
+import logging
+
+from django.conf import settings
 from django.http import StreamingHttpResponse, HttpRequest
 from django.contrib.auth.decorators import login_required
-from agents import Runner
-from .agents import ergobot_agent
+from apps.observability.tracing import NOOP, span, start_span
+from apps.training.models import TrainingModule
+from .agents import build_ergobot_agent, ergobot_instructions, load_sdk
+from .backends import get_backend
+from .models import ErgobotUsage
+from .prefilter import classify, module_vocabulary
+from .routing import choose_route, tracker
+from .usage import record_usage
+
+logger = logging.getLogger(__name__)
+
+# Marca de fin de stream que el "pump" deja en la cola
+_END = object()
+
+# Contadores del proceso: runs cortados y tokens de salida que nos ahorramos
+CANCEL_STATS = {"cancelled": 0, "timeouts": 0, "tokens_saved_est": 0}
+
+# Comentario SSE: el navegador lo ignora, pero mantiene viva la conexión en proxies
+_HEARTBEAT = b": ping\n\n"
 
 
 def _sse(payload: dict) -> bytes:
@@ -11,15 +32,68 @@ def _sse(payload: dict) -> bytes:
     return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode("utf-8")
 
 
+def _estimate_tokens(chars: int) -> int:
+    """Estimación grosera (~4 caracteres por token) para no depender de un tokenizer."""
+    return (chars + 3) // 4
+
+
+def _record_cancelled_run(reason: str, module_slug: str, emitted_chars: int) -> None:
+    """
+    Registra un run cortado antes de terminar.
+    El ahorro es una cota superior: lo que faltaba para llegar al máximo de salida.
+    """
+    max_tokens = getattr(settings, "ERGOBOT_MAX_OUTPUT_TOKENS", 800)
+    saved = max(0, max_tokens - _estimate_tokens(emitted_chars))
+
+    CANCEL_STATS["cancelled"] += 1
+    if reason == "timeout":
+        CANCEL_STATS["timeouts"] += 1
+    CANCEL_STATS["tokens_saved_est"] += saved
+
+    logger.info(
+        "Ergobot run cancelado (%s) módulo=%s emitidos~%s ahorrados~%s | total cancelados=%s tokens ahorrados~%s",
+        reason, module_slug, _estimate_tokens(emitted_chars), saved,
+        CANCEL_STATS["cancelled"], CANCEL_STATS["tokens_saved_est"],
+        extra={"module_slug": module_slug, "reason": reason, "tokens_saved_est": saved},
+    )
+
+
+async def _pump_deltas(result, queue: asyncio.Queue, usage: dict) -> None:
+    """
+    Consume los eventos del run y deja en la cola solo los fragmentos de texto.
+    Corre como tarea aparte para poder aplicar un timeout sin cortar el generador.
+    De paso acumula el usage que informa cada respuesta completa.
+    """
+    try:
+        async for ev in result.stream_events():
+            if ev.type != "raw_response_event":
+                continue
+            data_type = getattr(ev.data, "type", "")
+            # Filtramos los eventos de 'delta' (fragmentos de texto)
+            if data_type == "response.output_text.delta":
+                await queue.put(ev.data.delta)
+            elif data_type == "response.completed":
+                run_usage = getattr(getattr(ev.data, "response", None), "usage", None)
+                if run_usage is not None:
+                    usage["input_tokens"] += getattr(run_usage, "input_tokens", 0) or 0
+                    usage["output_tokens"] += getattr(run_usage, "output_tokens", 0) or 0
+                    usage["reported"] = True
+    except Exception as e:
+        await queue.put(e)
+    finally:
+        await queue.put(_END)
+
+
 @login_required  # Solo usuarios autenticados pueden usar el chat
 async def ergobot_stream(request: HttpRequest, module_slug: str):
+    received = asyncio.get_running_loop().time()
     q = (request.GET.get("q") or "").strip()
     thread_raw = request.GET.get("thread") or "[]"
 
     # Validación básica de consulta vacía
     if not q:
         resp = StreamingHttpResponse(
-            [_sse({"error": "empty"})], 
+            [_sse({"error": "empty"})],
             content_type="text/event-stream"
         )
         _set_streaming_headers(resp)
@@ -34,21 +108,190 @@ async def ergobot_stream(request: HttpRequest, module_slug: str):
         thread = []
 
     # ─────────────────────────────────────────────────────────────
-    # IMPORTANTE: Ahora usamos await porque ergobot_agent es async
+    # IMPORTANTE: ORM async (afirst) dentro de vistas async
     # ─────────────────────────────────────────────────────────────
-    agent = await ergobot_agent(module_slug)
+    module = await TrainingModule.objects.filter(slug=module_slug).afirst()
+    user = await request.auser()
+
+    # Pre-filtro local: lo claramente fuera de tema no llega al LLM (cero tokens)
+    if getattr(settings, "ERGOBOT_PREFILTER_ENABLED", True):
+        verdict = classify(q, module_vocabulary(module))
+        if not verdict.allowed:
+            logger.info(
+                "Ergobot pre-filtro: rechazo (%s, score=%.2f) módulo=%s", verdict.reason, verdict.score, module_slug,
+                extra={"module_slug": module_slug, "reason": verdict.reason},
+            )
+            record_usage(
+                user_id=getattr(user, "pk", None),
+                module_slug=module_slug[:50],
+                duration_ms=0,
+                outcome=ErgobotUsage.OUTCOME_REFUSED,
+            )
+            resp = StreamingHttpResponse(
+                [_sse({"delta": verdict.refusal}), _sse({"done": True})],
+                content_type="text/event-stream"
+            )
+            _set_streaming_headers(resp)
+            return resp
+
+    # Ruteo: tier de modelo y tope de salida según carga, tamaño del prompt y presupuesto
+    with span("ergobot.prompt", module=module_slug) as prompt_span:
+        instructions = ergobot_instructions(module)
+        prompt_tokens = _estimate_tokens(len(instructions) + len(q) + len(thread_raw))
+        prompt_span.set(prompt_tokens=prompt_tokens)
+    with span("ergobot.route") as route_span:
+        route = await choose_route(module_slug, getattr(user, "company_id", None), prompt_tokens)
+        route_span.set(tier=route.tier.name, reasons=",".join(route.reasons))
+
+    with span("ergobot.build_agent"):
+        await load_sdk()  # primer chat del worker: el import del SDK va a un hilo
+        agent = build_ergobot_agent(
+            module, model=route.model, max_tokens=route.max_tokens, instructions=instructions
+        )
     messages = thread + [{"role": "user", "content": q}]
 
     async def gen():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = started + getattr(settings, "ERGOBOT_MAX_STREAM_SECONDS", 90)
+        flush_after = getattr(settings, "ERGOBOT_SSE_FLUSH_MS", 50) / 1000
+        flush_bytes = getattr(settings, "ERGOBOT_SSE_FLUSH_BYTES", 512)
+        heartbeat = getattr(settings, "ERGOBOT_SSE_HEARTBEAT_SECONDS", 15)
+        emitted_chars = 0
+        first_delta_at = None
+        outcome = ErgobotUsage.OUTCOME_OK
+        usage = {"input_tokens": 0, "output_tokens": 0, "reported": False}
+
+        # Deltas acumulados que todavía no mandamos al cliente
+        pending: list[str] = []
+        pending_bytes = 0
+        pending_since = 0.0
+        last_sent = loop.time()
+
+        result = pump = None
+        llm_span = NOOP
+
         try:
-            # Ejecutamos el agente en modo streaming
-            result = Runner.run_streamed(agent, input=messages)
-            async for ev in result.stream_events():
-                # Filtramos los eventos de 'delta' (fragmentos de texto)
-                if ev.type == "raw_response_event" and getattr(ev.data, "type", "") == "response.output_text.delta":
-                    yield _sse({"delta": ev.data.delta})
-        except Exception as e:
-            yield _sse({"error": str(e)})
+            # Todo dentro del try: si run_streamed falla, el finally igual
+            # descuenta la carga (si no, el ruteo vería un run fantasma para siempre)
+            tracker.started()
+            # Span del LLM: de acá al final del stream (atraviesa los yields, por eso no es "with")
+            llm_span = start_span("ergobot.llm", model=route.model, tier=route.tier.name)
+
+            # Ejecutamos el agente en modo streaming (backend real o fake según settings)
+            result = get_backend().run_streamed(agent, messages)
+            queue: asyncio.Queue = asyncio.Queue()
+            pump = asyncio.create_task(_pump_deltas(result, queue, usage))
+
+            while True:
+                now = loop.time()
+                if now >= deadline:
+                    raise TimeoutError
+
+                # Esperamos hasta lo que venza primero: flush pendiente, heartbeat o deadline
+                # (heartbeat <= 0 = sin heartbeat: si no, el timeout sería 0 y el loop giraría)
+                if pending:
+                    wake_at = pending_since + flush_after
+                elif heartbeat > 0:
+                    wake_at = last_sent + heartbeat
+                else:
+                    wake_at = deadline
+                timeout = max(0.0, min(wake_at, deadline) - now)
+
+                try:
+                    # El timeout solo cubre la espera del modelo, nunca el envío al cliente
+                    item = await asyncio.wait_for(queue.get(), timeout=timeout)
+                except TimeoutError:
+                    if loop.time() >= deadline:
+                        raise
+                    if pending:
+                        yield _sse({"delta": "".join(pending)})
+                        pending, pending_bytes = [], 0
+                    else:
+                        yield _HEARTBEAT
+                    last_sent = loop.time()
+                    continue
+
+                if item is _END:
+                    break
+                if isinstance(item, Exception):
+                    outcome = ErgobotUsage.OUTCOME_ERROR
+                    if pending:
+                        yield _sse({"delta": "".join(pending)})
+                        pending, pending_bytes = [], 0
+                    yield _sse({"error": str(item)})
+                    break
+
+                if first_delta_at is None:
+                    first_delta_at = loop.time()
+                    tracker.observe_ttft((first_delta_at - started) * 1000)
+                    llm_span.set(ttft_ms=round((first_delta_at - started) * 1000, 1))
+                emitted_chars += len(item)
+                if not pending:
+                    pending_since = loop.time()
+                pending.append(item)
+                pending_bytes += len(item.encode("utf-8"))
+
+                # Sin coalescing (flush_after=0) o buffer lleno: mandamos ya
+                if flush_after <= 0 or pending_bytes >= flush_bytes:
+                    yield _sse({"delta": "".join(pending)})
+                    pending, pending_bytes = [], 0
+                    last_sent = loop.time()
+
+            if pending:
+                yield _sse({"delta": "".join(pending)})
+
+        except TimeoutError:
+            # Se agotó la duración máxima: cortamos el run upstream y avisamos
+            if result is not None:
+                result.cancel()
+            outcome = ErgobotUsage.OUTCOME_TIMEOUT
+            _record_cancelled_run("timeout", module_slug, emitted_chars)
+            if pending:
+                yield _sse({"delta": "".join(pending)})
+            yield _sse({"error": "timeout"})
+
+        except (asyncio.CancelledError, GeneratorExit):
+            # El cliente cerró la pestaña o navegó: Django cancela la respuesta.
+            # Cortamos el run para no seguir pagando tokens que nadie va a leer.
+            if result is not None:
+                result.cancel()
+            outcome = ErgobotUsage.OUTCOME_CANCELLED
+            _record_cancelled_run("disconnect", module_slug, emitted_chars)
+            raise
+
+        except Exception as exc:
+            # El backend no pudo arrancar el run (modelo inválido, cliente caído)
+            outcome = ErgobotUsage.OUTCOME_ERROR
+            logger.exception("Ergobot: no se pudo iniciar el run (módulo=%s)", module_slug,
+                             extra={"module_slug": module_slug})
+            yield _sse({"error": str(exc)})
+
+        finally:
+            if pump is not None:
+                pump.cancel()
+            tracker.finished()
+            llm_span.set(
+                outcome=outcome,
+                output_tokens=usage["output_tokens"] if usage["reported"] else _estimate_tokens(emitted_chars),
+            )
+            llm_span.end()
+            # Encolamos la medición (no bloquea: la escribe un hilo en lote)
+            record_usage(
+                user_id=getattr(user, "pk", None),
+                module_slug=module_slug[:50],
+                model=str(getattr(agent, "model", "") or "")[:100],
+                ttft_ms=int((first_delta_at - started) * 1000) if first_delta_at else None,
+                duration_ms=int((loop.time() - started) * 1000),
+                input_tokens=usage["input_tokens"] if usage["reported"] else prompt_tokens,
+                output_tokens=usage["output_tokens"] if usage["reported"] else _estimate_tokens(emitted_chars),
+                tokens_estimated=not usage["reported"],
+                outcome=outcome,
+                tier=route.tier.name[:32],
+                route_reasons=",".join(route.reasons)[:100],
+                queue_wait_ms=int((started - received) * 1000),
+                active_streams=route.active_streams,
+            )
 
         yield _sse({"done": True})
 
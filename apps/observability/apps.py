@@ -0,0 +1,21 @@
+from django.apps import AppConfig
+
+class ObservabilityConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "apps.observability"
+    verbose_name = "Observabilidad"
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from .collectors import ergobot_counters
+        from .metrics import registry
+        from .middleware import install_query_counter
+        from .tracing import install_query_tracer
+
+        # Conteo de queries por request (middleware.MetricsMiddleware)
+        connection_created.connect(install_query_counter, dispatch_uid="observability_query_counter")
+        # Un span por query en los requests que se trazan (tracing.py)
+        connection_created.connect(install_query_tracer, dispatch_uid="observability_query_tracer")
+        # Contadores propios de Ergobot (cancelaciones y ruteo) en /metrics
+        registry.register_collector(ergobot_counters)
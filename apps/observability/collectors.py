@@ -0,0 +1,26 @@
+# apps/observability/collectors.py
+"""Contadores que otras apps ya llevan en memoria, exportados en /metrics."""
+
+from .metrics import COUNTER
+
+
+def ergobot_counters():
+    """CANCEL_STATS (views) y ROUTE_STATS (routing) de Ergobot."""
+    from apps.ergobot_ai.routing import ROUTE_STATS
+    from apps.ergobot_ai.views import CANCEL_STATS
+
+    routes = {}
+    for key, value in ROUTE_STATS.items():
+        kind, _, name = key.partition(":")
+        routes[(kind, name)] = value
+
+    return [
+        ("ergocap_ergobot_runs_cancelled_total", "Runs de Ergobot cortados antes de terminar.", COUNTER,
+         [({}, CANCEL_STATS["cancelled"])]),
+        ("ergocap_ergobot_runs_timeout_total", "Runs de Ergobot cortados por ERGOBOT_MAX_STREAM_SECONDS.", COUNTER,
+         [({}, CANCEL_STATS["timeouts"])]),
+        ("ergocap_ergobot_tokens_saved_total", "Tokens de salida ahorrados por cortes (cota superior).", COUNTER,
+         [({}, CANCEL_STATS["tokens_saved_est"])]),
+        ("ergocap_ergobot_routes_total", "Decisiones de ruteo: tier elegido y motivos de bajar de tier.", COUNTER,
+         [({"kind": kind, "name": name}, value) for (kind, name), value in routes.items()]),
+    ]
@@ -0,0 +1,144 @@
+# apps/observability/logs.py
+"""
+Logging sin bloquear: QueueHandler en el request + QueueListener en un hilo.
+
+El request solo arma el LogRecord y lo deja en una cola en memoria (no formatea
+ni escribe). Un hilo por proceso formatea y escribe en stderr. Si la cola se
+llena (ráfaga con la consola trabada), se descartan registros antes que frenar
+un request o el event loop; se cuentan en `dropped`.
+
+Cada registro sale como una línea JSON con el contexto del request (request_id,
+user_id, trace_id) y los campos de `extra=` del llamador:
+
+    logger.info("Certificado creado %s", cert.id, extra={"module_slug": module.slug, "duration_ms": 12})
+
+Los mensajes usan %-style: el texto se interpola recién en el hilo escritor (y
+solo si el nivel pasa el filtro).
+"""
+
+import copy
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from django.utils.functional import empty
+
+from .tracing import current_span
+
+# request_id + request del request en curso (lo setea middleware.RequestIdMiddleware)
+current_request: ContextVar[tuple[str, object] | None] = ContextVar("current_request", default=None)
+
+# Atributos propios de LogRecord: todo lo demás vino en extra= y va al JSON
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+
+def _user_id(request):
+    """pk del usuario solo si ya se cargó (no dispara una query desde el log)."""
+    user = getattr(request, "user", None)
+    wrapped = getattr(user, "_wrapped", user)
+    if wrapped is None or wrapped is empty:
+        return None
+    return getattr(wrapped, "pk", None)
+
+
+class ContextFilter(logging.Filter):
+    """Copia el contexto del request al record (en el hilo del request, no en el escritor)."""
+
+    def filter(self, record):
+        ctx = current_request.get()
+        if ctx is not None:
+            request_id, request = ctx
+            if not hasattr(record, "request_id"):
+                record.request_id = request_id
+            if not hasattr(record, "user_id"):
+                record.user_id = _user_id(request)
+        if not hasattr(record, "trace_id"):
+            trace_id = current_span().trace_id
+            if trace_id:
+                record.trace_id = trace_id
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    """Una línea JSON por registro."""
+
+    def format(self, record):
+        data = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                data[key] = value
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data["exc"] = record.exc_text
+        if record.stack_info:
+            data["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class QueuedStreamHandler(QueueHandler):
+    """
+    Handler para LOGGING: encola y un QueueListener escribe en `stream` con el
+    formatter configurado. El hilo arranca con el primer registro de cada
+    proceso (así sobrevive al fork de gunicorn/uvicorn --workers).
+    """
+
+    def __init__(self, stream=None, maxsize: int = 10_000):
+        super().__init__(queue.Queue(maxsize=maxsize))
+        self.stream = stream
+        self.dropped = 0
+        self._listener = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.addFilter(ContextFilter())
+
+    def prepare(self, record):
+        # Sin format() acá: el mensaje se interpola en el hilo escritor. Solo se
+        # congela el traceback (el objeto no debe sobrevivir al request).
+        if record.exc_info:
+            record = copy.copy(record)  # los otros handlers siguen viendo el exc_info original
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        self._ensure_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_listener(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            target = logging.StreamHandler(self.stream or sys.stderr)
+            target.setFormatter(self.formatter or JSONFormatter())
+            self._listener = QueueListener(self.queue, target)
+            self._listener.start()
+            self._pid = os.getpid()
+
+    def flush(self):
+        """Espera a que el hilo escriba lo pendiente (logging.shutdown() al salir, tests)."""
+        listener = self._listener
+        if listener is not None and self._pid == os.getpid():
+            listener.stop()
+            self._pid = None
+
+    def close(self):
+        self.flush()
+        super().close()
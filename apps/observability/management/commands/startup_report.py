@@ -0,0 +1,102 @@
+# apps/observability/management/commands/startup_report.py
+"""
+Cuánto tarda en arrancar un worker y en qué se va el tiempo.
+
+Corre en un proceso nuevo (imports en frío) `python -X importtime` con lo mismo
+que hace un worker antes del primer request: django.setup() + carga del
+URLconf (que importa todas las vistas). Muestra el total y los imports más
+caros: por tiempo acumulado (el paquete con todo lo que arrastra) y por tiempo
+propio. Con --warmup mide además el warm-up de cada app (WARMUP_ON_START); lo
+que importa el warm-up queda fuera de la lista de imports.
+
+Uso:
+    python manage.py startup_report
+    python manage.py startup_report --limit 25
+    python manage.py startup_report --warmup
+"""
+
+import json
+import os
+import re
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# import time: self [us] | cumulative | imported package (indentado por nivel)
+IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)")
+
+CHILD = """
+import json, os, sys, time
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", {settings_module!r})
+start = time.perf_counter()
+import django
+django.setup()
+from django.urls import get_resolver
+get_resolver().url_patterns
+result = {{"startup_ms": (time.perf_counter() - start) * 1000}}
+if {warmup!r}:
+    from apps.observability.warmup import run_warmup
+    sys.stderr.write("STARTUP_REPORT_WARMUP\\n")
+    sys.stderr.flush()
+    start = time.perf_counter()
+    result["warmup"] = run_warmup()
+    result["warmup_ms"] = (time.perf_counter() - start) * 1000
+sys.stdout.write("\\nSTARTUP_REPORT " + json.dumps(result) + "\\n")
+"""
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int, int]]:
+    """[(módulo, nivel, self_us, cumulative_us)] en el orden de -X importtime."""
+    rows = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, len(indent) // 2, int(self_us), int(cumulative_us)))
+    return rows
+
+
+class Command(BaseCommand):
+    help = "Mide el arranque de un worker en frío (imports y, opcional, warm-up)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=15, help="Cantidad de imports a listar.")
+        parser.add_argument("--warmup", action="store_true", help="Medir también el warm-up de cada app.")
+
+    def handle(self, *args, **opts):
+        code = CHILD.format(settings_module=settings.SETTINGS_MODULE, warmup=opts["warmup"])
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            capture_output=True, text=True, cwd=settings.BASE_DIR, env=os.environ.copy(),
+        )
+        marker = next((l for l in proc.stdout.splitlines() if l.startswith("STARTUP_REPORT ")), None)
+        if proc.returncode != 0 or marker is None:
+            tail = "\n".join(l for l in proc.stderr.splitlines() if not l.startswith("import time:"))[-2000:]
+            raise CommandError(f"El proceso de medición falló:\n{tail}")
+        result = json.loads(marker.split(" ", 1)[1])
+        # Los imports que hace el warm-up no cuentan para el arranque
+        rows = parse_importtime(proc.stderr.split("STARTUP_REPORT_WARMUP", 1)[0])
+        limit = opts["limit"]
+
+        total_ms = sum(cum for _, level, _, cum in rows if level == 0) / 1000
+        self.stdout.write(self.style.MIGRATE_HEADING("Arranque en frío"))
+        self.stdout.write(f"  setup + URLconf: {result['startup_ms']:.0f} ms (imports: {total_ms:.0f} ms, {len(rows)} módulos)")
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\nImports de primer nivel por tiempo acumulado (top {limit})"))
+        top_level = sorted((r for r in rows if r[1] == 0), key=lambda r: r[3], reverse=True)[:limit]
+        for name, _, _, cum in top_level:
+            self.stdout.write(f"  {cum / 1000:>9.1f} ms  {name}")
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\nMódulos por tiempo propio (top {limit})"))
+        for name, _, self_us, _ in sorted(rows, key=lambda r: r[2], reverse=True)[:limit]:
+            self.stdout.write(f"  {self_us / 1000:>9.1f} ms  {name}")
+
+        if opts["warmup"]:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\nWarm-up: {result['warmup_ms']:.0f} ms"))
+            for label, ms in result["warmup"].items():
+                if ms is None:
+                    self.stdout.write(self.style.ERROR(f"  {'falló':>9}     {label}"))
+                else:
+                    self.stdout.write(f"  {ms:>9.1f} ms  {label}")
@@ -0,0 +1,76 @@
+# apps/observability/management/commands/trace_collector.py
+"""
+Colector OTLP/HTTP JSON mínimo para desarrollo (reemplaza a un collector real).
+
+Recibe POST /v1/traces, guarda los spans en un JSONL (mismo formato que
+TRACING_JSONL_PATH, así `trace_show` lo lee igual) y muestra una línea por
+span raíz recibido.
+
+Uso:
+    python manage.py trace_collector
+    python manage.py trace_collector --port 4318 --output /tmp/collector-traces.jsonl
+
+    # y en el servidor:
+    TRACING_OTLP_ENDPOINT=http://127.0.0.1:4318/v1/traces
+"""
+
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+from apps.observability.tracing import from_otlp
+
+
+class Command(BaseCommand):
+    help = "Colector OTLP/HTTP JSON local: recibe spans y los guarda en un JSONL."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=4318)
+        parser.add_argument("--output", default="collector-traces.jsonl", help="Archivo JSONL de salida.")
+
+    def handle(self, *args, **opts):
+        command = self
+        output = opts["output"]
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if self.path.rstrip("/") != "/v1/traces":
+                    self.send_error(404)
+                    return
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    records = from_otlp(json.loads(self.rfile.read(length) or b"{}"))
+                except (ValueError, KeyError, TypeError):
+                    self.send_error(400, "OTLP JSON inválido")
+                    return
+                with open(output, "a", encoding="utf-8") as fh:
+                    fh.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records))
+                ids = {r["span_id"] for r in records}
+                for r in records:
+                    if r["parent_id"] is None or r["parent_id"] not in ids:
+                        command.stdout.write(
+                            f"{r['trace_id']}  {r['duration_ms']:>9.1f} ms  {r['name']}"
+                            + (f"  ERROR {r['error']}" if r["error"] else "")
+                        )
+                body = b"{}"
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # una línea por trace alcanza
+
+        server = ThreadingHTTPServer((opts["host"], opts["port"]), Handler)
+        self.stdout.write(self.style.SUCCESS(
+            f"Colector escuchando en http://{opts['host']}:{opts['port']}/v1/traces → {output}"
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
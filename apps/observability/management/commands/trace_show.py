@@ -0,0 +1,98 @@
+# apps/observability/management/commands/trace_show.py
+"""
+Lee el JSONL de spans (TRACING_JSONL_PATH o el del colector) y muestra:
+    - sin --trace: los traces más lentos (raíz, duración, cantidad de spans y
+      en qué se fue el tiempo: suma por nombre de span hijo)
+    - con --trace: el árbol de un trace con duración y atributos de cada span
+
+Uso:
+    python manage.py trace_show
+    python manage.py trace_show --view quiz_submit --limit 5
+    python manage.py trace_show --trace 4bf92f3577b34da6a3ce929d0e0e4736
+    python manage.py trace_show --file collector-traces.jsonl
+"""
+
+import json
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Muestra los traces más lentos o el árbol de spans de un trace."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--file", help="JSONL de spans (default: TRACING_JSONL_PATH).")
+        parser.add_argument("--view", help="Solo traces cuya raíz sea esta vista (url_name).")
+        parser.add_argument("--trace", help="Trace id: muestra el árbol completo.")
+        parser.add_argument("--limit", type=int, default=10)
+
+    def handle(self, *args, **opts):
+        path = opts["file"] or getattr(settings, "TRACING_JSONL_PATH", "")
+        if not path:
+            raise CommandError("No hay archivo de spans (pasar --file o configurar TRACING_JSONL_PATH).")
+        traces = defaultdict(list)
+        try:
+            with open(path, encoding="utf-8") as fh:
+                for line in fh:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    traces[record["trace_id"]].append(record)
+        except FileNotFoundError:
+            raise CommandError(f"No existe {path} (¿hubo requests muestreados?).")
+
+        if opts["trace"]:
+            spans = traces.get(opts["trace"])
+            if not spans:
+                raise CommandError(f"Trace {opts['trace']} no encontrado en {path}.")
+            self._tree(spans)
+            return
+
+        rows = []
+        for trace_id, spans in traces.items():
+            root = _root(spans)
+            if opts["view"] and root["name"] != opts["view"]:
+                continue
+            rows.append((root["duration_ms"], trace_id, root, spans))
+        rows.sort(key=lambda row: row[0], reverse=True)
+
+        for duration, trace_id, root, spans in rows[:opts["limit"]]:
+            by_name = defaultdict(float)
+            for s in spans:
+                if s is not root and s["parent_id"] == root["span_id"]:
+                    by_name[s["name"]] += s["duration_ms"]
+            top = ", ".join(f"{name} {ms:.0f}ms" for name, ms in sorted(by_name.items(), key=lambda kv: -kv[1])[:4])
+            self.stdout.write(f"{trace_id}  {duration:>9.1f} ms  {root['name']:<24} spans={len(spans):<4} {top}")
+        if not rows:
+            self.stdout.write("Sin traces.")
+
+    def _tree(self, spans):
+        children = defaultdict(list)
+        for s in spans:
+            children[s["parent_id"]].append(s)
+        root = _root(spans)
+        t0 = root["start"]
+
+        def walk(s, depth):
+            offset = (s["start"] - t0) * 1000
+            attrs = " ".join(f"{k}={v}" for k, v in s["attributes"].items() if k != "statement")
+            line = f"{'  ' * depth}{s['name']:<{40 - 2 * depth}} +{offset:>8.1f} {s['duration_ms']:>9.1f} ms  {attrs}"
+            if "statement" in s["attributes"]:
+                line += f"  {s['attributes']['statement'][:80]}"
+            if s["error"]:
+                line = self.style.ERROR(f"{line}  ERROR {s['error']}")
+            self.stdout.write(line)
+            for child in sorted(children[s["span_id"]], key=lambda c: c["start"]):
+                walk(child, depth + 1)
+
+        walk(root, 0)
+
+
+def _root(spans: list[dict]) -> dict:
+    """La raíz local: el span cuyo padre no está en el trace (puede venir de traceparent)."""
+    ids = {s["span_id"] for s in spans}
+    roots = [s for s in spans if s["parent_id"] not in ids]
+    return max(roots, key=lambda s: s["duration_ms"])
@@ -0,0 +1,273 @@
+# apps/observability/metrics.py
+"""
+Métricas del proceso en formato Prometheus (sin dependencias externas).
+
+Cada proceso acumula contadores e histogramas en memoria (un lock, sin I/O por
+request). Para que /metrics muestre el total de todos los workers (gunicorn /
+uvicorn con varios procesos), un hilo de cada proceso vuelca su estado cada
+METRICS_FLUSH_SECONDS a un JSON propio en METRICS_DIR (un archivo por pid) y el
+endpoint suma todos los archivos + el estado vivo del proceso que atiende. El
+request (y bajo ASGI, el event loop) nunca escribe en disco.
+
+    - contadores: se suman
+    - histogramas: se suman bucket a bucket (los buckets son fijos en el código),
+      así Prometheus calcula el p99 con histogram_quantile()
+
+Los archivos de procesos muertos se conservan: si se borraran, los contadores
+"bajarían". Conviene vaciar METRICS_DIR al reiniciar el servicio (Prometheus lo
+toma como un reset de contadores). Con METRICS_DIR vacío cada proceso expone
+solo lo suyo.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+
+from django.conf import settings
+
+# Latencia: de los clicks del quiz (ms) al stream de Ergobot (hasta ERGOBOT_MAX_STREAM_SECONDS)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+COUNTER = "counter"
+HISTOGRAM = "histogram"
+
+
+@dataclass
+class Metric:
+    name: str
+    kind: str
+    help: str
+    labels: tuple[str, ...]
+    buckets: tuple = ()
+    # labels (tupla de valores) -> valor (contador) o [buckets..., sum, count] (histograma)
+    series: dict = field(default_factory=dict)
+
+
+class Registry:
+    """Métricas de este proceso. Todo lo que escribe pasa por un único lock."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: dict[str, Metric] = {}
+        self._collectors = []
+        self._flusher_pid = None
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def counter(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Metric:
+        return self._add(Metric(name, COUNTER, help, labels))
+
+    def histogram(self, name: str, help: str, labels: tuple[str, ...], buckets: tuple) -> Metric:
+        return self._add(Metric(name, HISTOGRAM, help, labels, buckets))
+
+    def _add(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def register_collector(self, collector) -> None:
+        """
+        `collector()` devuelve [(nombre, help, tipo, {labels(dict): valor})] y se
+        llama al volcar el estado (ej: los contadores propios de Ergobot).
+        """
+        self._collectors.append(collector)
+
+    # ─── escritura (en el request) ───────────────────────────────
+
+    def inc(self, metric: Metric, labels: tuple, amount: float = 1) -> None:
+        with self._lock:
+            metric.series[labels] = metric.series.get(labels, 0) + amount
+
+    def observe(self, metric: Metric, labels: tuple, value: float) -> None:
+        with self._lock:
+            self._observe(metric, labels, value)
+
+    def observe_many(self, observations) -> None:
+        """[(métrica, labels, valor)] bajo un solo lock (contadores: valor = incremento)."""
+        with self._lock:
+            for metric, labels, value in observations:
+                if metric.kind == COUNTER:
+                    metric.series[labels] = metric.series.get(labels, 0) + value
+                else:
+                    self._observe(metric, labels, value)
+        self._ensure_flusher()
+
+    @staticmethod
+    def _observe(metric: Metric, labels: tuple, value: float) -> None:
+        row = metric.series.get(labels)
+        if row is None:
+            row = metric.series[labels] = [0] * (len(metric.buckets) + 2)
+        for i, bound in enumerate(metric.buckets):
+            if value <= bound:
+                row[i] += 1
+        row[-2] += value
+        row[-1] += 1
+
+    # ─── volcado entre procesos ──────────────────────────────────
+
+    def snapshot(self) -> dict:
+        """Estado del proceso serializable a JSON (métricas + collectors)."""
+        with self._lock:
+            data = {
+                m.name: {
+                    "kind": m.kind, "help": m.help, "labels": list(m.labels),
+                    "buckets": list(m.buckets),
+                    "series": [[list(k), v if m.kind == COUNTER else list(v)] for k, v in m.series.items()],
+                }
+                for m in self._metrics.values()
+            }
+        for collector in self._collectors:
+            for name, help, kind, values in collector():
+                names = sorted({k for labels, _ in values for k in labels})
+                data[name] = {
+                    "kind": kind, "help": help, "labels": names, "buckets": [],
+                    "series": [[[str(labels.get(k, "")) for k in names], v] for labels, v in values],
+                }
+        return data
+
+    def _ensure_flusher(self) -> None:
+        """Hilo que vuelca el estado; arranca con la primera observación de cada proceso (fork)."""
+        if self._flusher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+            threading.Thread(target=self._flush_loop, name="metrics-flusher", daemon=True).start()
+
+    def _after_fork(self) -> None:
+        """
+        Hijo de un fork (gunicorn --preload): lock nuevo (el del padre pudo quedar
+        tomado), sin hilo (arranca con la primera observación) y sin las series
+        del padre, que ya están en el archivo del padre y se sumarían dos veces.
+        """
+        self._lock = threading.Lock()
+        self._flusher_pid = None
+        for metric in self._metrics.values():
+            metric.series.clear()
+
+    def _flush_loop(self) -> None:
+        interval = max(1, getattr(settings, "METRICS_FLUSH_SECONDS", 5))
+        while True:
+            time.sleep(interval)
+            self.flush()
+
+    def flush(self) -> None:
+        directory = _metrics_dir()
+        # Sin requests atendidos (manage.py, shell) no se deja archivo
+        if not directory or not any(m.series for m in self._metrics.values()):
+            return
+        try:
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"{os.getpid()}.json")
+            tmp = f"{path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(self.snapshot(), fh)
+            os.replace(tmp, path)  # quien lee nunca ve un archivo a medio escribir
+        except OSError:
+            pass  # sin disco no hay agregado, pero el request no se cae por eso
+
+
+def _metrics_dir() -> str:
+    return str(getattr(settings, "METRICS_DIR", "") or "")
+
+
+def _merge(total: dict, snapshot: dict) -> None:
+    for name, metric in snapshot.items():
+        dest = total.setdefault(name, {**metric, "series": {}})
+        if dest["buckets"] != metric["buckets"]:
+            continue  # archivo de una versión con otros buckets: no se puede sumar
+        for labels, value in metric["series"]:
+            key = tuple(labels)
+            if metric["kind"] == HISTOGRAM:
+                row = dest["series"].get(key)
+                dest["series"][key] = value if row is None else [a + b for a, b in zip(row, value)]
+            else:
+                dest["series"][key] = dest["series"].get(key, 0) + value
+
+
+def collect() -> dict:
+    """Estado de todos los procesos: archivos de METRICS_DIR + el vivo de este proceso."""
+    total: dict = {}
+    own = f"{os.getpid()}.json"
+    directory = _metrics_dir()
+    if directory and os.path.isdir(directory):
+        for filename in sorted(os.listdir(directory)):
+            if not filename.endswith(".json") or filename == own:
+                continue
+            try:
+                with open(os.path.join(directory, filename), encoding="utf-8") as fh:
+                    _merge(total, json.load(fh))
+            except (OSError, ValueError):
+                continue
+    _merge(total, registry.snapshot())
+    return total
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+INF_BUCKET = 'le="+Inf"'
+
+
+def render_text(data: dict) -> str:
+    """Formato de texto de Prometheus (version 0.0.4)."""
+    lines = []
+    for name in sorted(data):
+        metric = data[name]
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['kind']}")
+        names = metric["labels"]
+        for key in sorted(metric["series"]):
+            value = metric["series"][key]
+            if metric["kind"] != HISTOGRAM:
+                lines.append(f"{name}{_labels(names, key)} {_number(value)}")
+                continue
+            *buckets, total_sum, count = value
+            for bound, n in zip(metric["buckets"], buckets):
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{name}_bucket{_labels(names, key, le)} {n}")
+            lines.append(f"{name}_bucket{_labels(names, key, INF_BUCKET)} {count}")
+            lines.append(f"{name}_sum{_labels(names, key)} {_number(total_sum)}")
+            lines.append(f"{name}_count{_labels(names, key)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+atexit.register(registry.flush)
+
+# ─── Métricas HTTP (las llena middleware.MetricsMiddleware) ──────
+
+REQUESTS = registry.counter(
+    "ergocap_http_requests_total", "Requests por vista, método y status.", ("view", "method", "status"),
+)
+LATENCY = registry.histogram(
+    "ergocap_http_request_duration_seconds",
+    "Duración del request por vista (en streams, hasta el último byte).",
+    ("view",), LATENCY_BUCKETS,
+)
+RESPONSE_SIZE = registry.histogram(
+    "ergocap_http_response_size_bytes", "Bytes del cuerpo de la respuesta por vista.", ("view",), SIZE_BUCKETS,
+)
+DB_QUERIES = registry.histogram(
+    "ergocap_db_queries_per_request", "Queries a la base por request.", ("view",), QUERY_BUCKETS,
+)
+DB_SECONDS = registry.counter(
+    "ergocap_db_query_seconds_total", "Tiempo total en queries a la base por vista.", ("view",),
+)
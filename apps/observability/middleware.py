@@ -0,0 +1,307 @@
+# apps/observability/middleware.py
+"""
+RequestIdMiddleware: request_id para los logs (ver logs.py) y header X-Request-ID.
+MetricsMiddleware: latencia, status, bytes y queries por vista (url_name).
+TracingMiddleware: span raíz por request (ver tracing.py).
+
+Va primero en MIDDLEWARE para medir el request entero (sesión, auth, vista).
+Es sync y async: bajo ASGI no obliga a Django a pasar el request por un hilo.
+
+Las queries se cuentan con un execute_wrapper que se instala una vez por
+conexión (signal connection_created) y suma en el RequestStats del request
+actual, que viaja en un ContextVar: así llega también a las vistas sync que
+ASGI corre en otro hilo (sync_to_async copia el contexto).
+
+En respuestas streaming (SSE de Ergobot, exportes, PDFs) la duración y los
+bytes se registran al terminar el stream, no al devolver los headers (las
+queries que haga el generador después de devolver la respuesta no se cuentan).
+"""
+
+import re
+import time
+import uuid
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from . import tracing
+from .logs import current_request
+from .metrics import DB_QUERIES, DB_SECONDS, LATENCY, REQUESTS, RESPONSE_SIZE, registry
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+current_stats: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+def count_queries(execute, sql, params, many, context):
+    """execute_wrapper de cada conexión: no hace nada fuera de un request."""
+    stats = current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_seconds += time.perf_counter() - start
+
+
+def install_query_counter(sender, connection, **kwargs):
+    """Signal connection_created (la misma conexión puede reconectarse: una sola vez)."""
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+def _view_label(request) -> str:
+    """url_name de la vista; lo que no resuelve va agrupado (no abrir un label por URL)."""
+    match = getattr(request, "resolver_match", None)
+    if match is not None:
+        return match.view_name or "unnamed"
+    static_url = settings.STATIC_URL if settings.STATIC_URL.startswith("/") else f"/{settings.STATIC_URL}"
+    if request.path.startswith(static_url):
+        return "static"
+    return "unresolved"
+
+
+def _record(request, response, stats: RequestStats, start: float, size: int) -> None:
+    view = _view_label(request)
+    registry.observe_many([
+        (REQUESTS, (view, request.method, str(response.status_code)), 1),
+        (LATENCY, (view,), time.perf_counter() - start),
+        (RESPONSE_SIZE, (view,), size),
+        (DB_QUERIES, (view,), stats.queries),
+        (DB_SECONDS, (view,), stats.db_seconds),
+    ])
+
+
+def _bind(span, log_context):
+    return (
+        tracing.activate(span) if span is not None else None,
+        current_request.set(log_context) if log_context is not None else None,
+    )
+
+
+def _unbind(tokens):
+    span_token, log_token = tokens
+    if span_token is not None:
+        tracing.deactivate(span_token)
+    if log_token is not None:
+        try:
+            current_request.reset(log_token)
+        except ValueError:
+            pass  # generador cerrado desde otro contexto
+
+
+def wrap_stream(response, on_end=None, span=None, log_context=None) -> None:
+    """
+    Envuelve el streaming_content para llamar `on_end(bytes)` cuando se manda el
+    último chunk (o se corta). Con `span` / `log_context`, el generador de la
+    vista corre con ese span actual y ese contexto de logs.
+    """
+    content = response.streaming_content
+
+    if response.is_async:
+        async def wrapped():
+            size = 0
+            tokens = _bind(span, log_context)
+            try:
+                async for chunk in content:
+                    size += len(chunk)
+                    yield chunk
+            finally:
+                _unbind(tokens)
+                if on_end is not None:
+                    on_end(size)
+    else:
+        def wrapped():
+            size = 0
+            tokens = _bind(span, log_context)
+            try:
+                for chunk in content:
+                    size += len(chunk)
+                    yield chunk
+            finally:
+                _unbind(tokens)
+                if on_end is not None:
+                    on_end(size)
+
+    response.streaming_content = wrapped()
+
+
+REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
+class RequestIdMiddleware:
+    """
+    Va primero: asigna el request_id (el X-Request-ID del proxy si es válido, o
+    uno nuevo) y lo deja en el contexto de logs durante todo el request.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        ctx = self._context(request)
+        token = current_request.set(ctx)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_request.reset(token)
+        return self._finish(response, ctx)
+
+    async def __acall__(self, request):
+        ctx = self._context(request)
+        token = current_request.set(ctx)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_request.reset(token)
+        return self._finish(response, ctx)
+
+    @staticmethod
+    def _context(request):
+        request_id = request.headers.get("X-Request-ID", "")
+        if not REQUEST_ID_RE.match(request_id):
+            request_id = uuid.uuid4().hex
+        request.request_id = request_id
+        return request_id, request
+
+    @staticmethod
+    def _finish(response, ctx):
+        response["X-Request-ID"] = ctx[0]
+        if response.streaming:
+            wrap_stream(response, log_context=ctx)
+        return response
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        self._finish(request, response, stats, start)
+        return response
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        self._finish(request, response, stats, start)
+        return response
+
+    @staticmethod
+    def _finish(request, response, stats, start):
+        if response.streaming:
+            wrap_stream(response, lambda size: _record(request, response, stats, start, size))
+        else:
+            _record(request, response, stats, start, len(response.content))
+
+
+class TracingMiddleware:
+    """
+    Abre el span raíz del request (después de MetricsMiddleware). Si el request
+    se graba, la respuesta lleva X-Trace-Id para buscarlo con `trace_show`.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        root = self._start(request)
+        if root is tracing.NOOP:
+            return self.get_response(request)
+        token = tracing.activate(root)
+        try:
+            response = self.get_response(request)
+        except Exception as exc:
+            root.end(error=exc)
+            raise
+        finally:
+            tracing.deactivate(token)
+        return self._finish(request, response, root)
+
+    async def __acall__(self, request):
+        root = self._start(request)
+        if root is tracing.NOOP:
+            return await self.get_response(request)
+        token = tracing.activate(root)
+        try:
+            response = await self.get_response(request)
+        except Exception as exc:
+            root.end(error=exc)
+            raise
+        finally:
+            tracing.deactivate(token)
+        return self._finish(request, response, root)
+
+    @staticmethod
+    def _start(request):
+        return tracing.start_trace(
+            f"{request.method} {request.path}",
+            traceparent=request.headers.get("traceparent", ""),
+            method=request.method,
+            path=request.path,
+        )
+
+    @staticmethod
+    def _finish(request, response, root):
+        view = _view_label(request)
+        root.name = view
+        root.set(view=view, status=response.status_code)
+        if root.trace.sampled:
+            response["X-Trace-Id"] = root.trace_id
+
+        def end(size):
+            root.set(bytes=size)
+            slow_ms = tracing.slow_ms()
+            keep = root.trace.sampled or bool(slow_ms and root.duration_ms >= slow_ms)
+            root.end(export=keep)
+
+        if response.streaming:
+            wrap_stream(response, end, span=root)
+        else:
+            end(len(response.content))
+        return response
@@ -0,0 +1,397 @@
+# apps/observability/tracing.py
+"""
+Tracing liviano en proceso: spans con padre/hijo y atributos.
+
+    with span("storage.save", file=filename):
+        cert.pdf_file.save(...)
+
+    @traced("pdf.build_certificate")
+    def build_certificate_pdf(...): ...
+
+El span actual viaja en un ContextVar (llega a las vistas sync que ASGI corre en
+otro hilo y a los generadores de streaming). TracingMiddleware abre un span raíz
+por request; todo lo que se abra adentro (incluidas las queries del ORM) cuelga
+de él.
+
+Muestreo por request:
+    - TRACING_SAMPLE_RATE: fracción de requests que se exportan (0 = ninguno)
+    - header `traceparent` (W3C) con el flag sampled: se traza ese request y se
+      continúa el trace del que llama (ej: curl -H "traceparent: 00-<32 hex>-<16 hex>-01")
+    - TRACING_SLOW_MS > 0: se graban todos los requests y se exportan además los
+      que tarden más que eso (cuesta unos objetos por span en cada request)
+
+Un trace se exporta entero cuando termina su span raíz: a TRACING_JSONL_PATH
+(un span por línea, lo lee `manage.py trace_show`) y, si está configurado, a un
+colector OTLP/HTTP JSON (TRACING_OTLP_ENDPOINT; `manage.py trace_collector` hace
+de colector local). La exportación corre en un hilo aparte: el request no espera
+disco ni red.
+"""
+
+import atexit
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+import urllib.request
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+SERVICE_NAME = "ergocapacitacion"
+
+_current: ContextVar["Span | None"] = ContextVar("current_span", default=None)
+
+
+class _Trace:
+    """Spans terminados de un trace (se exportan juntos al cerrar la raíz)."""
+
+    __slots__ = ("trace_id", "sampled", "root_id", "spans", "done")
+
+    def __init__(self, trace_id: str, sampled: bool):
+        self.trace_id = trace_id
+        self.sampled = sampled
+        self.root_id = None  # raíz local (puede tener un padre remoto vía traceparent)
+        self.spans: list[dict] = []
+        self.done = False
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "attributes", "start", "_t0", "error", "ended")
+
+    def __init__(self, trace: _Trace, name: str, parent_id: str | None, attributes: dict):
+        self.trace = trace
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        self.error = None
+        self.ended = False
+
+    @property
+    def trace_id(self) -> str:
+        return self.trace.trace_id
+
+    def set(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+    def end(self, error: BaseException | None = None, export: bool | None = None) -> None:
+        """
+        Cierra el span. En la raíz, `export` decide si el trace sale (por defecto:
+        si fue muestreado); con TRACING_SLOW_MS el middleware lo decide por duración.
+        """
+        if self.ended:
+            return
+        self.ended = True
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"[:300]
+        duration_ms = (time.perf_counter() - self._t0) * 1000
+        record = {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": round(duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+        trace = self.trace
+        if trace.done:
+            # Terminó después de la raíz (ej: tarea en segundo plano): sale sola
+            if trace.sampled:
+                exporter.export([record])
+            return
+        trace.spans.append(record)
+        if self.span_id == trace.root_id:
+            trace.done = True
+            if export is not None:
+                trace.sampled = export
+            if trace.sampled:
+                exporter.export(trace.spans)
+
+    @property
+    def duration_ms(self) -> float:
+        return (time.perf_counter() - self._t0) * 1000
+
+
+class _NoopSpan:
+    """Lo que devuelve span() cuando el request no se graba: no cuesta nada."""
+
+    trace_id = None
+    span_id = None
+
+    def set(self, **attributes) -> None:
+        pass
+
+    def end(self, error=None, export=None) -> None:
+        pass
+
+
+NOOP = _NoopSpan()
+
+
+def _new_id(nbytes: int) -> str:
+    return os.urandom(nbytes).hex()
+
+
+def _sample_rate() -> float:
+    return float(getattr(settings, "TRACING_SAMPLE_RATE", 0.0) or 0.0)
+
+
+def slow_ms() -> int:
+    return int(getattr(settings, "TRACING_SLOW_MS", 0) or 0)
+
+
+def current_span():
+    return _current.get() or NOOP
+
+
+def start_span(name: str, **attributes):
+    """
+    Abre un span hijo del actual SIN volverlo el actual (para medir algo que
+    atraviesa yields, ej: el stream del LLM). Cerrarlo con `.end()`.
+    """
+    parent = _current.get()
+    if parent is None:
+        return NOOP
+    return Span(parent.trace, name, parent.span_id, attributes)
+
+
+def start_trace(name: str, traceparent: str = "", **attributes):
+    """
+    Abre un span raíz (un request, un comando). Se graba si entra en el muestreo,
+    si `traceparent` viene con el flag sampled o si TRACING_SLOW_MS está activo.
+    """
+    trace_id, parent_id, forced = None, None, False
+    match = TRACEPARENT_RE.match((traceparent or "").strip().lower())
+    if match:
+        trace_id, parent_id = match.group(1), match.group(2)
+        forced = bool(int(match.group(3), 16) & 1)
+
+    sampled = forced or random.random() < _sample_rate()
+    if not sampled and not slow_ms():
+        return NOOP
+    root = Span(_Trace(trace_id or _new_id(16), sampled), name, parent_id, attributes)
+    root.trace.root_id = root.span_id
+    return root
+
+
+def activate(span_obj):
+    """Vuelve actual a `span_obj`; devuelve el token para `deactivate`."""
+    return _current.set(span_obj if isinstance(span_obj, Span) else None)
+
+
+def deactivate(token) -> None:
+    try:
+        _current.reset(token)
+    except ValueError:
+        # Generador cerrado desde otro contexto (GC, cancelación): nada que restaurar
+        pass
+
+
+class span:
+    """Context manager: span hijo del actual (no-op si no hay trace grabándose)."""
+
+    __slots__ = ("name", "attributes", "_span", "_token")
+
+    def __init__(self, name: str, **attributes):
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self):
+        self._span = start_span(self.name, **self.attributes)
+        self._token = activate(self._span) if self._span is not NOOP else None
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._token is not None:
+            deactivate(self._token)
+        self._span.end(error=exc)
+        return False
+
+
+def traced(name: str | None = None, **attributes):
+    """Decorador: un span por llamada (funciones sync o async)."""
+
+    def decorator(func):
+        span_name = name or f"{func.__module__}.{func.__qualname__}"
+
+        if iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name, **attributes):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name, **attributes):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def trace_queries(execute, sql, params, many, context):
+    """execute_wrapper: un span por query cuando el request se está grabando."""
+    if _current.get() is None:
+        return execute(sql, params, many, context)
+    with span("db.query", statement=sql[:300], many=many, alias=context["connection"].alias):
+        return execute(sql, params, many, context)
+
+
+def install_query_tracer(sender, connection, **kwargs):
+    """Signal connection_created (una sola vez por conexión)."""
+    if trace_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(trace_queries)
+
+
+# ─── Exportación (hilo aparte) ───────────────────────────────────
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(records: list[dict]) -> dict:
+    """Spans en el formato JSON de OTLP/HTTP (ids en hex, tiempos en ns como string)."""
+    spans = []
+    for r in records:
+        start_ns = int(r["start"] * 1e9)
+        item = {
+            "traceId": r["trace_id"],
+            "spanId": r["span_id"],
+            "name": r["name"],
+            "kind": 2 if r["parent_id"] is None else 1,
+            "startTimeUnixNano": str(start_ns),
+            "endTimeUnixNano": str(start_ns + int(r["duration_ms"] * 1e6)),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in r["attributes"].items()],
+            "status": {"code": 2, "message": r["error"]} if r["error"] else {"code": 1},
+        }
+        if r["parent_id"]:
+            item["parentSpanId"] = r["parent_id"]
+        spans.append(item)
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+        "scopeSpans": [{"scope": {"name": "apps.observability"}, "spans": spans}],
+    }]}
+
+
+def from_otlp(payload: dict) -> list[dict]:
+    """Inverso de to_otlp (lo usa el colector local)."""
+    records = []
+    for resource in payload.get("resourceSpans", []):
+        for scope in resource.get("scopeSpans", []):
+            for s in scope.get("spans", []):
+                start_ns = int(s["startTimeUnixNano"])
+                attributes = {}
+                for attr in s.get("attributes", []):
+                    value = next(iter(attr["value"].values()), None)
+                    attributes[attr["key"]] = int(value) if "intValue" in attr["value"] else value
+                status = s.get("status") or {}
+                records.append({
+                    "trace_id": s["traceId"],
+                    "span_id": s["spanId"],
+                    "parent_id": s.get("parentSpanId") or None,
+                    "name": s["name"],
+                    "start": start_ns / 1e9,
+                    "duration_ms": round((int(s["endTimeUnixNano"]) - start_ns) / 1e6, 3),
+                    "attributes": attributes,
+                    "error": status.get("message") if status.get("code") == 2 else None,
+                })
+    return records
+
+
+class SpanExporter:
+    """Cola + hilo que escribe el JSONL y manda al colector OTLP. Uno por proceso."""
+
+    def __init__(self, max_queue: int = 10_000, flush_seconds: float = 1.0):
+        self.flush_seconds = flush_seconds
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def export(self, records: list[dict]) -> None:
+        """No bloquea: si la cola está llena, el trace se pierde (y se cuenta)."""
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(list(records))
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout: float = 5.0) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            return
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return
+        done.wait(timeout)
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def _run(self) -> None:
+        batch: list[dict] = []
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_seconds)
+            except queue.Empty:
+                item = None
+            if isinstance(item, threading.Event):
+                self._write(batch)
+                batch = []
+                item.set()
+                continue
+            if item:
+                batch.extend(item)
+                if len(batch) < 500:
+                    continue
+            self._write(batch)
+            batch = []
+
+    def _write(self, batch: list[dict]) -> None:
+        if not batch:
+            return
+        path = getattr(settings, "TRACING_JSONL_PATH", "")
+        if path:
+            try:
+                with open(path, "a", encoding="utf-8") as fh:
+                    fh.write("".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in batch))
+            except OSError:
+                logger.exception("No se pudieron escribir %s spans en %s", len(batch), path)
+        endpoint = getattr(settings, "TRACING_OTLP_ENDPOINT", "")
+        if endpoint:
+            body = json.dumps(to_otlp(batch), default=str).encode("utf-8")
+            req = urllib.request.Request(endpoint, data=body, headers={"Content-Type": "application/json"})
+            try:
+                urllib.request.urlopen(req, timeout=5).close()
+            except Exception as exc:
+                logger.warning("Colector OTLP no disponible (%s): %s", endpoint, exc)
+
+
+exporter = SpanExporter()
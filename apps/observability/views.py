@@ -0,0 +1,43 @@
+# apps/observability/views.py
+
+import ipaddress
+import secrets
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_GET
+
+from .metrics import collect, render_text
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _allowed(request) -> bool:
+    """
+    Staff logueado, o el scraper de Prometheus: con METRICS_TOKEN como Bearer
+    o desde una IP de METRICS_ALLOWED_IPS. Sin configurar, solo staff.
+    """
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated and user.is_staff:
+        return True
+    if settings.METRICS_TOKEN:
+        scheme, _, token = request.META.get("HTTP_AUTHORIZATION", "").partition(" ")
+        if scheme.lower() == "bearer" and secrets.compare_digest(token.strip(), settings.METRICS_TOKEN):
+            return True
+    if not settings.METRICS_ALLOWED_IPS:
+        return False
+    try:
+        addr = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    return any(addr in ipaddress.ip_network(net, strict=False) for net in settings.METRICS_ALLOWED_IPS)
+
+
+@require_GET
+@never_cache
+def metrics(request):
+    """/metrics en formato de texto de Prometheus, sumando todos los workers."""
+    if not _allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(render_text(collect()), content_type=PROMETHEUS_CONTENT_TYPE)
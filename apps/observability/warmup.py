@@ -0,0 +1,41 @@
+# apps/observability/warmup.py
+"""
+Warm-up al arrancar un worker (opt-in con WARMUP_ON_START).
+
+Llama a `warm_up()` de cada AppConfig que lo defina, después de cargar las apps
+y antes de que el worker atienda tráfico (config/asgi.py, config/wsgi.py). Cada
+app precarga lo que su primer request pagaría: imports pesados, fuentes,
+prompts, caches. Un error en una app se registra y no frena el arranque.
+
+No va en ready(): ahí Django desaconseja tocar la base, y ready() corre también
+en cada manage.py.
+"""
+
+import logging
+import time
+
+from django.apps import apps
+
+logger = logging.getLogger(__name__)
+
+
+def run_warmup() -> dict[str, float]:
+    """Ejecuta los warm-up y devuelve los ms de cada app (None si falló)."""
+    timings = {}
+    for config in apps.get_app_configs():
+        warm_up = getattr(config, "warm_up", None)
+        if warm_up is None:
+            continue
+        start = time.perf_counter()
+        try:
+            warm_up()
+        except Exception:
+            logger.exception("Warm-up de %s falló", config.label, extra={"app": config.label})
+            timings[config.label] = None
+            continue
+        timings[config.label] = round((time.perf_counter() - start) * 1000, 1)
+        logger.info(
+            "Warm-up de %s: %.1f ms", config.label, timings[config.label],
+            extra={"app": config.label, "duration_ms": timings[config.label]},
+        )
+    return timings
@@ -1,7 +1,13 @@
 # apps/quiz/admin.py
 
 from django.contrib import admin
+from django.http import JsonResponse
+from django.template.response import TemplateResponse
+from django.urls import path
+
+from apps.training.models import TrainingModule
 from .models import Question, Choice, QuizAttempt, QuizState
+from .stats import item_analysis
 
 class ChoiceInline(admin.TabularInline):
     model = Choice
@@ -9,15 +15,50 @@ class ChoiceInline(admin.TabularInline):
 
 @admin.register(Question)
 class QuestionAdmin(admin.ModelAdmin):
-    list_display = ("module", "order", "text_preview")
-    list_filter = ("module",)
+    list_display = ("module", "order", "topic", "difficulty", "text_preview")
+    list_filter = ("module", "topic", "difficulty")
     search_fields = ("text",)
     inlines = [ChoiceInline]  # Esto permite editar respuestas dentro de la pregunta
 
+    change_list_template = "admin/quiz/question/change_list.html"
+
     def text_preview(self, obj):
         return obj.text[:50] + "..." if len(obj.text) > 50 else obj.text
     text_preview.short_description = "Texto"
 
+    def get_urls(self):
+        custom = [
+            path(
+                "analysis/",
+                self.admin_site.admin_view(self.analysis_view),
+                name="quiz_question_analysis",
+            ),
+        ]
+        return custom + super().get_urls()
+
+    def analysis_view(self, request):
+        """
+        Análisis de ítems por módulo (dificultad, discriminación, distractores).
+        ?module=<slug>&format=json
+        """
+        modules = TrainingModule.objects.order_by("-is_active", "title")
+        slug = request.GET.get("module", "").strip()
+        module = modules.filter(slug=slug).first() if slug else modules.first()
+        rows = item_analysis(module) if module else []
+
+        if request.GET.get("format") == "json":
+            return JsonResponse({"module": module.slug if module else None, "questions": rows})
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Análisis de preguntas",
+            "modules": modules,
+            "module": module,
+            "rows": rows,
+        }
+        return TemplateResponse(request, "admin/quiz/question/analysis.html", context)
+
 @admin.register(QuizAttempt)
 class QuizAttemptAdmin(admin.ModelAdmin):
     list_display = ("user", "module", "score", "passed", "started_at", "submitted_at")
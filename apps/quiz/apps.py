@@ -3,3 +3,15 @@ from django.apps import AppConfig
 class QuizConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.quiz"
+
+    def ready(self):
+        # Invalidación del banco de preguntas cacheado (pool.py)
+        from . import signals  # noqa: F401
+
+    def warm_up(self):
+        # Banco de preguntas con las respuestas correctas de cada módulo activo (pool.py)
+        from apps.training.models import TrainingModule
+        from .pool import get_pool
+
+        for module_id in TrainingModule.objects.filter(is_active=True).values_list("pk", flat=True):
+            get_pool(module_id)
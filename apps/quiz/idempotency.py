@@ -0,0 +1,87 @@
+# apps/quiz/idempotency.py
+"""
+Claves de idempotencia para answer/submit.
+
+El navegador manda un header `Idempotency-Key` (un UUID por acción, el mismo en
+cada reintento). La primera request con esa clave se ejecuta y su respuesta
+queda en el cache QUIZ_IDEMPOTENCY_SECONDS; los reintentos reciben esa misma
+respuesta sin volver a calificar, generar el PDF ni mandar emails.
+
+    - clave nueva            → se toma un lock (cache.add) y corre la vista
+    - clave con respuesta    → se devuelve la guardada (header Idempotent-Replayed)
+    - clave en curso         → 409 + Retry-After: el cliente reintenta con la misma clave
+    - clave con otro body    → 422 (la clave se reusó para otra cosa)
+
+Las claves van por usuario y por vista. Los 409 (conflicto) y los 5xx no se
+guardan: se puede reintentar con la misma clave.
+"""
+
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse
+
+HEADER = "Idempotency-Key"
+LOCK_SECONDS = 60
+MAX_KEY_LENGTH = 100
+
+
+def _cache_key(request, scope: str, key: str) -> str:
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+    return f"quiz:idem:{scope}:{request.user.pk}:{digest}"
+
+
+def idempotent(scope: str):
+    """Decorador para vistas POST que devuelven JsonResponse."""
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key = (request.headers.get(HEADER) or "").strip()
+            if not key or not request.user.is_authenticated:
+                return view(request, *args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return JsonResponse({"error": "invalid_idempotency_key"}, status=400)
+
+            base = _cache_key(request, scope, key)
+            fingerprint = hashlib.sha256(request.body).hexdigest()
+
+            stored = cache.get(base)
+            if stored is not None:
+                return _replay(stored, fingerprint)
+
+            if not cache.add(f"{base}:lock", fingerprint, LOCK_SECONDS):
+                response = JsonResponse({"error": "request_in_progress"}, status=409)
+                response["Retry-After"] = "1"
+                return response
+
+            try:
+                response = view(request, *args, **kwargs)
+                if _cacheable(response):
+                    cache.set(base, {
+                        "fingerprint": fingerprint,
+                        "status": response.status_code,
+                        "content": response.content,
+                        "content_type": response.get("Content-Type", "application/json"),
+                    }, settings.QUIZ_IDEMPOTENCY_SECONDS)
+                return response
+            finally:
+                cache.delete(f"{base}:lock")
+
+        return wrapper
+
+    return decorator
+
+
+def _cacheable(response) -> bool:
+    return response.status_code < 500 and response.status_code != 409 and not getattr(response, "streaming", False)
+
+
+def _replay(stored: dict, fingerprint: str) -> HttpResponse:
+    if stored["fingerprint"] != fingerprint:
+        return JsonResponse({"error": "idempotency_key_reused"}, status=422)
+    response = HttpResponse(stored["content"], status=stored["status"], content_type=stored["content_type"])
+    response["Idempotent-Replayed"] = "true"
+    return response
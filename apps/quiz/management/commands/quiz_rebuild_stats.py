@@ -0,0 +1,97 @@
+# apps/quiz/management/commands/quiz_rebuild_stats.py
+"""
+Recalcula QuestionStats / ChoiceStats desde el historial de QuizAttempt.answers.
+
+Parte los intentos en rangos de id y los cuenta en paralelo (un hilo y una
+conexión por rango); al final reemplaza los contadores en una transacción.
+Las respuestas que entren mientras corre se pierden del recálculo: correrlo
+en un horario tranquilo (o volver a correrlo).
+
+Uso:
+    python manage.py quiz_rebuild_stats
+    python manage.py quiz_rebuild_stats --module ergonomia-oficina --workers 8 --chunk-size 10000
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Max, Min
+
+from apps.quiz.models import Choice, ChoiceStats, Question, QuestionStats, QuizAttempt
+from apps.quiz.stats import count_attempts, merge_counts
+from apps.training.models import TrainingModule
+
+
+class Command(BaseCommand):
+    help = "Recalcula los contadores del análisis de preguntas desde el historial de intentos (en paralelo)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--module", type=str, default="", help="Slug del módulo (default: todos).")
+        parser.add_argument("--workers", type=int, default=4, help="Hilos en paralelo (default: 4).")
+        parser.add_argument("--chunk-size", type=int, default=5000, help="Intentos por rango de id (default: 5000).")
+
+    def handle(self, *args, **opts):
+        module = None
+        if opts["module"]:
+            module = TrainingModule.objects.filter(slug=opts["module"]).first()
+            if not module:
+                raise CommandError(f"No existe el módulo '{opts['module']}'.")
+
+        choices = Choice.objects.all()
+        attempts = QuizAttempt.objects.all()
+        questions = Question.objects.all()
+        if module:
+            choices = choices.filter(question__module=module)
+            attempts = attempts.filter(module=module)
+            questions = questions.filter(module=module)
+        choice_map = {cid: (qid, ok) for cid, qid, ok in choices.values_list("id", "question_id", "is_correct")}
+
+        bounds = attempts.aggregate(lo=Min("id"), hi=Max("id"))
+        t0 = time.perf_counter()
+        ranges = []
+        if bounds["lo"] is not None:
+            step = max(1, opts["chunk_size"])
+            ranges = [(lo, lo + step) for lo in range(bounds["lo"], bounds["hi"] + 1, step)]
+
+        def work(bounds_range):
+            lo, hi = bounds_range
+            try:
+                rows = (
+                    attempts.filter(id__gte=lo, id__lt=hi)
+                    .values_list("answers", "passed", "submitted_at")
+                    .iterator(chunk_size=2000)
+                )
+                return count_attempts(rows, choice_map)
+            finally:
+                # Cada hilo abre su propia conexión: la cerramos al terminar
+                connection.close()
+
+        workers = 1 if connection.vendor == "sqlite" else max(1, opts["workers"])
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            totals = merge_counts(pool.map(work, ranges))
+        close_old_connections()
+
+        question_ids = list(questions.values_list("id", flat=True))
+        with transaction.atomic():
+            QuestionStats.objects.filter(question_id__in=question_ids).delete()
+            ChoiceStats.objects.filter(choice_id__in=list(choice_map)).delete()
+            QuestionStats.objects.bulk_create([
+                QuestionStats(question_id=qid, **{
+                    name: totals.get(name, {}).get(qid, 0)
+                    for name in ("answered_count", "correct_count", "answered_pass",
+                                 "correct_pass", "answered_fail", "correct_fail")
+                })
+                for qid in question_ids
+            ])
+            ChoiceStats.objects.bulk_create([
+                ChoiceStats(choice_id=cid, selected_count=totals.get("selected_count", {}).get(cid, 0))
+                for cid in choice_map
+            ])
+
+        answered = sum(totals.get("answered_count", {}).values())
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(ranges)} rangos con {workers} hilo(s): {answered:,} respuestas "
+            f"en {len(question_ids)} preguntas ({time.perf_counter() - t0:.1f}s)."
+        ))
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChoiceStats',
+            fields=[
+                ('choice', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='quiz.choice')),
+                ('selected_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Estadística de opción',
+                'verbose_name_plural': 'Estadísticas de opciones',
+            },
+        ),
+        migrations.CreateModel(
+            name='QuestionStats',
+            fields=[
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='quiz.question')),
+                ('answered_count', models.PositiveIntegerField(default=0)),
+                ('correct_count', models.PositiveIntegerField(default=0)),
+                ('answered_pass', models.PositiveIntegerField(default=0)),
+                ('correct_pass', models.PositiveIntegerField(default=0)),
+                ('answered_fail', models.PositiveIntegerField(default=0)),
+                ('correct_fail', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Estadística de pregunta',
+                'verbose_name_plural': 'Estadísticas de preguntas',
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0002_item_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='difficulty',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'Fácil'), (2, 'Media'), (3, 'Difícil')], default=2, verbose_name='Dificultad'),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='topic',
+            field=models.CharField(blank=True, default='', max_length=50, verbose_name='Tema'),
+        ),
+        migrations.AddField(
+            model_name='quizattempt',
+            name='selection',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
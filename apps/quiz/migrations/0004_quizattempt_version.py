@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0003_question_pool'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizattempt',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
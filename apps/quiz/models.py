@@ -6,11 +6,28 @@ from django.utils import timezone
 from apps.training.models import TrainingModule
 
 class Question(models.Model):
+    DIFFICULTY_EASY = 1
+    DIFFICULTY_MEDIUM = 2
+    DIFFICULTY_HARD = 3
+    DIFFICULTY_CHOICES = [
+        (DIFFICULTY_EASY, "Fácil"),
+        (DIFFICULTY_MEDIUM, "Media"),
+        (DIFFICULTY_HARD, "Difícil"),
+    ]
+
     module = models.ForeignKey(TrainingModule, on_delete=models.CASCADE, related_name="questions")
-    order = models.PositiveSmallIntegerField()  # 1..10
+    # Posición dentro del banco del módulo (1..N). Con selección "fixed" se
+    # toman las primeras 10; con "random"/"stratified" el banco puede ser mayor.
+    order = models.PositiveSmallIntegerField()
     text = models.TextField()
     explanation_correct = models.TextField(blank=True, default="")
 
+    # Para la selección estratificada (ver pool.py)
+    topic = models.CharField(max_length=50, blank=True, default="", verbose_name="Tema")
+    difficulty = models.PositiveSmallIntegerField(
+        choices=DIFFICULTY_CHOICES, default=DIFFICULTY_MEDIUM, verbose_name="Dificultad"
+    )
+
     class Meta:
         ordering = ["order"]
         constraints = [
@@ -56,6 +73,14 @@ class QuizAttempt(models.Model):
     # Estructura esperada: { "question_id_str": "choice_id_str" }
     answers = models.JSONField(default=dict, blank=True)
 
+    # Preguntas sorteadas al iniciar, en orden de aparición:
+    # [[question_id, choice_id, choice_id, ...], ...] (sin choice_ids = orden natural).
+    # Vacío en intentos anteriores al sorteo: se resuelven con las 10 primeras del banco.
+    selection = models.JSONField(default=list, blank=True)
+
+    # Control de concurrencia optimista: cada escritura desde answer/submit la incrementa
+    version = models.PositiveIntegerField(default=0)
+
     class Meta:
         ordering = ["-started_at"]
         indexes = [
@@ -66,6 +91,22 @@ class QuizAttempt(models.Model):
     def is_submitted(self) -> bool:
         return self.submitted_at is not None
 
+    def compare_and_set(self, only_open: bool = False, **fields) -> bool:
+        """
+        UPDATE ... WHERE version = <la que leímos>. Si otra request escribió antes
+        (doble click, reintento) no pisa nada y retorna False: el llamador relee y decide.
+        Con only_open exige además que el intento no esté enviado.
+        """
+        qs = QuizAttempt.objects.filter(pk=self.pk, version=self.version)
+        if only_open:
+            qs = qs.filter(submitted_at__isnull=True)
+        if not qs.update(version=models.F("version") + 1, **fields):
+            return False
+        self.version += 1
+        for name, value in fields.items():
+            setattr(self, name, value)
+        return True
+
     def __str__(self) -> str:
         return f"Attempt #{self.id} {self.user_id} {self.module.slug} ({self.score})"
 
@@ -93,4 +134,44 @@ class QuizState(models.Model):
         ]
 
     def __str__(self) -> str:
-        return f"State {self.user_id} {self.module.slug} used={self.attempts_used}"
\ No newline at end of file
+        return f"State {self.user_id} {self.module.slug} used={self.attempts_used}"
+
+# =============================================================================
+# Análisis de ítems: contadores que se actualizan en answer/submit (ver stats.py)
+# =============================================================================
+class QuestionStats(models.Model):
+    """
+    Contadores por pregunta, sin decodificar los JSON de QuizAttempt.answers.
+    - answered/correct: todas las respuestas registradas (1 por intento)
+    - *_pass / *_fail: solo intentos enviados, según aprobaron o no
+      (grupos alto/bajo para el índice de discriminación)
+    """
+    question = models.OneToOneField(Question, on_delete=models.CASCADE, primary_key=True, related_name="stats")
+
+    answered_count = models.PositiveIntegerField(default=0)
+    correct_count = models.PositiveIntegerField(default=0)
+
+    answered_pass = models.PositiveIntegerField(default=0)
+    correct_pass = models.PositiveIntegerField(default=0)
+    answered_fail = models.PositiveIntegerField(default=0)
+    correct_fail = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Estadística de pregunta"
+        verbose_name_plural = "Estadísticas de preguntas"
+
+    def __str__(self) -> str:
+        return f"Stats Q{self.question_id} {self.correct_count}/{self.answered_count}"
+
+
+class ChoiceStats(models.Model):
+    """Cuántas veces se eligió cada opción (detecta distractores demasiado atractivos)."""
+    choice = models.OneToOneField(Choice, on_delete=models.CASCADE, primary_key=True, related_name="stats")
+    selected_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Estadística de opción"
+        verbose_name_plural = "Estadísticas de opciones"
+
+    def __str__(self) -> str:
+        return f"Stats choice {self.choice_id}: {self.selected_count}"
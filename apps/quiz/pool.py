@@ -0,0 +1,204 @@
+# apps/quiz/pool.py
+"""
+Banco de preguntas cacheado y sorteo por intento.
+
+El banco de un módulo (preguntas + opciones + respuesta correcta) se arma una
+vez por proceso y por versión, y queda en memoria como tuplas inmutables. La
+versión es TrainingModule.pool_version, leído de la base en cada get_pool (una
+query por PK): guardar/borrar preguntas u opciones lo incrementa (signals.py),
+así todos los workers se enteran del cambio aunque el cache de Django sea
+local a cada proceso. updated_at no se toca: decide cuál es el módulo activo.
+
+Al iniciar un intento se sortean las preguntas (y opcionalmente el orden de las
+opciones) y se guardan en QuizAttempt.selection. Después, question/answer/submit
+resuelven todo por posición contra el banco en memoria: sin queries de
+Question/Choice por pregunta.
+"""
+
+import random
+import threading
+from dataclasses import dataclass
+
+from django.db.models import F
+
+from apps.training.models import TrainingModule
+from apps.training.services import invalidate_active_module
+
+
+@dataclass(frozen=True)
+class PoolChoice:
+    id: int
+    label: str
+    text: str
+    is_correct: bool
+    explanation_if_chosen: str
+
+
+@dataclass(frozen=True)
+class PoolQuestion:
+    id: int
+    order: int
+    text: str
+    explanation_correct: str
+    topic: str
+    difficulty: int
+    choices: tuple  # tuple[PoolChoice, ...] en orden de label
+
+    @property
+    def correct_choice_id(self):
+        return next((c.id for c in self.choices if c.is_correct), None)
+
+    def choice(self, choice_id: int):
+        return next((c for c in self.choices if c.id == choice_id), None)
+
+
+@dataclass(frozen=True)
+class Pool:
+    module_id: int
+    version: str
+    questions: dict   # {question_id: PoolQuestion}
+    ordered: tuple    # PoolQuestion por `order`
+
+    def __len__(self) -> int:
+        return len(self.ordered)
+
+
+# ─────────────────────────────────────────────────────────────
+# Versión + cache en memoria
+# ─────────────────────────────────────────────────────────────
+_POOLS: dict[int, Pool] = {}
+_LOCK = threading.Lock()
+
+
+def pool_version(module_id: int) -> str:
+    """
+    Versión actual del banco del módulo (TrainingModule.pool_version). Se lee
+    siempre de la base: el módulo que llega a get_pool puede venir de un cache.
+    """
+    version = TrainingModule.objects.filter(pk=module_id).values_list("pool_version", flat=True).first()
+    return str(version or 0)
+
+
+def bump_pool_version(module_id: int) -> None:
+    """
+    Cambió el banco: incrementa pool_version con F() (dos admins a la vez no se
+    pisan). update() no dispara los signals del módulo, así que el módulo activo
+    cacheado (que lleva el pool_version viejo) se borra a mano.
+    """
+    TrainingModule.objects.filter(pk=module_id).update(pool_version=F("pool_version") + 1)
+    invalidate_active_module()
+
+
+def _load(module_id: int, version: str) -> Pool:
+    from .models import Question
+
+    questions = (
+        Question.objects.filter(module_id=module_id)
+        .prefetch_related("choices")
+        .order_by("order")
+    )
+    ordered = tuple(
+        PoolQuestion(
+            id=q.id,
+            order=q.order,
+            text=q.text,
+            explanation_correct=q.explanation_correct,
+            topic=q.topic,
+            difficulty=q.difficulty,
+            choices=tuple(
+                PoolChoice(c.id, c.label, c.text, c.is_correct, c.explanation_if_chosen)
+                for c in q.choices.all()
+            ),
+        )
+        for q in questions
+    )
+    return Pool(module_id, version, {q.id: q for q in ordered}, ordered)
+
+
+def get_pool(module) -> Pool:
+    """Banco del módulo (objeto o id). Una lectura de cache; queries solo si cambió la versión."""
+    module_id = module.pk if isinstance(module, TrainingModule) else int(module)
+    version = pool_version(module_id)
+    pool = _POOLS.get(module_id)
+    if pool is None or pool.version != version:
+        with _LOCK:
+            pool = _POOLS.get(module_id)
+            if pool is None or pool.version != version:
+                pool = _load(module_id, version)
+                _POOLS[module_id] = pool
+    return pool
+
+
+# ─────────────────────────────────────────────────────────────
+# Sorteo
+# ─────────────────────────────────────────────────────────────
+def _stratified(pool: Pool, n: int, rng: random.Random) -> list:
+    """
+    Reparte n preguntas entre los estratos (tema, dificultad) en proporción a
+    su tamaño en el banco (restos mayores) y sortea dentro de cada estrato.
+    """
+    strata: dict = {}
+    for q in pool.ordered:
+        strata.setdefault((q.topic, q.difficulty), []).append(q)
+
+    total = len(pool.ordered)
+    quotas = {key: n * len(items) / total for key, items in strata.items()}
+    alloc = {key: int(quota) for key, quota in quotas.items()}
+    leftovers = sorted(strata, key=lambda k: (quotas[k] - alloc[k], rng.random()), reverse=True)
+    for key in leftovers[: n - sum(alloc.values())]:
+        alloc[key] += 1
+
+    picked = []
+    for key, items in strata.items():
+        picked.extend(rng.sample(items, min(alloc[key], len(items))))
+    rng.shuffle(picked)
+    return picked
+
+
+def draw_selection(pool: Pool, mode: str, shuffle_choices: bool, size: int, rng=None) -> list:
+    """Lista compacta para QuizAttempt.selection: [[question_id, *choice_ids], ...]."""
+    rng = rng or random.SystemRandom()
+    n = min(size, len(pool))
+
+    if mode == TrainingModule.SELECTION_RANDOM:
+        picked = rng.sample(list(pool.ordered), n)
+    elif mode == TrainingModule.SELECTION_STRATIFIED:
+        picked = _stratified(pool, n, rng)
+    else:
+        picked = list(pool.ordered[:n])
+
+    selection = []
+    for q in picked:
+        entry = [q.id]
+        if shuffle_choices:
+            ids = [c.id for c in q.choices]
+            rng.shuffle(ids)
+            entry.extend(ids)
+        selection.append(entry)
+    return selection
+
+
+def resolve_selection(attempt_selection, pool: Pool, size: int) -> list:
+    """
+    Selección efectiva del intento. Intentos viejos (sin selección) usan las
+    primeras `size` preguntas del banco, como antes del sorteo.
+    """
+    if attempt_selection:
+        return attempt_selection
+    return [[q.id] for q in pool.ordered[:size]]
+
+
+def position_of(selection: list, question_id: int):
+    """Posición 1-based de la pregunta en la selección (None si no está)."""
+    for i, entry in enumerate(selection, start=1):
+        if entry[0] == question_id:
+            return i
+    return None
+
+
+def ordered_choices(pool_question: PoolQuestion, entry: list) -> list:
+    """Opciones en el orden sorteado para el intento (o el natural)."""
+    if len(entry) <= 1:
+        return list(pool_question.choices)
+    by_id = {c.id: c for c in pool_question.choices}
+    return [by_id[cid] for cid in entry[1:] if cid in by_id]
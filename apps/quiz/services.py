@@ -2,7 +2,8 @@
 
 from datetime import timedelta
 from django.utils import timezone
-from .models import QuizState, Question, Choice
+from .models import QuizState
+from .pool import ordered_choices
 
 # Constantes de reglas de negocio
 TOTAL_QUESTIONS = 10
@@ -60,32 +61,45 @@ def ensure_state(user, module) -> QuizState:
     state, _ = QuizState.objects.get_or_create(user=user, module=module)
     return state
 
-def next_question_payload(module, order: int) -> dict:
+LABELS = "ABCDEFGH"
+
+
+def question_payload(pool, selection: list, position: int) -> dict | None:
     """
-    Prepara el JSON de la pregunta para el Frontend.
-    Oculta cuál es la correcta, solo envía IDs y Textos.
+    Prepara el JSON de la pregunta en la posición `position` (1-based) del intento.
+    Oculta cuál es la correcta, solo envía IDs y Textos. Sin queries: lee del banco cacheado.
     """
-    q = Question.objects.get(module=module, order=order)
+    entry = selection[position - 1]
+    q = pool.questions.get(entry[0])
+    if q is None:
+        return None
+    shuffled = len(entry) > 1
     return {
-        "order": q.order,
+        "order": position,
+        "total": len(selection),
+        # Versión del banco: el cliente la pone en la URL de question (cache del navegador)
+        "pool_version": pool.version,
         "question_id": q.id,
         "text": q.text,
-        # List comprehension para serializar las opciones
-        "choices": [{"choice_id": c.id, "label": c.label, "text": c.text} for c in q.choices.all()],
+        # Si las opciones se mezclaron, las letras siguen la posición en pantalla
+        "choices": [
+            {"choice_id": c.id, "label": LABELS[i] if shuffled else c.label, "text": c.text}
+            for i, c in enumerate(ordered_choices(q, entry))
+        ],
     }
 
-def check_answer(question_id: int, choice_id: int):
+def check_answer(pool_question, choice_id: int):
     """
-    Valida una respuesta individual (feedback inmediato).
-    Retorna: (es_correcta, titulo_feedback, texto_explicacion)
+    Valida una respuesta individual (feedback inmediato) contra el banco cacheado.
+    Retorna: (es_correcta, titulo_feedback, texto_explicacion) o None si la opción no es de la pregunta.
     """
-    # Usamos select_related para traer la pregunta en la misma consulta y optimizar
-    choice = Choice.objects.select_related("question").get(id=choice_id, question_id=question_id)
-    q = choice.question
-    
+    choice = pool_question.choice(choice_id)
+    if choice is None:
+        return None
+
     if choice.is_correct:
-        return True, "¡Así es!", (q.explanation_correct or "Respuesta correcta.")
-    
+        return True, "¡Así es!", (pool_question.explanation_correct or "Respuesta correcta.")
+
     return False, "No exactamente", (choice.explanation_if_chosen or "Respuesta incorrecta.")
 
 def apply_submit_rules(state: QuizState, score: int) -> bool:
@@ -120,4 +134,102 @@ def apply_submit_rules(state: QuizState, score: int) -> bool:
     state.save(update_fields=[
         "attempts_used", "lockout_until", "retake_available_at", "last_completed_at", "last_passed"
     ])
-    return False
\ No newline at end of file
+    return False
+
+# ─────────────────────────────────────────────────────────────
+# Estado inicial embebido en la página (quiz.js arranca sin pedir nada)
+# ─────────────────────────────────────────────────────────────
+def lock_status(state: QuizState | None, now=None) -> dict:
+    """
+    Lo mismo que decide is_locked(), pero sin escribir: se usa al renderizar
+    la página (el reset real lo hace start/retake con select_for_update).
+    """
+    now = now or timezone.now()
+    if state is None:
+        return {"locked": False, "lockout_until": None, "retake_available_at": None,
+                "attempts_left": MAX_ATTEMPTS, "last_passed": None}
+
+    lockout_until = state.lockout_until
+    retake_available_at = state.retake_available_at
+    attempts_used = state.attempts_used or 0
+    if lockout_until and now >= lockout_until:
+        lockout_until = retake_available_at = None
+        attempts_used = 0
+    elif state.last_passed and retake_available_at and now >= retake_available_at:
+        retake_available_at = None
+        attempts_used = 0
+
+    locked = bool(
+        (lockout_until and now < lockout_until)
+        or (state.last_passed and retake_available_at and now < retake_available_at)
+    )
+    return {
+        "locked": locked,
+        "lockout_until": lockout_until,
+        "retake_available_at": retake_available_at,
+        "attempts_left": max(0, MAX_ATTEMPTS - attempts_used),
+        "last_passed": state.last_passed,
+    }
+
+
+def quiz_boot(user, module) -> dict:
+    """
+    Datos para json_script en training_page.html: bloqueo, intentos que quedan,
+    certificado vigente y, si puede rendir, la primera pregunta ya sorteada con
+    la selección firmada (start la reusa, solo para el próximo intento). Una query.
+    """
+    from django.db.models import Count, OuterRef, Subquery
+    from django.db.models.functions import Coalesce
+    from django.urls import reverse
+
+    from apps.certificates.models import Certificate
+
+    from .models import QuizAttempt
+    from .pool import draw_selection, get_pool
+    from .tokens import MODE_DB, MODE_TOKEN, sign_selection, token_mode
+
+    now = timezone.now()
+    # El certificado implica estado (submit lo crea): alcanza con anotar sobre QuizState
+    certificates = (
+        Certificate.objects.filter(user=user, module=OuterRef("module"), valid_until__gt=now)
+        .order_by("-valid_until")
+    )
+    attempts = (
+        QuizAttempt.objects.filter(user=user, module=OuterRef("module"))
+        .order_by().values("module").annotate(n=Count("pk")).values("n")
+    )
+    state = (
+        QuizState.objects.filter(user=user, module=module)
+        .annotate(
+            certificate_id=Subquery(certificates.values("id")[:1]),
+            certificate_valid_until=Subquery(certificates.values("valid_until")[:1]),
+            attempt_count=Coalesce(Subquery(attempts), 0),
+        )
+        .first()
+    )
+
+    boot = {
+        "module": module.slug,
+        **lock_status(state, now),
+        "certificate": None,
+        "first": None,
+        "selection_token": None,
+        # Intentos ya creados: el token de selección es para el siguiente (y entra en el ETag)
+        "attempts_started": state.attempt_count if state is not None else 0,
+        # En modo token cada respuesta depende de la anterior: el service worker no las encola
+        "answer_mode": MODE_TOKEN if token_mode() else MODE_DB,
+    }
+    if state is not None and state.certificate_id:
+        boot["certificate"] = {
+            "id": str(state.certificate_id),
+            "download_url": reverse("certificate_download", args=[state.certificate_id]),
+            "valid_until": state.certificate_valid_until,
+        }
+
+    if not boot["locked"]:
+        pool = get_pool(module)
+        if len(pool):
+            selection = draw_selection(pool, module.question_selection, module.shuffle_choices, TOTAL_QUESTIONS)
+            boot["first"] = question_payload(pool, selection, 1)
+            boot["selection_token"] = sign_selection(user.pk, module.pk, boot["attempts_started"], selection)
+    return boot
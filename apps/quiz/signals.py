@@ -0,0 +1,26 @@
+# apps/quiz/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Choice, Question
+from .pool import bump_pool_version
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def invalidate_pool_on_question(sender, instance, **kwargs):
+    """Cambió el banco: los workers recargan en la próxima lectura (pool_version del módulo)."""
+    bump_pool_version(instance.module_id)
+
+
+@receiver(post_save, sender=Choice)
+@receiver(post_delete, sender=Choice)
+def invalidate_pool_on_choice(sender, instance, **kwargs):
+    if Choice.question.is_cached(instance):
+        module_id = instance.question.module_id
+    else:
+        # Borrado en cascada desde la pregunta: puede que ya no exista
+        module_id = Question.objects.filter(pk=instance.question_id).values_list("module_id", flat=True).first()
+    if module_id is not None:
+        bump_pool_version(module_id)
+
@@ -0,0 +1,196 @@
+# apps/quiz/stats.py
+"""
+Análisis de ítems del examen (qué preguntas son muy fáciles, muy difíciles o
+tienen un distractor que "engaña").
+
+Los contadores (QuestionStats / ChoiceStats) se actualizan con UPDATE ... F()+n
+en la misma transacción que answer/submit, así el reporte lee un puñado de
+filas por módulo en vez de decodificar todos los QuizAttempt.answers.
+El comando `quiz_rebuild_stats` los recalcula desde el historial.
+
+Índices:
+    dificultad p       = correctas / respondidas              (0 = nadie acierta, 1 = todos)
+    discriminación D   = p(aprobados) - p(desaprobados)       (bajo o negativo = no separa)
+"""
+
+from collections import Counter
+
+from django.db.models import F, Prefetch
+
+from .models import Choice, ChoiceStats, Question, QuestionStats
+
+# Umbrales de las alertas del reporte
+MIN_RESPONSES = 20       # debajo de esto no marcamos nada (muestra chica)
+EASY_P = 0.90
+HARD_P = 0.30
+LOW_DISCRIMINATION = 0.20
+
+
+def _bump(model, key_field: str, key, **deltas) -> None:
+    deltas = {name: n for name, n in deltas.items() if n}
+    if not deltas:
+        return
+    updates = {name: F(name) + n for name, n in deltas.items()}
+    qs = model.objects.filter(**{key_field: key})
+    if not qs.update(**updates):
+        model.objects.get_or_create(**{key_field: key})
+        qs.update(**updates)
+
+
+def record_answer_stats(question_id: int, choice_id: int, correct: bool,
+                        previous_choice_id=None, previous_correct=None) -> None:
+    """
+    Llamar en la transacción de answer. Si la pregunta ya tenía respuesta en
+    este intento (el trabajador cambió de opción) se mueve el conteo, no se suma.
+    `previous_correct` evita la query si el llamador ya lo sabe (banco cacheado).
+    """
+    if previous_choice_id is None:
+        _bump(QuestionStats, "question_id", question_id, answered_count=1, correct_count=int(correct))
+        _bump(ChoiceStats, "choice_id", choice_id, selected_count=1)
+        return
+
+    if int(previous_choice_id) == int(choice_id):
+        return
+    was_correct = previous_correct
+    if was_correct is None:
+        was_correct = Choice.objects.filter(pk=previous_choice_id).values_list("is_correct", flat=True).first() or False
+    _bump(QuestionStats, "question_id", question_id, correct_count=int(correct) - int(was_correct))
+    _bump(ChoiceStats, "choice_id", previous_choice_id, selected_count=-1)
+    _bump(ChoiceStats, "choice_id", choice_id, selected_count=1)
+
+
+def record_answers_batch(chosen: dict, correct_ids) -> None:
+    """
+    Modo token: las respuestas llegan todas juntas en submit. Solo cuenta la
+    respuesta final de cada pregunta (igual que quiz_rebuild_stats). 3-5 queries.
+    chosen = {question_id: choice_id}.
+    """
+    if not chosen:
+        return
+    QuestionStats.objects.bulk_create(
+        [QuestionStats(question_id=qid) for qid in chosen], ignore_conflicts=True,
+    )
+    ChoiceStats.objects.bulk_create(
+        [ChoiceStats(choice_id=cid) for cid in chosen.values()], ignore_conflicts=True,
+    )
+    QuestionStats.objects.filter(question_id__in=list(chosen)).update(answered_count=F("answered_count") + 1)
+    if correct_ids:
+        QuestionStats.objects.filter(question_id__in=correct_ids).update(correct_count=F("correct_count") + 1)
+    ChoiceStats.objects.filter(choice_id__in=list(chosen.values())).update(selected_count=F("selected_count") + 1)
+
+
+def record_submit_stats(passed: bool, answered_ids, correct_ids) -> None:
+    """Llamar en la transacción de submit: suma al grupo aprobados o desaprobados (2-3 queries)."""
+    if not answered_ids:
+        return
+    group = "pass" if passed else "fail"
+    # Intentos empezados antes de tener contadores pueden no tener fila todavía
+    QuestionStats.objects.bulk_create(
+        [QuestionStats(question_id=qid) for qid in answered_ids], ignore_conflicts=True,
+    )
+    QuestionStats.objects.filter(question_id__in=answered_ids).update(
+        **{f"answered_{group}": F(f"answered_{group}") + 1}
+    )
+    if correct_ids:
+        QuestionStats.objects.filter(question_id__in=correct_ids).update(
+            **{f"correct_{group}": F(f"correct_{group}") + 1}
+        )
+
+
+def _ratio(num: int, den: int):
+    return round(num / den, 3) if den else None
+
+
+def item_analysis(module) -> list[dict]:
+    """Una fila por pregunta del módulo con índices y alertas. Tres queries."""
+    questions = (
+        Question.objects.filter(module=module)
+        .select_related("stats")
+        .prefetch_related(Prefetch("choices", queryset=Choice.objects.select_related("stats")))
+        .order_by("order")
+    )
+
+    rows = []
+    for q in questions:
+        stats = getattr(q, "stats", None) or QuestionStats(question=q)
+        p = _ratio(stats.correct_count, stats.answered_count)
+        p_pass = _ratio(stats.correct_pass, stats.answered_pass)
+        p_fail = _ratio(stats.correct_fail, stats.answered_fail)
+        discrimination = round(p_pass - p_fail, 3) if p_pass is not None and p_fail is not None else None
+
+        choices = []
+        selected_total = 0
+        for c in q.choices.all():
+            selected = c.stats.selected_count if hasattr(c, "stats") else 0
+            selected_total += selected
+            choices.append({"label": c.label, "is_correct": c.is_correct, "selected": selected})
+        for c in choices:
+            c["share"] = _ratio(c["selected"], selected_total)
+
+        flags = []
+        if stats.answered_count >= MIN_RESPONSES:
+            if p is not None and p >= EASY_P:
+                flags.append("muy fácil")
+            if p is not None and p <= HARD_P:
+                flags.append("muy difícil")
+            if discrimination is not None and discrimination < LOW_DISCRIMINATION:
+                flags.append("discrimina poco")
+            correct_share = max((c["share"] or 0 for c in choices if c["is_correct"]), default=0)
+            for c in choices:
+                if not c["is_correct"] and (c["share"] or 0) >= correct_share:
+                    flags.append(f"distractor fuerte ({c['label']})")
+
+        rows.append({
+            "question_id": q.id,
+            "order": q.order,
+            "text": q.text,
+            "answered": stats.answered_count,
+            "difficulty": p,
+            "p_pass": p_pass,
+            "p_fail": p_fail,
+            "discrimination": discrimination,
+            "choices": choices,
+            "flags": flags,
+        })
+    return rows
+
+
+# ─────────────────────────────────────────────────────────────
+# Reconstrucción desde el historial (quiz_rebuild_stats)
+# ─────────────────────────────────────────────────────────────
+def count_attempts(rows, choice_map: dict) -> dict:
+    """
+    Cuenta un bloque de intentos: rows = (answers, passed, submitted_at).
+    choice_map = {choice_id: (question_id, is_correct)}. Devuelve Counters parciales
+    para sumar entre bloques (se corre en paralelo, sin tocar la base).
+    """
+    totals = {name: Counter() for name in (
+        "answered_count", "correct_count", "answered_pass", "correct_pass",
+        "answered_fail", "correct_fail", "selected_count",
+    )}
+    for answers, passed, submitted_at in rows:
+        for qid_str, choice_id in (answers or {}).items():
+            try:
+                choice_id = int(choice_id)
+            except (TypeError, ValueError):
+                continue
+            info = choice_map.get(choice_id)
+            if info is None or str(info[0]) != str(qid_str):
+                continue
+            qid, is_correct = info
+            totals["answered_count"][qid] += 1
+            totals["correct_count"][qid] += int(is_correct)
+            totals["selected_count"][choice_id] += 1
+            if submitted_at is not None:
+                group = "pass" if passed else "fail"
+                totals[f"answered_{group}"][qid] += 1
+                totals[f"correct_{group}"][qid] += int(is_correct)
+    return totals
+
+
+def merge_counts(parts) -> dict:
+    merged = {}
+    for part in parts:
+        for name, counter in part.items():
+            merged.setdefault(name, Counter()).update(counter)
+    return merged
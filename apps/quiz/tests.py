@@ -1,3 +1,200 @@
-from django.test import TestCase
+import json
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from apps.accounts.models import TraineeUser
+from apps.training.models import TrainingModule
+
+from . import pool as pool_module
+from .models import Choice, Question, QuizAttempt
+from .services import TOTAL_QUESTIONS
+from .tokens import (
+    InvalidAnswersToken, InvalidSelectionToken,
+    read_answers, read_selection, sign_answers, sign_selection,
+)
+
+
+def tamper(token: str) -> str:
+    """Cambia el último caracter de la firma."""
+    return token[:-1] + ("A" if token[-1] != "A" else "B")
+
+
+class QuizTestCase(TestCase):
+    """Módulo activo con 10 preguntas (A correcta, B incorrecta) y un trabajador logueado."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.module = TrainingModule.objects.create(slug="ergo-test", title="Ergo", youtube_id="abcdefgh", is_active=True)
+        cls.questions = []
+        for order in range(1, TOTAL_QUESTIONS + 1):
+            q = Question.objects.create(module=cls.module, order=order, text=f"Pregunta {order}")
+            q.right = Choice.objects.create(question=q, label="A", text="Bien", is_correct=True)
+            q.wrong = Choice.objects.create(question=q, label="B", text="Mal")
+            cls.questions.append(q)
+        cls.user = TraineeUser.objects.create_user(cuil="20123456789", email="ana@example.com")
+
+    def setUp(self):
+        # El banco y las claves de idempotencia viven en memoria del proceso
+        cache.clear()
+        pool_module._POOLS.clear()
+        self.client.force_login(self.user)
+
+    def url(self, name):
+        return reverse(name, kwargs={"module_slug": self.module.slug})
+
+    def post(self, name, payload, **headers):
+        return self.client.post(self.url(name), json.dumps(payload), content_type="application/json", headers=headers)
+
+    def start(self, selection_token=None):
+        response = self.post("quiz_start", {"selection_token": selection_token})
+        self.assertEqual(response.status_code, 200)
+        return QuizAttempt.objects.get(pk=response.json()["attempt_id"])
+
+    def answer(self, attempt, question, choice, **extra):
+        return self.post("quiz_answer", {
+            "attempt_id": attempt.pk, "question_id": question.pk, "choice_id": choice.pk, **extra,
+        })
+
+
+class CompareAndSetTests(QuizTestCase):
+    def test_answer_retries_after_a_concurrent_write(self):
+        attempt = self.start()
+        first, second = self.questions[:2]
+        original = QuizAttempt.compare_and_set
+        calls = []
+
+        def concurrent_write(instance, **fields):
+            # La primera vez, otra request guarda su respuesta justo antes (sube version)
+            if not calls:
+                QuizAttempt.objects.filter(pk=instance.pk).update(
+                    answers={str(second.pk): second.right.pk}, version=F("version") + 1,
+                )
+            calls.append(fields)
+            return original(instance, **fields)
+
+        with mock.patch.object(QuizAttempt, "compare_and_set", autospec=True, side_effect=concurrent_write):
+            response = self.answer(attempt, first, first.right)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(calls), 2)
+        attempt.refresh_from_db()
+        # No se pisó la respuesta de la otra request
+        self.assertEqual(attempt.answers, {str(second.pk): second.right.pk, str(first.pk): first.right.pk})
+        self.assertEqual(attempt.version, 2)
+
+    def test_answer_gives_up_with_409_when_every_retry_conflicts(self):
+        attempt = self.start()
+        with mock.patch.object(QuizAttempt, "compare_and_set", return_value=False):
+            response = self.answer(attempt, self.questions[0], self.questions[0].right)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json(), {"error": "conflict"})
+
+
+class IdempotencyTests(QuizTestCase):
+    def test_same_key_replays_the_stored_response(self):
+        attempt = self.start()
+        q = self.questions[0]
+        payload = {"attempt_id": attempt.pk, "question_id": q.pk, "choice_id": q.right.pk}
+
+        original = self.post("quiz_answer", payload, **{"Idempotency-Key": "k-1"})
+        replay = self.post("quiz_answer", payload, **{"Idempotency-Key": "k-1"})
+
+        self.assertEqual(original.status_code, 200)
+        self.assertEqual(replay.status_code, 200)
+        self.assertEqual(replay.content, original.content)
+        self.assertEqual(replay["Idempotent-Replayed"], "true")
+        self.assertFalse(original.has_header("Idempotent-Replayed"))
+        attempt.refresh_from_db()
+        # Solo la original escribió (y contó en el análisis de ítems)
+        self.assertEqual(attempt.version, 1)
+
+    def test_same_key_with_another_body_is_422(self):
+        attempt = self.start()
+        q = self.questions[0]
+        self.post("quiz_answer", {"attempt_id": attempt.pk, "question_id": q.pk, "choice_id": q.right.pk},
+                  **{"Idempotency-Key": "k-2"})
+        response = self.post("quiz_answer", {"attempt_id": attempt.pk, "question_id": q.pk, "choice_id": q.wrong.pk},
+                             **{"Idempotency-Key": "k-2"})
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(response.json(), {"error": "idempotency_key_reused"})
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.answers, {str(q.pk): q.right.pk})
+
+
+class AnswersTokenTests(QuizTestCase):
+    def test_tampered_token_is_rejected(self):
+        token = sign_answers(1, {"10": 20})
+        with self.assertRaises(InvalidAnswersToken):
+            read_answers(tamper(token), 1)
+
+    def test_token_of_another_attempt_is_rejected(self):
+        with self.assertRaises(InvalidAnswersToken):
+            read_answers(sign_answers(1, {"10": 20}), 2)
+
+    @override_settings(QUIZ_ANSWER_TOKEN_MAX_AGE=-1)
+    def test_expired_token_is_rejected(self):
+        with self.assertRaises(InvalidAnswersToken):
+            read_answers(sign_answers(1, {"10": 20}), 1)
+
+    @override_settings(QUIZ_ANSWER_MODE="token")
+    def test_views_answer_400_on_a_tampered_token(self):
+        attempt = self.start()
+        q = self.questions[0]
+        bad = tamper(self.answer(attempt, q, q.right).json()["answers_token"])
+
+        response = self.answer(attempt, self.questions[1], self.questions[1].right, answers_token=bad)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "invalid_answers_token"})
+        response = self.post("quiz_submit", {"attempt_id": attempt.pk, "answers_token": bad})
+        self.assertEqual(response.status_code, 400)
+        attempt.refresh_from_db()
+        self.assertIsNone(attempt.submitted_at)
+
+    @override_settings(QUIZ_ANSWER_MODE="token")
+    def test_token_mode_scores_on_submit_with_a_single_write(self):
+        attempt = self.start()
+        token = None
+        for i, q in enumerate(self.questions):
+            choice = q.right if i < 7 else q.wrong
+            response = self.answer(attempt, q, choice, answers_token=token)
+            self.assertEqual(response.status_code, 200)
+            token = response.json()["answers_token"]
+        attempt.refresh_from_db()
+        # answer no escribe: todo viaja en el token
+        self.assertEqual((attempt.version, attempt.answers), (0, {}))
+
+        response = self.post("quiz_submit", {"attempt_id": attempt.pk, "answers_token": token})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["score"], 7)
+        self.assertFalse(response.json()["passed"])
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.version, 1)
+        self.assertEqual(attempt.score, 7)
+        self.assertEqual(len(attempt.answers), TOTAL_QUESTIONS)
+
+
+class SelectionTokenTests(QuizTestCase):
+    def selection(self):
+        return [[q.pk] for q in reversed(self.questions)]
+
+    def test_tampered_or_foreign_token_is_rejected(self):
+        token = sign_selection(self.user.pk, self.module.pk, 0, self.selection())
+        with self.assertRaises(InvalidSelectionToken):
+            read_selection(tamper(token), self.user.pk, self.module.pk, 0)
+        with self.assertRaises(InvalidSelectionToken):
+            read_selection(token, self.user.pk + 1, self.module.pk, 0)
+
+    def test_expired_token_is_rejected(self):
+        token = sign_selection(self.user.pk, self.module.pk, 0, self.selection())
+        with mock.patch("apps.quiz.tokens.SELECTION_MAX_AGE", -1), self.assertRaises(InvalidSelectionToken):
+            read_selection(token, self.user.pk, self.module.pk, 0)
+
+    def test_start_uses_the_token_once(self):
+        token = sign_selection(self.user.pk, self.module.pk, 0, self.selection())
+        self.assertEqual(self.start(token).selection, self.selection())
+        # Mismo token para otro intento: se sortea de nuevo (fija = las primeras en orden)
+        self.assertEqual(self.start(token).selection, [[q.pk] for q in self.questions])
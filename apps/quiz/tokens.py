@@ -0,0 +1,81 @@
+# apps/quiz/tokens.py
+"""
+Token firmado con las respuestas del intento (QUIZ_ANSWER_MODE = "token").
+
+En vez de escribir QuizAttempt.answers en cada click, answer devuelve un token
+HMAC (django.core.signing, con SECRET_KEY) que acumula {question_id: choice_id}.
+El navegador lo reenvía en la siguiente respuesta y en submit, que lo verifica,
+califica y guarda todo en un único UPDATE.
+
+El token no es secreto (el trabajador ya sabe qué eligió), solo a prueba de
+manipulación: si se toca un byte, la firma no valida. Queda atado al intento
+y vence a las QUIZ_ANSWER_TOKEN_MAX_AGE segundos.
+
+También se firma la selección sorteada al renderizar la página (la primera
+pregunta viaja embebida); start la reusa en vez de sortear de nuevo. Ese token
+lleva cuántos intentos tenía el trabajador en el módulo al renderizar: sirve
+solo para el próximo intento, y una vez usado (o ya empezado otro) no vale más.
+Si no, se podría reusar una selección ya vista para rendir de nuevo.
+"""
+
+from django.conf import settings
+from django.core import signing
+
+SALT = "apps.quiz.answers"
+SELECTION_SALT = "apps.quiz.selection"
+# La página puede quedar abierta (o volver con un 304) un buen rato antes de iniciar
+SELECTION_MAX_AGE = 12 * 60 * 60
+
+MODE_DB = "db"
+MODE_TOKEN = "token"
+
+
+class InvalidAnswersToken(Exception):
+    pass
+
+
+class InvalidSelectionToken(Exception):
+    pass
+
+
+def token_mode() -> bool:
+    return getattr(settings, "QUIZ_ANSWER_MODE", MODE_DB) == MODE_TOKEN
+
+
+def sign_answers(attempt_id: int, answers: dict) -> str:
+    return signing.dumps({"a": attempt_id, "r": answers}, salt=SALT, compress=True)
+
+
+def read_answers(token: str | None, attempt_id: int) -> dict:
+    """Respuestas del token ({"<question_id>": choice_id}). Sin token: {}."""
+    if not token:
+        return {}
+    try:
+        data = signing.loads(token, salt=SALT, max_age=settings.QUIZ_ANSWER_TOKEN_MAX_AGE)
+    except signing.BadSignature as exc:  # incluye SignatureExpired
+        raise InvalidAnswersToken(str(exc)) from exc
+    if data.get("a") != attempt_id or not isinstance(data.get("r"), dict):
+        raise InvalidAnswersToken("El token no corresponde al intento.")
+    return data["r"]
+
+
+# ─────────────────────────────────────────────────────────────
+# Selección sorteada al renderizar la página (primera pregunta embebida)
+# ─────────────────────────────────────────────────────────────
+def sign_selection(user_id: int, module_id: int, attempts: int, selection: list) -> str:
+    """`attempts`: intentos del usuario en el módulo al sortear (el token es para el siguiente)."""
+    return signing.dumps(
+        {"u": user_id, "m": module_id, "n": attempts, "s": selection}, salt=SELECTION_SALT, compress=True
+    )
+
+
+def read_selection(token: str, user_id: int, module_id: int, attempts: int) -> list:
+    try:
+        data = signing.loads(token, salt=SELECTION_SALT, max_age=SELECTION_MAX_AGE)
+    except signing.BadSignature as exc:
+        raise InvalidSelectionToken(str(exc)) from exc
+    if data.get("u") != user_id or data.get("m") != module_id or not isinstance(data.get("s"), list):
+        raise InvalidSelectionToken("La selección no corresponde al usuario o al módulo.")
+    if data.get("n") != attempts:
+        raise InvalidSelectionToken("La selección ya se usó o es de un intento anterior.")
+    return data["s"]
@@ -5,26 +5,43 @@
 
 import json
 import logging
+import time
 
 from django.contrib.auth.decorators import login_required
 from django.core.files.base import ContentFile
-from django.db import transaction
-from django.http import JsonResponse
+from django.db import IntegrityError, transaction
+from django.http import Http404, JsonResponse
+from django.utils.cache import patch_cache_control
 from django.shortcuts import get_object_or_404, render
 from django.urls import reverse
 from django.utils import timezone
 from django.views.decorators.http import require_http_methods
 
+from apps.companies.services import record_certificate, record_submit
+from apps.observability.tracing import current_span, span, traced
 from apps.training.models import TrainingModule
-from .models import QuizAttempt, QuizState, Question
+from .idempotency import idempotent
+from .models import QuizAttempt, QuizState
+from .pool import draw_selection, get_pool, position_of, resolve_selection
 from .services import (
     TOTAL_QUESTIONS, PASS_SCORE,
     ensure_state, is_locked,
-    next_question_payload, check_answer, apply_submit_rules
+    question_payload, check_answer, apply_submit_rules
+)
+from .stats import record_answer_stats, record_answers_batch, record_submit_stats
+from .tokens import (
+    InvalidAnswersToken, InvalidSelectionToken,
+    read_answers, read_selection, sign_answers, token_mode,
 )
 
 logger = logging.getLogger(__name__)
 
+# Reintentos del compare-and-set cuando otra request escribió el intento antes
+CAS_RETRIES = 3
+
+# Una pregunta de un intento no cambia mientras no cambie el banco (?v=<versión>)
+QUESTION_MAX_AGE = 60 * 60
+
 
 def _json_body(request):
     """Helper para parsear el body JSON de la request."""
@@ -34,6 +51,43 @@ def _json_body(request):
         return {}
 
 
+def _signed_selection(token, user, module, pool):
+    """
+    Selección que ya se mostró en la página (quiz_boot), si sigue siendo válida:
+    firmada para este usuario y módulo, y para el intento que se está por crear
+    (un token ya usado, o de antes de otro intento, no sirve para rendir de nuevo).
+    """
+    if not token:
+        return None
+    attempts = QuizAttempt.objects.filter(user=user, module=module).count()
+    try:
+        selection = read_selection(token, user.pk, module.pk, attempts)
+    except InvalidSelectionToken:
+        return None
+    # El banco pudo cambiar desde que se renderizó la página
+    if not selection or any(entry[0] not in pool.questions for entry in selection):
+        return None
+    return selection
+
+
+def _new_attempt(user, module, selection_token=None):
+    """
+    Sortea las preguntas del intento (una vez, al iniciar) y lo crea.
+    Si viene la selección firmada de la página, se usa esa (el trabajador ya
+    está viendo la primera pregunta).
+    Retorna (attempt, payload de la primera pregunta) o (None, None) si el banco está vacío.
+    """
+    pool = get_pool(module)
+    if not len(pool):
+        return None, None
+    selection = (
+        _signed_selection(selection_token, user, module, pool)
+        or draw_selection(pool, module.question_selection, module.shuffle_choices, TOTAL_QUESTIONS)
+    )
+    attempt = QuizAttempt.objects.create(user=user, module=module, selection=selection)
+    return attempt, question_payload(pool, selection, 1)
+
+
 @login_required
 @require_http_methods(["POST"])
 def start(request, module_slug):
@@ -58,25 +112,58 @@ def start(request, module_slug):
                 "last_passed": state.last_passed,
             }, status=403)
 
-        attempt = QuizAttempt.objects.create(user=request.user, module=module)
+        attempt, first = _new_attempt(request.user, module, _json_body(request).get("selection_token"))
+        if attempt is None:
+            return JsonResponse({"error": "no_questions"}, status=409)
         return JsonResponse({
             "attempt_id": attempt.id,
-            "next": next_question_payload(module, 1),
+            "next": first,
         })
 
 
 @login_required
 @require_http_methods(["GET"])
 def question(request, module_slug, order: int):
-    """Obtiene una pregunta específica (para recargar o navegar)."""
+    """
+    Obtiene la pregunta en la posición `order` del intento (?attempt=<id>)
+    para recargar o navegar. Sin ?attempt se usa el orden fijo del banco.
+
+    Con ?attempt y ?v=<versión del banco> la respuesta es cacheable por el
+    navegador: la selección del intento es fija y la versión cambia si se edita
+    el banco (la URL nueva no pega en el cache viejo). quiz.js la precarga
+    mientras se muestra el feedback de la anterior.
+    """
     module = get_object_or_404(TrainingModule, slug=module_slug, is_active=True)
-    if order < 1 or order > TOTAL_QUESTIONS:
+    pool = get_pool(module)
+
+    attempt_selection = []
+    attempt_id = request.GET.get("attempt")
+    if attempt_id:
+        attempt = (
+            QuizAttempt.objects.filter(id=attempt_id, user=request.user, module=module)
+            .only("selection").first()
+        )
+        if attempt is None:
+            raise Http404
+        attempt_selection = attempt.selection
+    selection = resolve_selection(attempt_selection, pool, TOTAL_QUESTIONS)
+
+    if order < 1 or order > len(selection):
         return JsonResponse({"error": "order_out_of_range"}, status=400)
-    return JsonResponse(next_question_payload(module, order))
+    payload = question_payload(pool, selection, order)
+    if payload is None:
+        return JsonResponse({"error": "question_removed"}, status=410)
+    response = JsonResponse(payload)
+    if attempt_id and request.GET.get("v") == pool.version:
+        patch_cache_control(response, private=True, max_age=QUESTION_MAX_AGE)
+    else:
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
 
 
 @login_required
 @require_http_methods(["POST"])
+@idempotent("answer")
 def answer(request, module_slug):
     """
     Recibe la respuesta a UNA pregunta.
@@ -96,27 +183,69 @@ def answer(request, module_slug):
     if attempt.is_submitted:
         return JsonResponse({"error": "attempt_already_submitted"}, status=400)
 
-    q = get_object_or_404(Question, id=question_id, module=module)
-    correct, title, text = check_answer(q.id, int(choice_id))
-
-    # Persistimos la respuesta en el JSON del intento
-    answers = attempt.answers or {}
-    answers[str(q.id)] = int(choice_id)
-    attempt.answers = answers
-    attempt.save(update_fields=["answers"])
-
-    done = q.order >= TOTAL_QUESTIONS
-    return JsonResponse({
+    try:
+        question_id, choice_id = int(question_id), int(choice_id)
+    except (TypeError, ValueError):
+        return JsonResponse({"error": "invalid_fields"}, status=400)
+
+    # La pregunta tiene que ser del intento; todo se resuelve contra el banco cacheado
+    pool = get_pool(module)
+    selection = resolve_selection(attempt.selection, pool, TOTAL_QUESTIONS)
+    position = position_of(selection, question_id)
+    q = pool.questions.get(question_id) if position else None
+    if q is None:
+        raise Http404
+    checked = check_answer(q, choice_id)
+    if checked is None:
+        return JsonResponse({"error": "invalid_choice"}, status=400)
+    correct, title, text = checked
+
+    done = position >= len(selection)
+    payload = {
         "correct": correct,
         "feedback_title": title,
         "feedback_text": text,
-        "next_order": (q.order + 1),
+        "next_order": (position + 1),
         "done": done,
-    })
+        "pool_version": pool.version,
+    }
+
+    if token_mode():
+        # Sin escritura: la respuesta se acumula en el token firmado y se guarda en submit
+        try:
+            answers = read_answers(data.get("answers_token"), attempt.id)
+        except InvalidAnswersToken:
+            return JsonResponse({"error": "invalid_answers_token"}, status=400)
+        answers[str(q.id)] = choice_id
+        payload["answers_token"] = sign_answers(attempt.id, answers)
+        return JsonResponse(payload)
+
+    # Persistimos la respuesta en el JSON del intento. Compare-and-set sobre `version`:
+    # si otra respuesta del mismo intento escribió en el medio, releemos y reaplicamos
+    # en vez de pisarla (read-modify-write del JSON).
+    for _ in range(CAS_RETRIES):
+        answers = dict(attempt.answers or {})
+        previous_choice_id = answers.get(str(q.id))
+        previous = q.choice(int(previous_choice_id)) if previous_choice_id else None
+        answers[str(q.id)] = choice_id
+        with transaction.atomic():
+            if attempt.compare_and_set(only_open=True, answers=answers):
+                # Contadores del análisis de ítems (misma transacción que la respuesta)
+                record_answer_stats(
+                    q.id, choice_id, correct, previous_choice_id,
+                    previous_correct=previous.is_correct if previous else None,
+                )
+                return JsonResponse(payload)
+        attempt.refresh_from_db(fields=["answers", "submitted_at", "version"])
+        if attempt.is_submitted:
+            return JsonResponse({"error": "attempt_already_submitted"}, status=400)
+
+    return JsonResponse({"error": "conflict"}, status=409)
 
 
 @login_required
 @require_http_methods(["POST"])
+@idempotent("submit")
 def submit(request, module_slug):
     """
     Finaliza el examen. Calcula score y aplica reglas (bloqueo/aprobación).
@@ -134,52 +263,73 @@ def submit(request, module_slug):
     
     # Si ya se envió antes, solo devolvemos el resultado previo
     if attempt.is_submitted:
-        # Verificar si ya tiene certificado
-        certificate_payload = None
-        if hasattr(attempt, 'certificate') and attempt.certificate:
-            cert = attempt.certificate
-            certificate_payload = {
-                "id": str(cert.id),
-                "download_url": f"/certificados/{cert.id}/download/",
-            }
-        
-        return JsonResponse({
-            "score": attempt.score,
-            "passed": attempt.passed,
-            "result_url": reverse("quiz_result", kwargs={"module_slug": module.slug, "attempt_id": attempt.id}),
-            "certificate": certificate_payload,
-        })
+        return _submitted_response(module, attempt)
+
+    # Modo token: las respuestas llegan firmadas y se guardan acá, en el mismo UPDATE
+    answers = attempt.answers or {}
+    token_answers = {}
+    if token_mode():
+        try:
+            token_answers = read_answers(data.get("answers_token"), attempt.id)
+        except InvalidAnswersToken:
+            return JsonResponse({"error": "invalid_answers_token"}, status=400)
+        answers = {**answers, **token_answers}
 
     # Scoring: Calcular puntaje real desde la DB
-    questions = Question.objects.filter(module=module).prefetch_related("choices")
+    # Solo cuentan las preguntas sorteadas para este intento (banco cacheado, sin queries)
+    current_span().set(attempt_id=attempt.id, module=module.slug)
+    pool = get_pool(module)
     score = 0
-    answers = attempt.answers or {}
+    answered_ids, correct_ids = [], []
+    batch_chosen, batch_correct = {}, []
 
-    for q in questions:
-        chosen_id = answers.get(str(q.id))
-        if not chosen_id:
+    for entry in resolve_selection(attempt.selection, pool, TOTAL_QUESTIONS):
+        q = pool.questions.get(entry[0])
+        chosen_id = answers.get(str(entry[0]))
+        if q is None or not chosen_id or q.choice(int(chosen_id)) is None:
             continue
-        correct_choice = next((c for c in q.choices.all() if c.is_correct), None)
-        if correct_choice and int(chosen_id) == correct_choice.id:
+        answered_ids.append(q.id)
+        is_correct = int(chosen_id) == q.correct_choice_id
+        if is_correct:
             score += 1
+            correct_ids.append(q.id)
+        if str(q.id) in token_answers:
+            batch_chosen[q.id] = int(chosen_id)
+            if is_correct:
+                batch_correct.append(q.id)
 
     # Variable para el payload del certificado
     certificate_payload = None
 
-    with transaction.atomic():
+    with span("quiz.submit_rules", score=score), transaction.atomic():
         state = QuizState.objects.select_for_update().filter(user=request.user, module=module).first()
         if not state:
             state = ensure_state(request.user, module)
 
-        # Guardar attempt finalizado
-        attempt.score = score
-        attempt.passed = (score >= PASS_SCORE)
-        attempt.submitted_at = timezone.now()
-        attempt.save(update_fields=["score", "passed", "submitted_at"])
+        # Guardar attempt finalizado (compare-and-set: de dos submits concurrentes gana
+        # uno solo; el otro devuelve el resultado ya guardado, sin reglas ni certificado)
+        fields = {"score": score, "passed": score >= PASS_SCORE, "submitted_at": timezone.now()}
+        if token_answers:
+            fields["answers"] = answers
+        if not attempt.compare_and_set(only_open=True, **fields):
+            attempt.refresh_from_db()
+            if attempt.is_submitted:
+                return _submitted_response(module, attempt)
+            # Entró una respuesta después de calificar: que el cliente reintente
+            return JsonResponse({"error": "conflict"}, status=409)
+
+        # Antes de aplicar las reglas: ¿es la primera vez que termina el módulo?
+        first_completion = state.last_completed_at is None
 
         # Aplicar reglas de negocio al estado global del usuario
         passed = apply_submit_rules(state, score)
 
+        # Contadores de la empresa (tablero del empleador), en la misma transacción
+        record_submit(request.user, module, attempt, first_completion)
+        # Análisis de ítems: respuestas del token (en lote) y grupo aprobados/desaprobados
+        record_answers_batch(batch_chosen, batch_correct)
+        record_submit_stats(passed, answered_ids, correct_ids)
+
     # =====================================================
     # ✅ COMMIT 7 & 8: Generación de Certificado (si aprobó)
     # =====================================================
@@ -194,6 +344,26 @@ def submit(request, module_slug):
     })
 
 
+def _submitted_response(module, attempt) -> JsonResponse:
+    """Resultado de un intento ya enviado (reintentos y submits concurrentes)."""
+    # Verificar si ya tiene certificado
+    certificate_payload = None
+    if hasattr(attempt, 'certificate') and attempt.certificate:
+        cert = attempt.certificate
+        certificate_payload = {
+            "id": str(cert.id),
+            "download_url": f"/certificados/{cert.id}/download/",
+        }
+
+    return JsonResponse({
+        "score": attempt.score,
+        "passed": attempt.passed,
+        "result_url": reverse("quiz_result", kwargs={"module_slug": module.slug, "attempt_id": attempt.id}),
+        "certificate": certificate_payload,
+    })
+
+
+@traced("quiz.create_certificate")
 def _create_certificate(user, module, attempt) -> dict | None:
     """
     Crea el certificado, genera el PDF, lo guarda y envía por email.
@@ -209,15 +379,27 @@ def _create_certificate(user, module, attempt) -> dict | None:
     from apps.certificates.emailer import send_certificate_emails
     
     try:
-        # 1. Crear registro del certificado
-        cert = Certificate.objects.create(
-            user=user,
-            module=module,
-            attempt=attempt,
-        )
-        logger.info(f"Certificado creado: {cert.id} para {user.email}")
+        # 1. Crear registro del certificado (+ contador de la empresa, misma transacción)
+        try:
+            with transaction.atomic():
+                cert = Certificate.objects.create(
+                    user=user,
+                    module=module,
+                    attempt=attempt,
+                )
+                record_certificate(cert)
+        except IntegrityError:
+            # Otra request ya lo creó (OneToOne con el intento): no repetimos PDF ni email
+            cert = Certificate.objects.get(attempt=attempt)
+            return {
+                "id": str(cert.id),
+                "download_url": f"/certificados/{cert.id}/download/",
+            }
+        log_extra = {"cert_id": str(cert.id), "module_slug": module.slug}
+        logger.info("Certificado creado: %s para %s", cert.id, user.email, extra=log_extra)
         
         # 2. Generar PDF
+        started = time.perf_counter()
         pdf_bytes = build_certificate_pdf(
             user=user,
             module=module,
@@ -227,8 +409,15 @@ def _create_certificate(user, module, attempt) -> dict | None:
         
         # 3. Guardar PDF en FileField (usa UUID para evitar colisiones)
         filename = f"certificado_{cert.id}.pdf"
-        cert.pdf_file.save(filename, ContentFile(pdf_bytes), save=True)
-        logger.info(f"PDF guardado: {filename}")
+        pdf_done = time.perf_counter()
+        with span("storage.save", file=filename, bytes=len(pdf_bytes)):
+            cert.pdf_file.save(filename, ContentFile(pdf_bytes), save=True)
+        logger.info("PDF guardado: %s", filename, extra={
+            **log_extra,
+            "bytes": len(pdf_bytes),
+            "pdf_ms": round((pdf_done - started) * 1000, 1),
+            "storage_ms": round((time.perf_counter() - pdf_done) * 1000, 1),
+        })
         
         # 4. Enviar por email (non-blocking)
         try:
@@ -251,6 +440,7 @@ def _create_certificate(user, module, attempt) -> dict | None:
             company_name = getattr(user, 'company_name', None) or None
             # =========================================================================
             
+            email_started = time.perf_counter()
             send_certificate_emails(
                 to_email=user.email,
                 pdf_bytes=pdf_bytes,
@@ -269,20 +459,17 @@ def _create_certificate(user, module, attempt) -> dict | None:
             cert.email_sent = True
             cert.email_sent_at = timezone.now()
             cert.save(update_fields=["email_sent", "email_sent_at"])
-            logger.info(f"Email enviado a {user.email}")
-            
-            # =========================================================================
-            # ✅ COMMIT 8: Log adicional de envíos a empleador y responsable
-            # =========================================================================
-            if employer_email:
-                logger.info(f"Certificado también enviado a empleador: {employer_email}")
-            if safety_responsible_email:
-                logger.info(f"Certificado también enviado a resp. SySO: {safety_responsible_email}")
-            # =========================================================================
+            # Los envíos a empleador y resp. SySO ya los registra el emailer (uno por destinatario)
+            logger.info("Email enviado a %s", user.email, extra={
+                **log_extra,
+                "email_ms": round((time.perf_counter() - email_started) * 1000, 1),
+                "employer": bool(employer_email),
+                "syso": bool(safety_responsible_email),
+            })
             
         except Exception as email_error:
             # NO romper la aprobación, solo registrar el error
-            logger.error(f"Error enviando email: {email_error}")
+            logger.error("Error enviando email: %s", email_error, extra=log_extra)
             cert.email_error = str(email_error)[:500]
             cert.save(update_fields=["email_error"])
         
@@ -295,7 +482,7 @@ def _create_certificate(user, module, attempt) -> dict | None:
     except Exception as e:
         # Error crítico en la creación del certificado
         # Loguear pero NO romper la aprobación
-        logger.exception(f"Error creando certificado para {user.email}: {e}")
+        logger.exception("Error creando certificado para %s: %s", user.email, e, extra={"module_slug": module.slug})
         return None
 
 
@@ -350,9 +537,11 @@ def retake(request, module_slug):
 
         # Si llegamos aquí, el usuario está desbloqueado y puede rendir
         # No hacemos reset manual - reset_if_unlocked() ya lo hizo si era necesario
-        attempt = QuizAttempt.objects.create(user=request.user, module=module)
+        attempt, first = _new_attempt(request.user, module)
+        if attempt is None:
+            return JsonResponse({"error": "no_questions"}, status=409)
 
     return JsonResponse({
         "attempt_id": attempt.id,
-        "next": next_question_payload(module, 1),
+        "next": first,
     })
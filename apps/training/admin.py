@@ -6,7 +6,7 @@ from .models import TrainingModule
 @admin.register(TrainingModule)
 class TrainingModuleAdmin(admin.ModelAdmin):
     # Columnas que se verán en la lista principal
-    list_display = ("title", "slug", "is_active", "updated_at")
+    list_display = ("title", "slug", "is_active", "question_selection", "updated_at")
     
     # Filtro lateral para separar activos de borradores
     list_filter = ("is_active",)
@@ -3,3 +3,18 @@ from django.apps import AppConfig
 class TrainingConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.training"
+
+    def ready(self):
+        # Invalidación del módulo activo cacheado (services.py)
+        from . import signals  # noqa: F401
+
+    def warm_up(self):
+        # Módulo activo, hashes de los estáticos y miniaturas de los videos (services.py)
+        from .models import TrainingModule
+        from .services import asset_version, fetch_thumbnail, get_active_module, precache_urls
+
+        get_active_module()
+        asset_version()
+        precache_urls()
+        for youtube_id in TrainingModule.objects.filter(is_active=True).values_list("youtube_id", flat=True):
+            fetch_thumbnail(youtube_id)
@@ -0,0 +1,162 @@
+# apps/training/management/commands/training_page_weight.py
+"""
+Mide el peso de la página de capacitación: bytes del HTML + recursos que el
+navegador pide al cargarla (CSS, JS, imágenes, iframes), separando lo que
+bloquea el render de lo diferido y lo propio de lo de terceros.
+
+Renderiza la página con el test Client (sin servidor) logueado como un
+trabajador y pide los estáticos locales igual que el navegador (con
+Accept-Encoding, así se mide lo transferido por WhiteNoise). Los recursos de
+terceros solo se listan; con --external se descargan (ojo: un iframe de YouTube
+después baja su propio player, que no se cuenta acá).
+
+Uso:
+    python manage.py training_page_weight
+    python manage.py training_page_weight --cuil 20333333334 --module ergonomia-oficina
+    python manage.py training_page_weight --external
+"""
+
+import urllib.request
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+
+@dataclass
+class Resource:
+    kind: str
+    url: str
+    eager: bool
+    blocking: bool = False
+    size: int | None = None
+
+
+class _ResourceParser(HTMLParser):
+    """Junta los recursos que pide el HTML (no ejecuta JS)."""
+
+    def __init__(self):
+        super().__init__()
+        self.resources: list[Resource] = []
+
+    def handle_starttag(self, tag, attrs):
+        a = dict(attrs)
+        if tag == "script" and a.get("src"):
+            deferred = "defer" in a or "async" in a or a.get("type") == "module"
+            self.resources.append(Resource("js", a["src"], eager=True, blocking=not deferred))
+        elif tag == "link" and "stylesheet" in (a.get("rel") or "").split() and a.get("href"):
+            self.resources.append(Resource("css", a["href"], eager=True, blocking=True))
+        elif tag == "img" and a.get("src"):
+            self.resources.append(Resource("img", a["src"], eager=a.get("loading") != "lazy"))
+        elif tag == "iframe" and a.get("src"):
+            self.resources.append(Resource("iframe", a["src"], eager=a.get("loading") != "lazy"))
+
+
+def _is_local(url: str) -> bool:
+    return not urlsplit(url).netloc
+
+
+def _body(response) -> bytes:
+    if getattr(response, "streaming", False):
+        return b"".join(response.streaming_content)
+    return response.content
+
+
+class Command(BaseCommand):
+    help = "Suma los bytes que descarga la página de capacitación y lista lo que bloquea el render."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--cuil", help="Trabajador con el que se renderiza (default: el primero).")
+        parser.add_argument("--module", help="Slug del módulo (default: el activo).")
+        parser.add_argument("--external", action="store_true", help="Descargar también los recursos de terceros.")
+
+    def handle(self, *args, **opts):
+        User = get_user_model()
+        users = User.objects.order_by("pk")
+        user = users.filter(cuil=opts["cuil"]).first() if opts["cuil"] else users.first()
+        if user is None:
+            raise CommandError("No hay usuarios para renderizar la página (crear uno o pasar --cuil).")
+
+        url = reverse("training_module", args=[opts["module"]]) if opts["module"] else reverse("training_home")
+        client = Client(HTTP_ACCEPT_ENCODING="gzip, br")
+        client.force_login(user, backend=settings.AUTHENTICATION_BACKENDS[0])
+
+        with override_settings(ALLOWED_HOSTS=["*"]):
+            response = client.get(url)
+            if response.status_code != 200:
+                raise CommandError(f"{url} respondió {response.status_code}.")
+            html = _body(response)
+
+            parser = _ResourceParser()
+            parser.feed(html.decode("utf-8", "replace"))
+            for res in parser.resources:
+                if _is_local(res.url):
+                    res.size = self._local_size(client, res.url)
+                elif opts["external"]:
+                    res.size = self._external_size(res.url)
+
+        self._report(url, len(html), parser.resources)
+
+    def _local_size(self, client, url: str):
+        path = urlsplit(url).path
+        response = client.get(path)
+        if response.status_code == 200:
+            return len(_body(response))
+        if response.status_code in (301, 302):
+            return 0  # redirige a un tercero (ej: miniatura sin cachear todavía)
+        # Sin collectstatic (WhiteNoise no lo conoce): tamaño del archivo fuente
+        static_url = settings.STATIC_URL if settings.STATIC_URL.startswith("/") else f"/{settings.STATIC_URL}"
+        if path.startswith(static_url):
+            found = finders.find(path[len(static_url):])
+            if found:
+                with open(found, "rb") as fh:
+                    return len(fh.read())
+        return None
+
+    def _external_size(self, url: str):
+        if url.startswith("//"):
+            url = f"https:{url}"
+        try:
+            with urllib.request.urlopen(url, timeout=10) as resp:
+                return len(resp.read())
+        except Exception as exc:
+            self.stderr.write(f"  no se pudo descargar {url}: {exc}")
+            return None
+
+    def _report(self, url: str, html_size: int, resources: list[Resource]):
+        self.stdout.write(f"Página: {url}")
+        self.stdout.write(f"  {'html':7} {'':9} {html_size:>10,} B")
+        for res in resources:
+            if res.blocking:
+                when = "bloquea"
+            elif res.kind == "js":
+                when = "diferido"
+            else:
+                when = "eager" if res.eager else "lazy"
+            origin = "" if _is_local(res.url) else "  [tercero]"
+            size = f"{res.size:>10,} B" if res.size is not None else f"{'?':>12}"
+            self.stdout.write(f"  {res.kind:7} {when:9} {size}  {res.url}{origin}")
+
+        eager = [r for r in resources if r.eager]
+        local = sum(r.size or 0 for r in eager if _is_local(r.url))
+        external = [r for r in eager if not _is_local(r.url)]
+        external_known = sum(r.size or 0 for r in external)
+        blocking = sum(1 for r in resources if r.blocking)
+
+        self.stdout.write("")
+        self.stdout.write(f"HTML + recursos locales al cargar: {html_size + local:,} B")
+        self.stdout.write(
+            f"Recursos de terceros al cargar: {len(external)}"
+            + (f" ({external_known:,} B medidos)" if external_known else "")
+        )
+        self.stdout.write(f"CSS y scripts síncronos (bloquean render o parser): {blocking}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Total medido: {html_size + local + external_known:,} B"
+        ))
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('training', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trainingmodule',
+            name='question_selection',
+            field=models.CharField(choices=[('fixed', 'Fija (las 10 primeras del banco, en orden)'), ('random', 'Al azar del banco'), ('stratified', 'Al azar, proporcional por tema y dificultad')], default='fixed', max_length=16, verbose_name='Selección de preguntas'),
+        ),
+        migrations.AddField(
+            model_name='trainingmodule',
+            name='shuffle_choices',
+            field=models.BooleanField(default=False, verbose_name='Mezclar opciones'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('training', '0002_question_selection'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trainingmodule',
+            name='pool_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -17,6 +17,26 @@ class TrainingModule(models.Model):
 
     is_active = models.BooleanField(default=False, verbose_name="¿Está activo?")
 
+    # Cómo se eligen las 10 preguntas de cada intento (ver apps/quiz/pool.py)
+    SELECTION_FIXED = "fixed"
+    SELECTION_RANDOM = "random"
+    SELECTION_STRATIFIED = "stratified"
+    SELECTION_CHOICES = [
+        (SELECTION_FIXED, "Fija (las 10 primeras del banco, en orden)"),
+        (SELECTION_RANDOM, "Al azar del banco"),
+        (SELECTION_STRATIFIED, "Al azar, proporcional por tema y dificultad"),
+    ]
+    question_selection = models.CharField(
+        max_length=16,
+        choices=SELECTION_CHOICES,
+        default=SELECTION_FIXED,
+        verbose_name="Selección de preguntas",
+    )
+    shuffle_choices = models.BooleanField(default=False, verbose_name="Mezclar opciones")
+    # Sube con cada cambio de preguntas/opciones (apps/quiz/signals.py). Aparte de
+    # updated_at, que decide cuál es el módulo activo y no debe moverse por eso.
+    pool_version = models.PositiveIntegerField(default=0, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
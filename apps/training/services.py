@@ -0,0 +1,193 @@
+# apps/training/services.py
+"""
+Módulo activo cacheado.
+
+training_home es la página más visitada (el destino después del login) y
+siempre resolvía el mismo módulo con una query. Ahora:
+
+    - get_active_module() lee el módulo del cache de Django; se borra al
+      guardar/borrar cualquier TrainingModule (signals.py). Solo con un cache
+      compartido (SHARED_CACHE): con locmem el borrado no llega a los otros
+      workers, que seguirían mostrando un módulo desactivado; ahí es una query.
+    - el cuerpo de la página se cachea como fragmento por módulo + updated_at
+      + versión de los estáticos ({% cache %} en training_page.html).
+    - la respuesta lleva ETag, así un F5 sin cambios es un 304.
+"""
+
+import hashlib
+import logging
+import re
+import urllib.request
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from .models import TrainingModule
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_MODULE_KEY = "training:active_module"
+_NONE = "none"  # "no hay módulo activo" también se cachea
+
+# Estáticos que referencia la página (sus URLs con hash cambian en cada deploy)
+PAGE_ASSETS = ("css/app.css", "js/ergobot_chat.js", "js/quiz.js", "js/training_page.js")
+
+
+def get_active_module():
+    """El módulo activo más reciente, o None. Sin queries mientras esté en cache."""
+    if not settings.SHARED_CACHE:
+        return _query_active_module()
+    module = cache.get(ACTIVE_MODULE_KEY)
+    if module is None:
+        module = _query_active_module() or _NONE
+        cache.set(ACTIVE_MODULE_KEY, module, settings.TRAINING_MODULE_CACHE_SECONDS)
+    return None if module == _NONE else module
+
+
+def _query_active_module():
+    return TrainingModule.objects.filter(is_active=True).order_by("-updated_at").first()
+
+
+def invalidate_active_module() -> None:
+    cache.delete(ACTIVE_MODULE_KEY)
+
+
+@lru_cache(maxsize=1)
+def precache_urls() -> tuple:
+    """
+    URLs con hash (manifest de CompressedManifestStaticFilesStorage) de
+    nuestros CSS/JS, para que el service worker las precargue. Sin manifest
+    (DEBUG, sin collectstatic) quedan las de PAGE_ASSETS.
+    """
+    manifest = getattr(staticfiles_storage, "hashed_files", None) or {}
+    names = sorted(n for n in manifest if n.startswith(("css/", "js/"))) or list(PAGE_ASSETS)
+    urls = []
+    for name in names:
+        try:
+            urls.append(staticfiles_storage.url(name))
+        except ValueError:
+            continue
+    return tuple(urls)
+
+
+@lru_cache(maxsize=1)
+def asset_version() -> str:
+    """Hash de las URLs de los estáticos: cambia con cada collectstatic que los toque."""
+    try:
+        urls = "|".join(staticfiles_storage.url(name) for name in PAGE_ASSETS)
+    except ValueError:  # manifest sin la entrada (ej: antes de collectstatic)
+        urls = ""
+    return hashlib.sha1(urls.encode("utf-8")).hexdigest()[:12]
+
+
+# ─────────────────────────────────────────────────────────────
+# Catálogo: todos los módulos activos con el avance del usuario
+# ─────────────────────────────────────────────────────────────
+STATUS_NOT_STARTED = "not_started"
+STATUS_IN_PROGRESS = "in_progress"
+STATUS_LOCKED = "locked"
+STATUS_PASSED = "passed"
+STATUS_CERTIFIED = "certified"
+
+STATUS_LABELS = {
+    STATUS_NOT_STARTED: "Sin empezar",
+    STATUS_IN_PROGRESS: "En curso",
+    STATUS_LOCKED: "Bloqueado",
+    STATUS_PASSED: "Aprobado",
+    STATUS_CERTIFIED: "Certificado vigente",
+}
+
+
+def catalog_for(user, now=None) -> list:
+    """
+    Módulos activos con el estado del usuario en UNA query: subqueries
+    correlacionadas sobre QuizState, QuizAttempt y Certificate en vez de una
+    búsqueda por módulo. Cada módulo vuelve con `.status` y `.status_label`.
+    """
+    from django.db.models import Exists, OuterRef, Subquery
+    from django.utils import timezone
+
+    from apps.certificates.models import Certificate
+    from apps.quiz.models import QuizAttempt, QuizState
+
+    now = now or timezone.now()
+    states = QuizState.objects.filter(user=user, module=OuterRef("pk"))
+    certificates = (
+        Certificate.objects.filter(user=user, module=OuterRef("pk"))
+        .order_by("-valid_until")
+    )
+    modules = (
+        TrainingModule.objects
+        .filter(is_active=True)
+        .annotate(
+            lockout_until=Subquery(states.values("lockout_until")[:1]),
+            last_passed=Subquery(states.values("last_passed")[:1]),
+            has_attempts=Exists(QuizAttempt.objects.filter(user=user, module=OuterRef("pk"))),
+            certificate_id=Subquery(certificates.values("id")[:1]),
+            certificate_valid_until=Subquery(certificates.values("valid_until")[:1]),
+        )
+        .order_by("title")
+    )
+
+    result = []
+    for module in modules:
+        if module.certificate_valid_until and module.certificate_valid_until > now:
+            module.status = STATUS_CERTIFIED
+        elif module.last_passed:
+            module.status = STATUS_PASSED
+        elif module.lockout_until and module.lockout_until > now:
+            module.status = STATUS_LOCKED
+        elif module.has_attempts:
+            module.status = STATUS_IN_PROGRESS
+        else:
+            module.status = STATUS_NOT_STARTED
+        module.status_label = STATUS_LABELS[module.status]
+        result.append(module)
+    return result
+
+
+# ─────────────────────────────────────────────────────────────
+# Miniatura del video (fachada de YouTube en training_page.html)
+# ─────────────────────────────────────────────────────────────
+YOUTUBE_ID_RE = re.compile(r"^[A-Za-z0-9_-]{6,32}$")
+YOUTUBE_THUMBNAIL_URL = "https://i.ytimg.com/vi/{id}/hqdefault.jpg"
+
+
+def youtube_thumbnail_url(youtube_id: str) -> str:
+    return YOUTUBE_THUMBNAIL_URL.format(id=youtube_id)
+
+
+def _thumbnail_path(youtube_id: str) -> str:
+    return f"thumbnails/{youtube_id}.jpg"
+
+
+def cached_thumbnail(youtube_id: str):
+    """Path en el storage de la miniatura del video, o None si todavía no se bajó."""
+    path = _thumbnail_path(youtube_id)
+    return path if default_storage.exists(path) else None
+
+
+def fetch_thumbnail(youtube_id: str):
+    """
+    Baja la miniatura de YouTube al storage (si no estaba) y devuelve su path,
+    o None si no se pudo. Se llama al guardar un módulo activo y en el warm-up,
+    nunca desde la vista: el request solo sirve lo que ya está guardado.
+    """
+    path = cached_thumbnail(youtube_id)
+    if path is not None:
+        return path
+    if not YOUTUBE_ID_RE.match(youtube_id or ""):
+        return None
+    try:
+        with urllib.request.urlopen(youtube_thumbnail_url(youtube_id), timeout=5) as resp:
+            data = resp.read()
+    except Exception as exc:
+        logger.warning("No se pudo bajar la miniatura de %s: %s", youtube_id, exc)
+        return None
+    if not data:
+        return None
+    return default_storage.save(_thumbnail_path(youtube_id), ContentFile(data))
@@ -0,0 +1,21 @@
+# apps/training/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import TrainingModule
+from .services import fetch_thumbnail, invalidate_active_module
+
+
+@receiver(post_save, sender=TrainingModule)
+@receiver(post_delete, sender=TrainingModule)
+def invalidate_active_module_cache(sender, instance, **kwargs):
+    """Activar/desactivar o editar un módulo cambia cuál es el activo (y su contenido)."""
+    invalidate_active_module()
+
+
+@receiver(post_save, sender=TrainingModule)
+def fetch_module_thumbnail(sender, instance, raw=False, **kwargs):
+    """La miniatura del video se baja al guardar un módulo activo (la vista ya no baja nada)."""
+    if instance.is_active and instance.youtube_id and not raw:
+        transaction.on_commit(lambda: fetch_thumbnail(instance.youtube_id))
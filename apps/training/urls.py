@@ -6,4 +6,7 @@ from . import views
 urlpatterns = [
     # Esta ruta se convertirá en /capacitacion/ debido al prefijo global
     path("", views.training_home, name="training_home"),
+    path("modulos/", views.catalog, name="training_catalog"),
+    path("modulos/<slug:slug>/", views.module_detail, name="training_module"),
+    path("video/<str:youtube_id>/miniatura.jpg", views.video_thumbnail, name="training_video_thumbnail"),
 ]
\ No newline at end of file
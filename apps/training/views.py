@@ -1,23 +1,148 @@
 # apps/training/views.py
 
+import hashlib
+import json
+
+from django.conf import settings
+from django.contrib import messages
+from django.utils.cache import patch_cache_control
+from django.views.decorators.cache import cache_control
 from django.views.decorators.csrf import ensure_csrf_cookie
+from django.views.decorators.http import condition
 from django.contrib.auth.decorators import login_required
-from django.shortcuts import render
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from apps.quiz.services import quiz_boot
 from .models import TrainingModule
+from .services import (
+    YOUTUBE_ID_RE, asset_version, cached_thumbnail, catalog_for, get_active_module,
+    precache_urls, youtube_thumbnail_url,
+)
+
+THUMBNAIL_MAX_AGE = 30 * 24 * 60 * 60
+
+
+def _training_etag(request):
+    """
+    ETag de la página: módulo + versión de estáticos + usuario + secreto CSRF
+    (el form de logout lo lleva) + estado del examen embebido (bloqueo, intentos,
+    certificado). Con mensajes pendientes no hay ETag: se renderiza.
+    """
+    if len(messages.get_messages(request)):
+        return None
+    module = _active_module_for(request)
+    boot = _boot_for(request, module)
+    parts = [
+        str(module.pk) if module else "-",
+        str(module.updated_at.timestamp()) if module else "-",
+        asset_version(),
+        str(request.user.pk),
+        request.META.get("CSRF_COOKIE", ""),
+    ]
+    if boot:
+        # La pregunta sorteada no entra: con un 304 se reusa la ya embebida (token firmado)
+        # attempts_started: un token de selección ya usado no se vuelve a servir con un 304
+        parts += [str(boot[k]) for k in (
+            "locked", "lockout_until", "retake_available_at", "attempts_left", "certificate", "attempts_started",
+        )]
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+
 
 @ensure_csrf_cookie
 @login_required(login_url="landing")
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_training_etag)
 def training_home(request):
     """
     Obtiene el módulo de capacitación más reciente que esté activo
     y lo envía al template de la página de entrenamiento.
+    El módulo sale del cache y el cuerpo de la página es un fragmento cacheado.
     """
-    module = (
-        TrainingModule.objects
-        .filter(is_active=True)
-        .order_by("-updated_at")
-        .first()
-    )
-    
+    module = _active_module_for(request)
+
     # Enviamos el módulo en el contexto bajo el nombre 'module'
-    return render(request, "training/training_page.html", {"module": module})
\ No newline at end of file
+    return _render_training_page(request, module)
+
+
+def _active_module_for(request):
+    """get_active_module una sola vez por request (lo usan el ETag y la vista)."""
+    if not hasattr(request, "_active_module"):
+        request._active_module = get_active_module()
+    return request._active_module
+
+
+def _boot_for(request, module):
+    """quiz_boot una sola vez por request (lo usan el ETag y el render)."""
+    if module is None:
+        return None
+    if getattr(request, "_quiz_boot", None) is None:
+        request._quiz_boot = quiz_boot(request.user, module)
+    return request._quiz_boot
+
+
+def _render_training_page(request, module):
+    return render(request, "training/training_page.html", {
+        "module": module,
+        "asset_version": asset_version(),
+        "fragment_seconds": settings.TRAINING_PAGE_CACHE_SECONDS,
+        # Estado del examen + primera pregunta (json_script, fuera del fragmento cacheado)
+        "quiz_boot": _boot_for(request, module),
+    })
+
+
+@login_required(login_url="landing")
+def catalog(request):
+    """Todos los módulos activos con el avance del trabajador (una query)."""
+    return render(request, "training/catalog.html", {"modules": catalog_for(request.user)})
+
+
+@ensure_csrf_cookie
+@login_required(login_url="landing")
+def module_detail(request, slug):
+    """Página de un módulo del catálogo: la misma que training_home."""
+    module = get_object_or_404(TrainingModule, slug=slug, is_active=True)
+    return _render_training_page(request, module)
+
+
+def video_thumbnail(request, youtube_id):
+    """
+    Miniatura del video servida desde nuestro storage: la fachada de la página
+    no le pide nada a YouTube hasta que el trabajador aprieta play.
+    La URL lleva el ID del video, así que se puede cachear para siempre.
+    Solo para videos de módulos activos, y sin bajar nada acá: la miniatura se
+    guarda al activar el módulo (signals.py) o en el warm-up.
+    """
+    if not YOUTUBE_ID_RE.match(youtube_id):
+        raise Http404
+    if not TrainingModule.objects.filter(youtube_id=youtube_id, is_active=True).exists():
+        raise Http404
+    path = cached_thumbnail(youtube_id)
+    if path is None:
+        # Todavía no se bajó (o no hubo red hacia YouTube): que la pida el navegador
+        # (sin cachear la redirección)
+        response = redirect(youtube_thumbnail_url(youtube_id))
+        patch_cache_control(response, no_cache=True)
+        return response
+    response = FileResponse(default_storage.open(path, "rb"), content_type="image/jpeg")
+    patch_cache_control(response, public=True, max_age=THUMBNAIL_MAX_AGE, immutable=True)
+    return response
+
+
+def service_worker(request):
+    """
+    /sw.js: se sirve desde la raíz (no desde /static/) para que su alcance
+    cubra /capacitacion/ y /quiz/. La lista de precarga sale del manifest de
+    estáticos, así cada deploy instala un cache nuevo y borra el anterior.
+    """
+    precache = precache_urls()
+    response = render(request, "training/sw.js", {
+        "cache_version": hashlib.sha1("|".join(precache).encode("utf-8")).hexdigest()[:12],
+        "precache": json.dumps(list(precache)),
+        "page_prefix": reverse("training_home"),
+        "logout_url": reverse("logout_post"),
+    }, content_type="application/javascript; charset=utf-8")
+    # El navegador igual lo revalida, pero que ningún proxy lo retenga
+    patch_cache_control(response, no_cache=True)
+    return response
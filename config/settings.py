@@ -1,6 +1,7 @@
 # config/settings.py
 from pathlib import Path
 import os
+import tempfile
 import environ
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -35,11 +36,17 @@ LOCAL_APPS = [
     "apps.quiz",
     "apps.certificates",
     "apps.ergobot_ai",
+    "apps.companies",
+    "apps.observability",
 ]
 
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    # Primero: request_id para los logs y medición del request entero (apps/observability/middleware.py)
+    "apps.observability.middleware.RequestIdMiddleware",
+    "apps.observability.middleware.MetricsMiddleware",
+    "apps.observability.middleware.TracingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -98,6 +105,47 @@ TIME_ZONE = "America/Argentina/Buenos_Aires"
 USE_I18N = True
 USE_TZ = True
 
+# =====================================================
+# CACHE
+# =====================================================
+# locmem alcanza en desarrollo; en producción con varios workers usar un cache
+# compartido (ej: CACHE_URL=redis://127.0.0.1:6379/1), si no las invalidaciones
+# de un proceso no llegan a los otros.
+CACHES = {"default": env.cache("CACHE_URL", default="locmemcache://")}
+
+# ¿Todos los workers ven el mismo cache? Con locmem cada proceso tiene el suyo:
+# lo que se invalida por signals y autoriza requests (usuario de la sesión) no
+# se cachea, para que otro worker no siga sirviendo una copia vieja.
+SHARED_CACHE = not CACHES["default"]["BACKEND"].endswith(("LocMemCache", "DummyCache"))
+
+# Segundos que vive el usuario cacheado de la sesión (apps/accounts/backends.py)
+ACCOUNTS_USER_CACHE_SECONDS = env.int("ACCOUNTS_USER_CACHE_SECONDS", default=300)
+
+# Módulo activo y fragmento de la página de capacitación (apps/training/services.py)
+TRAINING_MODULE_CACHE_SECONDS = env.int("TRAINING_MODULE_CACHE_SECONDS", default=3600)
+TRAINING_PAGE_CACHE_SECONDS = env.int("TRAINING_PAGE_CACHE_SECONDS", default=3600)
+
+# Sesiones: se leen del cache y se escriben también en la base (no se pierden si se vacía el cache)
+SESSION_ENGINE = env("SESSION_ENGINE", default="django.contrib.sessions.backends.cached_db")
+
+# =====================================================
+# QUIZ
+# =====================================================
+# "db": cada respuesta se guarda en QuizAttempt.answers (un UPDATE por click).
+# "token": las respuestas viajan en un token firmado y submit escribe una sola vez
+# (apps/quiz/tokens.py).
+QUIZ_ANSWER_MODE = env("QUIZ_ANSWER_MODE", default="db")
+QUIZ_ANSWER_TOKEN_MAX_AGE = env.int("QUIZ_ANSWER_TOKEN_MAX_AGE", default=6 * 60 * 60)
+
+# Segundos que se guarda la respuesta de answer/submit por Idempotency-Key (apps/quiz/idempotency.py)
+QUIZ_IDEMPOTENCY_SECONDS = env.int("QUIZ_IDEMPOTENCY_SECONDS", default=10 * 60)
+
+# =====================================================
+# EMPRESAS (apps/companies)
+# =====================================================
+# Vigencia de los links de descarga que genera el tablero del empleador
+COMPANY_EXPORT_LINK_SECONDS = env.int("COMPANY_EXPORT_LINK_SECONDS", default=15 * 60)
+
 # =====================================================
 # STATIC FILES
 # =====================================================
@@ -151,9 +199,102 @@ ADMIN_EMAIL = env("ADMIN_EMAIL", default="")
 OPENAI_API_KEY = env("OPENAI_API_KEY", default="")
 OPENAI_MODEL = env("OPENAI_MODEL", default="gpt-4.1-mini-2025-04-14")
 
+# Límites del stream de Ergobot: cortamos runs abandonados o desbocados
+ERGOBOT_MAX_STREAM_SECONDS = env.int("ERGOBOT_MAX_STREAM_SECONDS", default=90)
+ERGOBOT_MAX_OUTPUT_TOKENS = env.int("ERGOBOT_MAX_OUTPUT_TOKENS", default=800)
+
+# Coalescing del SSE: juntamos deltas y los mandamos cada N ms o M bytes (0 = sin buffer)
+ERGOBOT_SSE_FLUSH_MS = env.int("ERGOBOT_SSE_FLUSH_MS", default=50)
+ERGOBOT_SSE_FLUSH_BYTES = env.int("ERGOBOT_SSE_FLUSH_BYTES", default=512)
+# Comentario SSE de keep-alive mientras el modelo "piensa" (evita cortes de proxies; 0 = sin heartbeat)
+ERGOBOT_SSE_HEARTBEAT_SECONDS = env.int("ERGOBOT_SSE_HEARTBEAT_SECONDS", default=15)
+
+# Backend de ejecución: el real (OpenAI) o el modelo local para pruebas de carga
+ERGOBOT_BACKEND = env(
+    "ERGOBOT_BACKEND",
+    default="apps.ergobot_ai.backends.OpenAIAgentsBackend"
+)
+# Solo aplican con apps.ergobot_ai.backends.FakeBackend
+ERGOBOT_FAKE_TEXT = env("ERGOBOT_FAKE_TEXT", default="")
+ERGOBOT_FAKE_TOKENS = env.int("ERGOBOT_FAKE_TOKENS", default=0)
+ERGOBOT_FAKE_TTFT_MS = env.int("ERGOBOT_FAKE_TTFT_MS", default=300)
+ERGOBOT_FAKE_INTER_TOKEN_MS = env.int("ERGOBOT_FAKE_INTER_TOKEN_MS", default=20)
+
+# Pre-filtro local de consultas fuera de tema (responde sin llamar al LLM)
+ERGOBOT_PREFILTER_ENABLED = env.bool("ERGOBOT_PREFILTER_ENABLED", default=True)
+# Fracción mínima de palabras de la consulta que deben estar en el vocabulario del módulo
+ERGOBOT_PREFILTER_MIN_SCORE = env.float("ERGOBOT_PREFILTER_MIN_SCORE", default=0.15)
+# Consultas con menos palabras útiles que esto pasan siempre (seguimientos cortos)
+ERGOBOT_PREFILTER_MIN_TOKENS = env.int("ERGOBOT_PREFILTER_MIN_TOKENS", default=3)
+
+# Ruteo por tiers: del mejor al más barato/rápido. Se baja un escalón por cada
+# señal de presión (concurrencia, p95 de TTFT, prompt grande) y se va al último
+# si el módulo o la empresa agotaron su presupuesto diario (0 = sin límite).
+ERGOBOT_MODEL_TIERS = env.json("ERGOBOT_MODEL_TIERS", default=[
+    {"name": "primary", "model": OPENAI_MODEL, "max_tokens": ERGOBOT_MAX_OUTPUT_TOKENS},
+    {"name": "fast", "model": "gpt-4.1-nano-2025-04-14", "max_tokens": 400},
+])
+ERGOBOT_ROUTE_MAX_CONCURRENCY = env.int("ERGOBOT_ROUTE_MAX_CONCURRENCY", default=40)
+ERGOBOT_ROUTE_P95_TTFT_MS = env.int("ERGOBOT_ROUTE_P95_TTFT_MS", default=4000)
+ERGOBOT_ROUTE_MAX_PROMPT_TOKENS = env.int("ERGOBOT_ROUTE_MAX_PROMPT_TOKENS", default=12000)
+ERGOBOT_DAILY_TOKENS_PER_MODULE = env.int("ERGOBOT_DAILY_TOKENS_PER_MODULE", default=0)
+ERGOBOT_DAILY_TOKENS_PER_COMPANY = env.int("ERGOBOT_DAILY_TOKENS_PER_COMPANY", default=0)
+ERGOBOT_BUDGET_MAX_OUTPUT_TOKENS = env.int("ERGOBOT_BUDGET_MAX_OUTPUT_TOKENS", default=300)
+
+# Medición de uso (TTFT, duración, tokens): se escribe en lotes desde un hilo aparte
+ERGOBOT_USAGE_ENABLED = env.bool("ERGOBOT_USAGE_ENABLED", default=True)
+ERGOBOT_USAGE_BATCH_SIZE = env.int("ERGOBOT_USAGE_BATCH_SIZE", default=50)
+ERGOBOT_USAGE_FLUSH_SECONDS = env.float("ERGOBOT_USAGE_FLUSH_SECONDS", default=2.0)
+# Precios en USD por millón de tokens: {"modelo": [entrada, salida]}
+ERGOBOT_PRICING = env.json("ERGOBOT_PRICING", default={
+    "gpt-4.1-mini": [0.40, 1.60],
+    "gpt-4.1-nano": [0.10, 0.40],
+    "gpt-5-mini": [0.25, 2.00],
+    "gpt-5-nano": [0.05, 0.40],
+})
+
+# =====================================================
+# MÉTRICAS (/metrics, formato Prometheus)
+# =====================================================
+# Carpeta donde cada worker vuelca sus métricas para sumarlas entre procesos
+# (vacía = cada proceso expone solo lo suyo). Vaciarla al reiniciar el servicio.
+METRICS_DIR = env("METRICS_DIR", default=os.path.join(tempfile.gettempdir(), "ergocap-metrics"))
+METRICS_FLUSH_SECONDS = env.int("METRICS_FLUSH_SECONDS", default=5)
+# Sin login de staff, /metrics pide el token (Authorization: Bearer <token>) o una IP
+# de METRICS_ALLOWED_IPS. Ojo con las IPs: se compara REMOTE_ADDR, y detrás de un
+# proxy local todos llegan como 127.0.0.1. Vacíos = solo staff.
+METRICS_TOKEN = env("METRICS_TOKEN", default="")
+METRICS_ALLOWED_IPS = env.list("METRICS_ALLOWED_IPS", default=[])
+
+# =====================================================
+# TRACING (apps/observability/tracing.py)
+# =====================================================
+# Fracción de requests que se trazan (0 = solo los que llegan con traceparent sampled)
+TRACING_SAMPLE_RATE = env.float("TRACING_SAMPLE_RATE", default=0.0)
+# > 0: se graban todos los requests y se exportan también los que superen estos ms
+TRACING_SLOW_MS = env.int("TRACING_SLOW_MS", default=0)
+# Un span por línea (manage.py trace_show); vacío = no se escribe
+TRACING_JSONL_PATH = env("TRACING_JSONL_PATH", default=os.path.join(tempfile.gettempdir(), "ergocap-traces.jsonl"))
+# Colector OTLP/HTTP JSON (ej: http://127.0.0.1:4318/v1/traces, manage.py trace_collector)
+TRACING_OTLP_ENDPOINT = env("TRACING_OTLP_ENDPOINT", default="")
+
+# =====================================================
+# ARRANQUE (apps/observability/warmup.py)
+# =====================================================
+# Precargar en cada worker, antes del primer request, lo que hoy paga ese request:
+# SDK de agents y cliente de OpenAI, ReportLab, prompts y bancos de preguntas.
+# Suma ~2-3 s al arranque de cada worker (manage.py startup_report --warmup).
+WARMUP_ON_START = env.bool("WARMUP_ON_START", default=False)
+
 # =====================================================
 # LOGGING
 # =====================================================
+# Los logs de las apps se encolan y un hilo los escribe (apps/observability/logs.py):
+# el request nunca espera a la consola. "json" = una línea JSON por registro con
+# request_id/user_id/trace_id; "verbose" = texto, para leer en desarrollo.
+LOG_FORMAT = env("LOG_FORMAT", default="json")
+LOG_LEVEL = env("LOG_LEVEL", default="INFO")
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -162,21 +303,36 @@ LOGGING = {
             "format": "{levelname} {asctime} {module} {message}",
             "style": "{",
         },
+        "json": {
+            "()": "apps.observability.logs.JSONFormatter",
+        },
     },
     "handlers": {
         "console": {
-            "class": "logging.StreamHandler",
-            "formatter": "verbose",
+            "class": "apps.observability.logs.QueuedStreamHandler",
+            "formatter": LOG_FORMAT,
         },
     },
     "loggers": {
         "apps.certificates": {
             "handlers": ["console"],
-            "level": "INFO",
+            "level": LOG_LEVEL,
         },
         "apps.quiz": {
             "handlers": ["console"],
-            "level": "INFO",
+            "level": LOG_LEVEL,
+        },
+        "apps.ergobot_ai": {
+            "handlers": ["console"],
+            "level": LOG_LEVEL,
+        },
+        "apps.training": {
+            "handlers": ["console"],
+            "level": LOG_LEVEL,
+        },
+        "apps.observability": {
+            "handlers": ["console"],
+            "level": LOG_LEVEL,
         },
     },
 }
@@ -5,8 +5,17 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from apps.observability.views import metrics
+from apps.training.views import service_worker
+
 urlpatterns = [
     path("admin/", admin.site.urls),
+
+    # Service worker de la capacitación (alcance "/": tiene que vivir en la raíz)
+    path("sw.js", service_worker, name="service_worker"),
+
+    # Métricas para Prometheus (staff, METRICS_TOKEN o METRICS_ALLOWED_IPS)
+    path("metrics", metrics, name="metrics"),
     
     # Rutas de autenticación (CUIL/Email) en la raíz
     path("", include("apps.accounts.urls")),
@@ -22,6 +31,9 @@ urlpatterns = [
     
     # ✅ NUEVO (Commit 7): Rutas de Certificados
     path("certificados/", include("apps.certificates.urls")),
+
+    # Tablero del empleador (link con token, sin login)
+    path("empresas/", include("apps.companies.urls")),
 ]
 
 # Servir archivos media en desarrollo (NO usar en producción con Nginx/Apache)
@@ -23,6 +23,24 @@ async function sendErgobotMessage(moduleSlug, text, onDelta) {
   let assistantText = "";
   let buffer = "";
 
+  // Agrupamos los deltas y pintamos una sola vez por frame de animación
+  let pendingDelta = "";
+  let frameRequested = false;
+  const flushDelta = () => {
+    frameRequested = false;
+    if (!pendingDelta) return;
+    const chunk = pendingDelta;
+    pendingDelta = "";
+    if (onDelta) onDelta(chunk);
+  };
+  const queueDelta = (delta) => {
+    pendingDelta += delta;
+    if (!frameRequested) {
+      frameRequested = true;
+      requestAnimationFrame(flushDelta);
+    }
+  };
+
   while (true) {
     const { value, done } = await reader.read();
     if (done) break;
@@ -36,16 +54,18 @@ async function sendErgobotMessage(moduleSlug, text, onDelta) {
     for (const evt of events) {
       const lines = evt.split("\n");
       for (const line of lines) {
+        // Los heartbeats (": ping") son comentarios SSE: se ignoran
         if (!line.startsWith("data: ")) continue;
 
         const payload = JSON.parse(line.slice(6));
 
         if (payload.delta) {
           assistantText += payload.delta;
-          if (onDelta) onDelta(payload.delta);
+          queueDelta(payload.delta);
         }
 
         if (payload.done) {
+          flushDelta();
           // Guardamos ambos mensajes en el hilo para dar contexto a la siguiente pregunta
           window.ergobotThread.push({ role: "user", content: text });
           window.ergobotThread.push({ role: "assistant", content: assistantText });
@@ -54,12 +74,14 @@ async function sendErgobotMessage(moduleSlug, text, onDelta) {
 
         if (payload.error) {
           const msg = `\n\n[Error Ergobot] ${payload.error}`;
+          flushDelta();
           if (onDelta) onDelta(msg);
           return assistantText + msg;
         }
       }
     }
   }
+  flushDelta();
   return assistantText;
 }
 
@@ -5,59 +5,149 @@
  * Maneja el flujo: Inicio -> Preguntas -> Respuestas -> Submit -> Redirect
  */
 
-let QUIZ = { attemptId: null, moduleSlug: null, order: 1 };
+let QUIZ = {
+  attemptId: null, moduleSlug: null, order: 1, total: 10, answersToken: null, boot: null, starting: null,
+  poolVersion: "", prefetched: {},  // order -> Promise<payload|null>
+};
 
 function initQuiz(moduleSlug) {
   QUIZ.moduleSlug = moduleSlug;
+  // Estado embebido por el servidor (json_script "quizBoot" en training_page.html)
+  const bootEl = document.getElementById("quizBoot");
+  QUIZ.boot = bootEl ? JSON.parse(bootEl.textContent) : null;
+
   const btn = document.getElementById("quizStartBtn");
   if (btn) btn.onclick = startQuiz;
+  if (QUIZ.boot) renderBootState(QUIZ.boot, btn);
+}
+
+// --- 0. Estado inicial: bloqueo, intentos y certificado sin esperar al click ---
+function renderBootState(boot, btn) {
+  let html = "";
+  if (boot.certificate) {
+    html += `<div class="alert alert-success small text-start">
+      <i class="bi bi-award me-1"></i>Certificado vigente hasta ${formatIso(boot.certificate.valid_until)}.
+      <a class="alert-link" href="${boot.certificate.download_url}">Descargar</a>
+    </div>`;
+  }
+  if (boot.locked) {
+    html += lockMessage(boot);
+    if (btn) btn.classList.add("d-none");
+  } else {
+    html += `<p>Al finalizar el video, realizá el examen para obtener tu certificado.</p>
+      <small>Se aprueba con 8/10. Te quedan ${boot.attempts_left} de 3 intentos.</small>`;
+  }
+  setQuizBox(html);
+}
+
+function lockMessage(err) {
+  let msg = '<div class="alert alert-warning text-start small">';
+  msg += '<strong><i class="bi bi-lock me-1"></i>Examen no disponible</strong><br/>';
+  if (err.lockout_until) msg += `Bloqueado hasta: ${formatIso(err.lockout_until)}<br/>`;
+  if (err.retake_available_at) msg += `Disponible desde: ${formatIso(err.retake_available_at)}`;
+  msg += '</div>';
+  return msg;
 }
 
 // --- 1. Iniciar Intento ---
 async function startQuiz() {
-  setQuizBox(`<div class="text-secondary my-4"><span class="spinner-border spinner-border-sm me-2"></span>Iniciando examen...</div>`);
-  
+  // Primera pregunta embebida: se muestra ya y el intento se crea en paralelo
+  // (con la misma selección firmada). answer espera a que termine.
+  const boot = QUIZ.boot;
+  const optimistic = boot && boot.first && !boot.locked ? boot.first : null;
+  if (optimistic) {
+    QUIZ.boot = { ...boot, first: null };  // solo sirve para el primer intento
+    renderQuestion(optimistic);
+  } else {
+    setQuizBox(`<div class="text-secondary my-4"><span class="spinner-border spinner-border-sm me-2"></span>Iniciando examen...</div>`);
+  }
+
+  QUIZ.starting = createAttempt(optimistic, boot && boot.selection_token);
+  await QUIZ.starting;
+  QUIZ.starting = null;
+}
+
+async function createAttempt(optimistic, selectionToken) {
   try {
     const r = await fetch(`/quiz/${QUIZ.moduleSlug}/start/`, {
       method: "POST",
-      headers: { "X-CSRFToken": getCsrf() },
+      headers: { "Content-Type": "application/json", "X-CSRFToken": getCsrf() },
       credentials: "same-origin",
+      body: JSON.stringify({ selection_token: selectionToken || null }),
     });
 
     if (!r.ok) {
       const err = await r.json().catch(() => ({}));
       if (r.status === 403 && err.locked) {
-        let msg = '<div class="alert alert-warning text-start small">';
-        msg += '<strong><i class="bi bi-lock me-1"></i>Examen no disponible</strong><br/>';
-        if (err.lockout_until) msg += `Bloqueado hasta: ${formatIso(err.lockout_until)}<br/>`;
-        if (err.retake_available_at) msg += `Disponible desde: ${formatIso(err.retake_available_at)}`;
-        msg += '</div>';
-        setQuizBox(msg);
-        return;
+        setQuizBox(lockMessage(err));
+        return false;
       }
       setQuizBox(`<div class="alert alert-danger">Error al iniciar: ${err.error || "Desconocido"}</div>`);
-      return;
+      return false;
     }
 
     const data = await r.json();
     QUIZ.attemptId = data.attempt_id;
-    // Cargar primera pregunta
-    renderQuestion(data.next);
+    QUIZ.answersToken = null;
+    QUIZ.prefetched = {};
+    // Cargar primera pregunta (si la embebida no sirvió, el servidor sorteó otra)
+    if (!optimistic || !data.next || data.next.question_id !== optimistic.question_id) {
+      renderQuestion(data.next);
+    }
+    prefetchRemaining();
+    return true;
 
   } catch (e) {
     console.error(e);
     setQuizBox(`<div class="alert alert-danger">Error de conexión.</div>`);
+    return false;
   }
 }
 
 // --- 2. Cargar Pregunta (Navegación) ---
-async function loadQuestion(order) {
+
+// La URL lleva la versión del banco: el navegador la puede cachear y, si el
+// banco cambia, la versión nueva es otra URL (no se sirve la vieja)
+function questionUrl(order) {
+  const v = encodeURIComponent(QUIZ.poolVersion || "");
+  return `/quiz/${QUIZ.moduleSlug}/question/${order}/?attempt=${QUIZ.attemptId}&v=${v}`;
+}
+
+async function fetchQuestion(order, fresh = false) {
+  const r = await fetch(questionUrl(order), {
+    credentials: "same-origin",
+    cache: fresh ? "reload" : "default",
+  });
+  if (!r.ok) throw new Error(`Error loading question (${r.status})`);
+  return r.json();
+}
+
+// Pide la siguiente pregunta en paralelo con la respuesta actual (no bloquea nada)
+function prefetchQuestion(order) {
+  if (order > QUIZ.total || QUIZ.prefetched[order]) return;
+  QUIZ.prefetched[order] = fetchQuestion(order).catch(() => null);
+}
+
+// Todas las preguntas que faltan, mientras hay conexión: si se corta a mitad del
+// examen, las respuestas se encolan (service worker) y las preguntas ya están acá
+// (y en el cache del service worker, por si hay que pedirlas de nuevo)
+function prefetchRemaining() {
+  for (let order = QUIZ.order + 1; order <= QUIZ.total; order++) prefetchQuestion(order);
+}
+
+// Una precarga sirve si es la posición pedida y del banco vigente
+async function takePrefetched(order) {
+  const pending = QUIZ.prefetched[order];
+  delete QUIZ.prefetched[order];
+  if (!pending) return null;
+  const q = await pending;
+  if (!q || q.order !== order || (QUIZ.poolVersion && q.pool_version !== QUIZ.poolVersion)) return null;
+  return q;
+}
+
+async function loadQuestion(order, fresh = false) {
   try {
-    const r = await fetch(`/quiz/${QUIZ.moduleSlug}/question/${order}/`, {
-      credentials: "same-origin",
-    });
-    if (!r.ok) throw new Error("Error loading question");
-    const q = await r.json();
+    const q = (!fresh && await takePrefetched(order)) || await fetchQuestion(order, fresh);
     renderQuestion(q);
   } catch (e) {
     setQuizBox(`<div class="alert alert-danger">Error al cargar la pregunta ${order}.</div>`);
@@ -67,9 +157,11 @@ async function loadQuestion(order) {
 // --- 3. Renderizar UI de Pregunta ---
 function renderQuestion(q) {
   QUIZ.order = q.order;
+  if (q.total) QUIZ.total = q.total;
+  if (q.pool_version) QUIZ.poolVersion = q.pool_version;
   // Actualizar contador visual
   const counter = document.getElementById("quizCounter");
-  if(counter) counter.textContent = `${q.order}/10`;
+  if(counter) counter.textContent = `${q.order}/${q.total || 10}`;
 
   const box = document.getElementById("quizBox");
   box.classList.remove("text-secondary", "text-center"); // Limpiar estilos de estado inicial
@@ -95,20 +187,37 @@ async function sendAnswer(questionId, choiceId, btnElement) {
   document.querySelectorAll(".choice-btn").forEach(b => b.disabled = true);
   if(btnElement) btnElement.classList.replace("btn-outline-light", "btn-light"); // Feedback visual selección
 
+  // Si el intento se está creando (primera pregunta embebida), esperarlo
+  if (QUIZ.starting && !(await QUIZ.starting)) return;
+  // Si el servidor cambió la primera pregunta, ya se re-renderizó: ignorar este click
+  if (!document.body.contains(btnElement)) return;
+
+  // La siguiente pregunta viaja mientras se califica esta (si la precarga del inicio falló)
+  prefetchQuestion(QUIZ.order + 1);
+
   try {
-    const r = await fetch(`/quiz/${QUIZ.moduleSlug}/answer/`, {
-      method: "POST",
-      headers: { "Content-Type": "application/json", "X-CSRFToken": getCsrf() },
-      credentials: "same-origin",
-      body: JSON.stringify({ attempt_id: QUIZ.attemptId, question_id: questionId, choice_id: choiceId })
-    });
+    const r = await postIdempotent(`/quiz/${QUIZ.moduleSlug}/answer/`, {
+      attempt_id: QUIZ.attemptId, question_id: questionId, choice_id: choiceId,
+      answers_token: QUIZ.answersToken,
+    }, 3, QUIZ.boot?.answer_mode !== "token");
 
+    if (r.status === 404) {
+      // La pregunta en pantalla ya no está en el banco (se editó): recargarla sin cache
+      QUIZ.prefetched = {};
+      await loadQuestion(QUIZ.order, true);
+      return;
+    }
     if (!r.ok) {
       setFeedback(`<div class="alert alert-danger">Error al guardar respuesta.</div>`);
       return;
     }
 
     const data = await r.json();
+    if (data.queued) return showQueuedAnswer();
+    // Modo token: el servidor devuelve las respuestas acumuladas y firmadas
+    if (data.answers_token) QUIZ.answersToken = data.answers_token;
+    // Si el banco cambió, la precarga es vieja: takePrefetched la descarta por versión
+    if (data.pool_version) QUIZ.poolVersion = data.pool_version;
     
     // Mostrar Feedback Inmediato
     const alertClass = data.correct ? "alert-success" : "alert-danger";
@@ -142,12 +251,9 @@ async function submitQuiz() {
   box.innerHTML = `<div class="text-center py-5"><span class="spinner-border text-primary"></span><p class="mt-2">Calculando resultados...</p></div>`;
 
   try {
-    const r = await fetch(`/quiz/${QUIZ.moduleSlug}/submit/`, {
-      method: "POST",
-      headers: { "Content-Type": "application/json", "X-CSRFToken": getCsrf() },
-      credentials: "same-origin",
-      body: JSON.stringify({ attempt_id: QUIZ.attemptId })
-    });
+    const r = await postIdempotent(`/quiz/${QUIZ.moduleSlug}/submit/`, {
+      attempt_id: QUIZ.attemptId, answers_token: QUIZ.answersToken,
+    }, 3, true);
 
     if (!r.ok) {
       box.innerHTML = `<div class="alert alert-danger">Error al finalizar el examen. Por favor recarga la página.</div>`;
@@ -155,6 +261,13 @@ async function submitQuiz() {
     }
 
     const data = await r.json();
+    if (data.queued) {
+      box.innerHTML = `<div class="alert alert-warning">
+        <i class="bi bi-wifi-off me-2"></i>Sin conexión. Tu examen quedó guardado y se enviará solo cuando vuelva la conexión.
+        No cierres esta página.
+      </div>`;
+      return;  // onQuizReplayed redirige al resultado
+    }
     // Redirigir a la pantalla de resultados
     window.location.href = data.result_url;
 
@@ -163,8 +276,77 @@ async function submitQuiz() {
   }
 }
 
+// --- 6. Sin conexión (service worker, templates/training/sw.js) ---
+
+// La respuesta quedó en la cola del service worker: sin feedback, pero se puede seguir
+function showQueuedAnswer() {
+  const done = QUIZ.order >= QUIZ.total;
+  setFeedback(`
+    <div class="alert alert-warning">
+      <i class="bi bi-wifi-off me-2"></i>Sin conexión: tu respuesta quedó guardada y se enviará al volver la conexión.
+    </div>
+    <div class="d-grid">
+      <button id="nextBtn" class="btn btn-primary">
+        ${done ? 'Ver Resultados' : 'Siguiente Pregunta <i class="bi bi-arrow-right"></i>'}
+      </button>
+    </div>
+  `);
+  document.getElementById("nextBtn").onclick = async () => {
+    if (done) return submitQuiz();
+    await loadQuestion(QUIZ.order + 1);
+  };
+}
+
+// El service worker avisa cuando reenvió algo de la cola
+function onQuizReplayed(msg) {
+  if (msg.url.endsWith("/submit/") && msg.body && msg.body.result_url) {
+    window.location.href = msg.body.result_url;
+  }
+}
+
 // --- Helpers ---
 
+/**
+ * POST JSON con Idempotency-Key: la misma clave en todos los reintentos, así el
+ * servidor devuelve la respuesta original en vez de volver a calificar (o a
+ * generar el certificado) si la primera llegó pero se perdió la respuesta.
+ * Reintenta ante error de red, 409 (en curso/conflicto) y 5xx.
+ */
+async function postIdempotent(url, payload, retries = 3, offlineQueue = false) {
+  const key = newIdempotencyKey();
+  const body = JSON.stringify(payload);
+  const headers = { "Content-Type": "application/json", "X-CSRFToken": getCsrf(), "Idempotency-Key": key };
+  // Sin red, el service worker encola el POST y responde 202 {queued: true}
+  if (offlineQueue) headers["X-Offline-Queue"] = "1";
+  for (let i = 0; ; i++) {
+    try {
+      const r = await fetch(url, {
+        method: "POST",
+        headers,
+        credentials: "same-origin",
+        body,
+      });
+      if ((r.status === 409 || r.status >= 500) && i < retries) {
+        await sleep(500 * 2 ** i);
+        continue;
+      }
+      return r;
+    } catch (e) {
+      if (i >= retries) throw e;
+      await sleep(500 * 2 ** i);
+    }
+  }
+}
+
+function newIdempotencyKey() {
+  if (window.crypto?.randomUUID) return crypto.randomUUID();
+  return `${Date.now()}-${Math.random().toString(16).slice(2)}`;
+}
+
+function sleep(ms) {
+  return new Promise(resolve => setTimeout(resolve, ms));
+}
+
 function setQuizBox(html) {
   const box = document.getElementById("quizBox");
   if (box) box.innerHTML = html;
@@ -0,0 +1,90 @@
+// static/js/training_page.js
+
+/**
+ * Página de capacitación: fachada del video y chat con Ergobot.
+ * Se carga con `defer` (no bloquea el render); el slug del módulo viene
+ * en data-module-slug del card del chat.
+ */
+
+// --- Video: el iframe de YouTube recién cuando el trabajador aprieta play ---
+function initVideoFacade() {
+  document.querySelectorAll(".yt-facade").forEach(facade => {
+    const btn = facade.querySelector(".yt-facade-btn");
+    if (!btn) return;
+    btn.addEventListener("click", () => {
+      const iframe = document.createElement("iframe");
+      iframe.src = `https://www.youtube.com/embed/${encodeURIComponent(facade.dataset.youtubeId)}?autoplay=1`;
+      iframe.title = facade.dataset.title || "Capacitación";
+      iframe.referrerPolicy = "strict-origin-when-cross-origin";
+      iframe.allow = "accelerometer; autoplay; clipboard-write; encrypted-media; gyroscope; picture-in-picture";
+      iframe.allowFullscreen = true;
+      facade.replaceChildren(iframe);
+    }, { once: true });
+  });
+}
+
+// --- Chat con Ergobot ---
+function initErgobotChat() {
+  const card = document.getElementById("ergobotChat");
+  if (!card) return;
+  const moduleSlug = card.dataset.moduleSlug;
+  const log = document.getElementById("chatLog");
+  const input = document.getElementById("chatInput");
+  const btn = document.getElementById("chatSend");
+
+  async function handleSend() {
+    const text = input.value.trim();
+    if (!text) return;
+
+    // Deshabilitar UI mientras responde
+    input.value = "";
+    input.disabled = true;
+    btn.disabled = true;
+
+    // Agregar mensaje del usuario al log
+    log.innerHTML += `<div class="mt-2"><strong>👤 Usuario:</strong><br>${text}</div>`;
+    log.innerHTML += `<div class="mt-2"><strong>🤖 Ergobot:</strong><br><span id="currentDelta"></span></div>`;
+
+    const deltaSpan = document.getElementById("currentDelta");
+    log.scrollTop = log.scrollHeight;
+
+    try {
+      await sendErgobotMessage(moduleSlug, text, (delta) => {
+        deltaSpan.textContent += delta;
+        log.scrollTop = log.scrollHeight;
+      });
+      // Una vez terminado, le quitamos el ID para el próximo mensaje
+      deltaSpan.removeAttribute("id");
+    } catch (err) {
+      log.innerHTML += `<div class="text-danger mt-1">Error: No se pudo conectar con el bot.</div>`;
+    } finally {
+      input.disabled = false;
+      btn.disabled = false;
+      input.focus();
+    }
+  }
+
+  btn.onclick = handleSend;
+  input.onkeypress = (e) => { if (e.key === 'Enter') handleSend(); };
+}
+
+// --- Service worker: estáticos precargados y cola de respuestas sin conexión ---
+function initServiceWorker() {
+  if (!("serviceWorker" in navigator)) return;
+  navigator.serviceWorker.register("/sw.js").catch(err => console.warn("Service worker:", err));
+
+  // Al volver la conexión, que reenvíe lo encolado (donde no hay Background Sync)
+  window.addEventListener("online", () => {
+    navigator.serviceWorker.controller?.postMessage({ type: "flush-outbox" });
+  });
+  navigator.serviceWorker.addEventListener("message", (event) => {
+    if (event.data?.type === "quiz-replayed" && typeof onQuizReplayed === "function") {
+      onQuizReplayed(event.data);
+    }
+  });
+}
+
+// Los scripts con defer corren con el DOM ya parseado
+initVideoFacade();
+initErgobotChat();
+initServiceWorker();
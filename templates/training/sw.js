@@ -0,0 +1,198 @@
+// sw.js (templates/training/sw.js, servido por apps/training/views.service_worker)
+
+/**
+ * Service worker de la capacitación, pensado para redes de planta que se cortan:
+ *  - precarga los CSS/JS con hash del manifest (cambian de URL en cada deploy)
+ *  - página de capacitación: red primero, copia guardada si no hay conexión
+ *  - miniaturas y CDN (URLs versionadas): cache primero
+ *  - preguntas del intento (?attempt=&v=, fijas mientras no cambie el banco):
+ *    cache primero. quiz.js las pide todas al iniciar, así sin red se sigue
+ *  - POST de answer/submit sin red: se encolan en IndexedDB y se reenvían al
+ *    volver la conexión. Llevan Idempotency-Key, así que reenviar es seguro.
+ *    Leer preguntas no pasa por la cola: se reenvían en el orden en que se
+ *    respondieron y submit queda último.
+ */
+
+const VERSION = "{{ cache_version }}";
+const STATIC_CACHE = `ergocap-static-${VERSION}`;
+const PAGES_CACHE = "ergocap-pages";
+const RUNTIME_CACHE = "ergocap-runtime";
+const QUIZ_CACHE = "ergocap-quiz";
+const QUESTION_PATH = /^\/quiz\/[^/]+\/question\/\d+\/$/;
+const PRECACHE = {{ precache|safe }};
+const PAGE_PREFIX = "{{ page_prefix }}";
+const LOGOUT_URL = "{{ logout_url }}";
+
+const OUTBOX_DB = "ergocap-outbox";
+const OUTBOX_STORE = "requests";
+const SYNC_TAG = "quiz-outbox";
+// Solo se encolan los POST que la página marca (answer en modo "db" y submit)
+const QUEUE_HEADER = "X-Offline-Queue";
+
+self.addEventListener("install", (event) => {
+  event.waitUntil(
+    caches.open(STATIC_CACHE).then(cache => cache.addAll(PRECACHE)).then(() => self.skipWaiting())
+  );
+});
+
+self.addEventListener("activate", (event) => {
+  event.waitUntil((async () => {
+    const keep = [STATIC_CACHE, PAGES_CACHE, RUNTIME_CACHE, QUIZ_CACHE];
+    for (const key of await caches.keys()) {
+      if (key.startsWith("ergocap-") && !keep.includes(key)) await caches.delete(key);
+    }
+    await self.clients.claim();
+    await flushOutbox();
+  })());
+});
+
+self.addEventListener("fetch", (event) => {
+  const request = event.request;
+  const url = new URL(request.url);
+
+  if (request.method === "POST") {
+    if (url.pathname === LOGOUT_URL) {
+      // La página y las preguntas guardadas son de este trabajador: no dejarlas en un equipo compartido
+      event.waitUntil(Promise.all([caches.delete(PAGES_CACHE), caches.delete(QUIZ_CACHE)]));
+      return;
+    }
+    if (request.headers.has(QUEUE_HEADER)) event.respondWith(sendOrQueue(request));
+    return;
+  }
+  if (request.method !== "GET") return;
+
+  if (url.origin === self.location.origin) {
+    if (PRECACHE.includes(url.pathname)) {
+      event.respondWith(cacheFirst(request, STATIC_CACHE));
+    } else if (url.pathname.includes("/video/") && url.pathname.endsWith("/miniatura.jpg")) {
+      event.respondWith(cacheFirst(request, RUNTIME_CACHE));
+    } else if (QUESTION_PATH.test(url.pathname) && url.searchParams.get("attempt") && url.searchParams.get("v")) {
+      event.respondWith(cachedQuestion(request, url.searchParams.get("attempt")));
+    } else if (request.mode === "navigate" && url.pathname.startsWith(PAGE_PREFIX)) {
+      event.respondWith(networkFirst(request, PAGES_CACHE));
+    }
+  } else if (url.hostname === "cdn.jsdelivr.net") {
+    // Bootstrap desde el CDN: la URL lleva la versión
+    event.respondWith(cacheFirst(request, RUNTIME_CACHE));
+  }
+});
+
+async function cacheFirst(request, cacheName) {
+  const cached = await caches.match(request);
+  if (cached) return cached;
+  const response = await fetch(request);
+  if (response.ok || response.type === "opaque") {
+    const cache = await caches.open(cacheName);
+    cache.put(request, response.clone());
+  }
+  return response;
+}
+
+// Preguntas del intento: se guardan las del intento en curso y se tiran las de intentos anteriores
+async function cachedQuestion(request, attemptId) {
+  const cache = await caches.open(QUIZ_CACHE);
+  const cached = await cache.match(request);
+  if (cached) return cached;
+  const response = await fetch(request);
+  if (response.ok) {
+    for (const key of await cache.keys()) {
+      if (new URL(key.url).searchParams.get("attempt") !== attemptId) await cache.delete(key);
+    }
+    await cache.put(request, response.clone());
+  }
+  return response;
+}
+
+async function networkFirst(request, cacheName) {
+  try {
+    const response = await fetch(request);
+    if (response.ok) {
+      const cache = await caches.open(cacheName);
+      cache.put(request, response.clone());
+    }
+    flushOutbox();
+    return response;
+  } catch (err) {
+    const cached = await caches.match(request);
+    if (cached) return cached;
+    throw err;
+  }
+}
+
+// ─── Cola de POSTs sin conexión ───────────────────────────────
+
+function openOutbox() {
+  return new Promise((resolve, reject) => {
+    const req = indexedDB.open(OUTBOX_DB, 1);
+    req.onupgradeneeded = () => req.result.createObjectStore(OUTBOX_STORE, { keyPath: "id", autoIncrement: true });
+    req.onsuccess = () => resolve(req.result);
+    req.onerror = () => reject(req.error);
+  });
+}
+
+async function outboxTx(mode, fn) {
+  const db = await openOutbox();
+  return new Promise((resolve, reject) => {
+    const tx = db.transaction(OUTBOX_STORE, mode);
+    const result = fn(tx.objectStore(OUTBOX_STORE));
+    tx.oncomplete = () => resolve(result && "result" in result ? result.result : undefined);
+    tx.onerror = () => reject(tx.error);
+  });
+}
+
+async function sendOrQueue(request) {
+  const copy = request.clone();
+  try {
+    return await fetch(request);
+  } catch (err) {
+    const headers = {};
+    for (const name of ["Content-Type", "X-CSRFToken", "Idempotency-Key"]) {
+      if (copy.headers.has(name)) headers[name] = copy.headers.get(name);
+    }
+    const body = await copy.text();  // antes de abrir la transacción (no sobrevive a un await)
+    await outboxTx("readwrite", store => store.add({ url: copy.url, headers, body, queuedAt: Date.now() }));
+    if (self.registration.sync) {
+      self.registration.sync.register(SYNC_TAG).catch(() => {});
+    }
+    return new Response(JSON.stringify({ queued: true }), {
+      status: 202, headers: { "Content-Type": "application/json" },
+    });
+  }
+}
+
+let flushing = null;
+
+function flushOutbox() {
+  // Una sola pasada a la vez (sync + mensaje "online" pueden llegar juntos)
+  if (!flushing) flushing = doFlush().finally(() => { flushing = null; });
+  return flushing;
+}
+
+async function doFlush() {
+  const items = await outboxTx("readonly", store => store.getAll());
+  for (const item of items || []) {
+    let response;
+    try {
+      response = await fetch(item.url, {
+        method: "POST", headers: item.headers, body: item.body, credentials: "same-origin",
+      });
+    } catch (err) {
+      return;  // sigue sin red: queda todo en la cola, en orden
+    }
+    if (response.status === 409 || response.status >= 500) return;  // reintentar más tarde
+    await outboxTx("readwrite", store => store.delete(item.id));
+    const body = await response.json().catch(() => ({}));
+    const clients = await self.clients.matchAll({ type: "window" });
+    clients.forEach(client => client.postMessage({
+      type: "quiz-replayed", url: item.url, status: response.status, body,
+    }));
+  }
+}
+
+self.addEventListener("sync", (event) => {
+  if (event.tag === SYNC_TAG) event.waitUntil(flushOutbox());
+});
+
+self.addEventListener("message", (event) => {
+  if (event.data && event.data.type === "flush-outbox") event.waitUntil(flushOutbox());
+});